@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import StudentProfile, Subject, StudentSubject, Result, Attendance
+from .models import StudentProfile, Subject, StudentSubject, Result, Attendance, AcademicSummary, Job
+from .search import filter_students
+from .jobs import SENSITIVE_TASKS
 
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
@@ -7,6 +9,12 @@ class StudentProfileAdmin(admin.ModelAdmin):
     list_filter = ['profile_completed', 'course', 'semester']
     search_fields = ['roll_number', 'user__username', 'user__first_name', 'user__last_name']
 
+    def get_search_results(self, request, queryset, search_term):
+        # Served by the full-text index instead of icontains over every row
+        if not search_term:
+            return queryset, False
+        return filter_students(queryset, search_term), False
+
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
     list_display = ['code', 'name', 'credits']
@@ -21,8 +29,28 @@ class StudentSubjectAdmin(admin.ModelAdmin):
 class ResultAdmin(admin.ModelAdmin):
     list_display = ['student', 'subject', 'marks_obtained', 'grade', 'exam_date']
     list_filter = ['grade', 'exam_date', 'subject']
+    readonly_fields = ['grade']
 
 @admin.register(Attendance)
 class AttendanceAdmin(admin.ModelAdmin):
     list_display = ['student', 'subject', 'attendance_percentage', 'month', 'year']
-    list_filter = ['month', 'year', 'subject']
\ No newline at end of file
+    list_filter = ['month', 'year', 'subject']
+
+@admin.register(AcademicSummary)
+class AcademicSummaryAdmin(admin.ModelAdmin):
+    list_display = ['student', 'gpa', 'credits_earned', 'passed_count', 'failed_count', 'average_attendance', 'last_exam_date']
+    list_select_related = ['student']
+    readonly_fields = [field.name for field in AcademicSummary._meta.fields]
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'description', 'status', 'attempts', 'progress', 'progress_total', 'created_at', 'finished_at']
+    list_filter = ['status', 'task']
+    search_fields = ['description']
+    readonly_fields = ['locked_by', 'locked_at', 'started_at', 'finished_at', 'created_at']
+
+    def get_exclude(self, request, obj=None):
+        # A queued import still holds the uploaded file, passwords included
+        if obj is not None and obj.task in SENSITIVE_TASKS:
+            return ['kwargs']
+        return super().get_exclude(request, obj)
@@ -0,0 +1,195 @@
+"""
+Cohort statistics computed over flat NumPy arrays.
+
+Result and Attendance columns are read once with values_list() and every
+statistic is derived per group with bincount/lexsort over the whole array
+rather than by looping over model instances.
+"""
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+
+from .bulk import DEFAULT_CHUNK_SIZE, chunked
+from .db_routers import reading_from_replica
+from .fragments import VERSION_CACHE_ALIAS, all_records_version, subject_versions
+from .models import Subject, Result, Attendance
+from .summaries import FAIL_GRADE
+
+GRADES = [grade for grade, _ in Result.GRADE_CHOICES]
+PERCENTILES = (25, 50, 75, 90)
+ATTENDANCE_SHORTAGE = 75
+# Kept next to the versions they are keyed by, so every process shares them
+ANALYTICS_CACHE_ALIAS = VERSION_CACHE_ALIAS
+# Student fields the per-course statistics are grouped by
+COURSE_STATS_STUDENT_FIELDS = {'course', 'semester'}
+
+_SORTED_GRADES = np.array(sorted(GRADES))
+_SORTED_TO_CHOICE = np.array([GRADES.index(grade) for grade in _SORTED_GRADES])
+
+
+def load_columns(queryset, fields):
+    """Read ``fields`` from ``queryset`` into one NumPy array per field"""
+    columns = [[] for _ in fields]
+    rows = queryset.values_list(*fields).iterator(chunk_size=DEFAULT_CHUNK_SIZE)
+    for chunk in chunked(rows, DEFAULT_CHUNK_SIZE):
+        for column, values in zip(columns, zip(*chunk)):
+            column.append(np.asarray(values, dtype=object))
+    return [np.concatenate(column) if column else np.empty(0, dtype=object) for column in columns]
+
+
+def grade_indexes(grades):
+    """
+    Map grade strings to their position in Result.GRADE_CHOICES. Raises
+    ValueError for a grade that is not on the scale rather than counting
+    it under a neighbouring grade.
+    """
+    grades = grades.astype(str)
+    positions = np.minimum(np.searchsorted(_SORTED_GRADES, grades), len(_SORTED_GRADES) - 1)
+    unknown = _SORTED_GRADES[positions] != grades
+    if unknown.any():
+        raise ValueError(f'Unknown grade(s): {", ".join(sorted(set(grades[unknown].tolist())))}')
+    return _SORTED_TO_CHOICE[positions]
+
+
+def group_percentiles(codes, values, counts, percentiles=PERCENTILES):
+    """
+    Linear-interpolated percentiles of ``values`` for every group at once.
+
+    Values are sorted within groups by a single lexsort, so each group is a
+    contiguous slice; percentile positions are then computed for all groups
+    together instead of calling np.percentile once per group.
+    """
+    ordered = values[np.lexsort((values, codes))]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = {}
+    for q in percentiles:
+        position = starts + (counts - 1) * (q / 100)
+        lower = np.floor(position).astype(int)
+        upper = np.ceil(position).astype(int)
+        result[q] = ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+    return result
+
+
+def group_stats(keys, values, grades=None):
+    """
+    Count, mean, standard deviation and percentiles of ``values`` per key,
+    plus a grade histogram and pass rate when ``grades`` are given.
+    """
+    if not len(keys):
+        return {}
+    labels, codes = np.unique(keys, return_inverse=True)
+    counts = np.bincount(codes)
+    mean = np.bincount(codes, weights=values) / counts
+    variance = np.bincount(codes, weights=values ** 2) / counts - mean ** 2
+    std = np.sqrt(np.maximum(variance, 0))
+    percentiles = group_percentiles(codes, values, counts)
+
+    stats = {}
+    for i, label in enumerate(labels.tolist()):
+        stats[label] = {
+            'count': int(counts[i]),
+            'mean': float(mean[i]),
+            'std': float(std[i]),
+            'p25': float(percentiles[25][i]),
+            'median': float(percentiles[50][i]),
+            'p75': float(percentiles[75][i]),
+            'p90': float(percentiles[90][i]),
+        }
+
+    if grades is not None:
+        histogram = np.bincount(codes * len(GRADES) + grades, minlength=len(labels) * len(GRADES))
+        histogram = histogram.reshape(len(labels), len(GRADES))
+        failed = histogram[:, GRADES.index(FAIL_GRADE)]
+        for i, label in enumerate(labels.tolist()):
+            stats[label]['histogram'] = list(zip(GRADES, histogram[i].tolist()))
+            stats[label]['pass_rate'] = float(1 - failed[i] / counts[i]) * 100
+    return stats
+
+
+def result_columns(subject_ids=None, exam_type=None):
+    # Students awaiting purge are left out, and so are grades off the scale
+    queryset = Result.objects.filter(student__deleted_at__isnull=True, grade__in=GRADES)
+    if subject_ids is not None:
+        queryset = queryset.filter(subject_id__in=subject_ids)
+    if exam_type:
+        queryset = queryset.filter(exam_type=exam_type)
+    subjects, courses, marks, totals, grades = load_columns(
+        queryset, ['subject_id', 'student__course', 'marks_obtained', 'total_marks', 'grade'],
+    )
+    percentage = marks.astype(float) * 100 / totals.astype(float)
+    courses = np.where(courses == None, 'Not Set', courses).astype(str)  # noqa: E711
+    return subjects.astype(np.int64), courses, percentage, grade_indexes(grades)
+
+
+def attendance_columns(subject_ids):
+    subjects, percentage = load_columns(
+        Attendance.objects.filter(subject_id__in=subject_ids, student__deleted_at__isnull=True),
+        ['subject_id', 'attendance_percentage'],
+    )
+    return subjects.astype(np.int64), percentage.astype(float)
+
+
+def compute_subject_stats(subject_ids, exam_type=None):
+    subjects, _, percentage, grades = result_columns(subject_ids, exam_type)
+    results = group_stats(subjects, percentage, grades)
+
+    attendance_subjects, attendance = attendance_columns(subject_ids)
+    attendance_stats = group_stats(attendance_subjects, attendance)
+    if len(attendance_subjects):
+        labels, codes = np.unique(attendance_subjects, return_inverse=True)
+        short = np.bincount(codes, weights=attendance < ATTENDANCE_SHORTAGE) / np.bincount(codes) * 100
+        for label, share in zip(labels.tolist(), short.tolist()):
+            attendance_stats[label]['shortage_rate'] = share
+
+    return {
+        subject_id: {'results': results.get(subject_id), 'attendance': attendance_stats.get(subject_id)}
+        for subject_id in subject_ids
+    }
+
+
+def subject_stats(exam_type=None):
+    """
+    Per-subject result and attendance statistics.
+
+    Each subject's entry is cached per (subject, exam_type) under that
+    subject's records version, so new results only force the affected
+    subjects to be recomputed. Figures read from a replica are not cached.
+    """
+    subjects = list(Subject.objects.order_by('code').values_list('id', 'code', 'name'))
+    versions = subject_versions([subject_id for subject_id, _, _ in subjects])
+    keys = {
+        f'main:analytics:subject:{subject_id}:{exam_type or "*"}:{versions[subject_id]}': subject_id
+        for subject_id, _, _ in subjects
+    }
+    cache = caches[ANALYTICS_CACHE_ALIAS]
+    cached = {keys[key]: value for key, value in cache.get_many(keys).items()}
+
+    missing = [subject_id for subject_id, _, _ in subjects if subject_id not in cached]
+    if missing:
+        computed = compute_subject_stats(missing, exam_type)
+        if not reading_from_replica():
+            cache.set_many(
+                {key: computed[subject_id] for key, subject_id in keys.items() if subject_id in computed},
+                settings.ANALYTICS_CACHE_SECONDS,
+            )
+        cached.update(computed)
+
+    return [
+        {'code': code, 'name': name, **cached[subject_id]}
+        for subject_id, code, name in subjects
+    ]
+
+
+def course_stats(exam_type=None):
+    """Per-course result statistics, cached until any result or student course changes"""
+    key = f'main:analytics:course:{exam_type or "*"}:{all_records_version()}'
+
+    def compute():
+        _, courses, percentage, grades = result_columns(exam_type=exam_type)
+        return sorted(group_stats(courses, percentage, grades).items())
+
+    cache = caches[ANALYTICS_CACHE_ALIAS]
+    if reading_from_replica():
+        stats = cache.get(key)
+        return compute() if stats is None else stats
+    return cache.get_or_set(key, compute, settings.ANALYTICS_CACHE_SECONDS)
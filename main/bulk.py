@@ -0,0 +1,309 @@
+import codecs
+import csv
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import StudentProfile, Subject, StudentSubject, Result, Attendance
+from .periods import month_name, period_key
+from .fragments import bump_subject_versions
+from .summaries import refresh_summaries
+
+DEFAULT_CHUNK_SIZE = 2000
+MAX_REPORTED_ERRORS = 1000
+
+RESULT_COLUMNS = ['roll_number', 'subject_code', 'marks_obtained', 'total_marks', 'grade', 'exam_date', 'exam_type']
+RESULT_REQUIRED_COLUMNS = ['roll_number', 'subject_code', 'marks_obtained', 'exam_date']
+ATTENDANCE_COLUMNS = ['roll_number', 'subject_code', 'total_classes', 'classes_attended', 'month', 'year']
+
+
+class BulkReport:
+    """Counters and per-row errors collected while a bulk operation runs"""
+
+    def __init__(self):
+        self.processed = 0
+        self.written = 0
+        self.error_count = 0
+        self.errors = []
+        self.started = time.monotonic()
+        self.finished = None
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def finish(self):
+        self.finished = time.monotonic()
+        return self
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (
+            f'{self.processed} rows processed, {self.written} written, '
+            f'{self.error_count} errors in {self.elapsed:.2f}s '
+            f'({self.rows_per_second:.0f} rows/s)'
+        )
+
+
+def chunked(iterable, size):
+    """Yield lists of at most ``size`` items from ``iterable``"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def decode_upload(uploaded_file, encoding='utf-8-sig'):
+    """Stream an uploaded file line by line as text, without reading it all into memory"""
+    return codecs.iterdecode(uploaded_file, encoding)
+
+
+def read_upload(uploaded_file, encoding='utf-8-sig'):
+    """The whole text of an uploaded file, for handing to a background job"""
+    return uploaded_file.read().decode(encoding)
+
+
+def read_csv_rows(lines, required_columns, unstripped=()):
+    """
+    Yield ``(line_number, row)`` pairs from CSV text, checking the header
+    first. Values are stripped of surrounding whitespace, except in the
+    ``unstripped`` columns.
+    """
+    reader = csv.DictReader(lines)
+    header = [name.strip() for name in (reader.fieldnames or [])]
+    missing = [name for name in required_columns if name not in header]
+    if missing:
+        raise ValidationError(f"Missing CSV column(s): {', '.join(missing)}")
+    reader.fieldnames = header
+    for row in reader:
+        yield reader.line_num, {
+            key: (value or '') if key in unstripped else (value or '').strip()
+            for key, value in row.items() if key
+        }
+
+
+def clean_fields(model, row, field_names):
+    """Validate raw CSV values with the model's own field definitions"""
+    cleaned = {}
+    errors = []
+    for name in field_names:
+        field = model._meta.get_field(name)
+        raw = row.get(name, '')
+        if raw == '' and field.has_default():
+            cleaned[name] = field.get_default()
+            continue
+        if raw == '' and field.null:
+            cleaned[name] = None
+            continue
+        try:
+            cleaned[name] = field.clean(raw, None)
+        except ValidationError as e:
+            errors.append(f"{name}: {' '.join(e.messages)}")
+    if errors:
+        raise ValidationError(errors)
+    return cleaned
+
+
+def lookup_ids(model, field, values):
+    """Resolve a set of natural keys to primary keys with a single query"""
+    return dict(model.objects.filter(**{f'{field}__in': values}).values_list(field, 'id'))
+
+
+def upsert_rows(rows, model, field_names, unique_fields, update_fields, chunk_size=DEFAULT_CHUNK_SIZE, clean=None, progress=None):
+    """
+    Validate ``(line_number, row)`` pairs and upsert them into ``model``.
+
+    Rows are processed one chunk at a time so memory stays flat regardless of
+    input size. Each row must carry ``roll_number`` and ``subject_code``; both
+    are resolved with a single query per chunk. ``clean`` may adjust the
+    validated values in place or reject the row by raising ValidationError.
+    ``progress`` is called with the report after each chunk.
+    """
+    report = BulkReport()
+    key_fields = [name for name in unique_fields if name not in ('student', 'subject')]
+
+    for chunk in chunked(rows, chunk_size):
+        report.processed += len(chunk)
+        students = lookup_ids(StudentProfile, 'roll_number', {row['roll_number'] for _, row in chunk})
+        subjects = lookup_ids(Subject, 'code', {row['subject_code'] for _, row in chunk})
+
+        pending = {}
+        for line, row in chunk:
+            student_id = students.get(row['roll_number'])
+            subject_id = subjects.get(row['subject_code'])
+            if student_id is None:
+                report.add_error(line, f"Unknown roll number '{row['roll_number']}'")
+                continue
+            if subject_id is None:
+                report.add_error(line, f"Unknown subject code '{row['subject_code']}'")
+                continue
+            try:
+                values = clean_fields(model, row, field_names)
+                if clean:
+                    clean(values)
+            except ValidationError as e:
+                report.add_error(line, '; '.join(e.messages))
+                continue
+            # A later row for the same key wins, as it would with sequential saves
+            key = (student_id, subject_id) + tuple(values[name] for name in key_fields)
+            pending[key] = model(student_id=student_id, subject_id=subject_id, **values)
+
+        if pending:
+            with transaction.atomic():
+                model.objects.bulk_create(
+                    pending.values(),
+                    update_conflicts=True,
+                    unique_fields=unique_fields,
+                    update_fields=update_fields,
+                )
+                # bulk_create sends no signals, so refresh derived data set-wise
+                refresh_summaries({student_id for student_id, *_ in pending})
+                bump_subject_versions({subject_id for _, subject_id, *_ in pending})
+            report.written += len(pending)
+        if progress:
+            progress(report)
+
+    return report.finish()
+
+
+def clean_result(values):
+    if values['total_marks'] < 1:
+        raise ValidationError('total_marks must be at least 1')
+    if values['marks_obtained'] > values['total_marks']:
+        raise ValidationError('marks_obtained cannot exceed total_marks')
+    values['grade'] = Result.grade_for(values['marks_obtained'], values['total_marks'])
+
+
+def import_results(lines, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Upsert exam results from CSV text on the (student, subject, exam_type) key.
+
+    Grades are always derived from the marks; a grade column is ignored.
+    """
+    return upsert_rows(
+        read_csv_rows(lines, RESULT_REQUIRED_COLUMNS),
+        Result,
+        field_names=['marks_obtained', 'total_marks', 'exam_date', 'exam_type'],
+        unique_fields=['student', 'subject', 'exam_type'],
+        update_fields=['marks_obtained', 'total_marks', 'grade', 'exam_date'],
+        chunk_size=chunk_size,
+        clean=clean_result,
+        progress=progress,
+    )
+
+
+def clean_attendance(values):
+    if values['classes_attended'] > values['total_classes']:
+        raise ValidationError('classes_attended cannot exceed total_classes')
+    month = month_name(values['month'])
+    if month is None:
+        raise ValidationError(f"Unrecognised month '{values['month']}'")
+    values['month'] = month
+    values['period'] = period_key(month, values['year'])
+
+
+def import_attendance(lines, sheet=None, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Upsert monthly attendance from CSV text on the (student, subject, period) key.
+
+    ``sheet`` supplies ``subject_code``/``month``/``year`` for files that hold a
+    single subject-month sheet and therefore omit those columns. The percentage
+    is a generated column, so nothing has to be computed per row.
+    """
+    sheet = {key: str(value) for key, value in (sheet or {}).items() if value not in (None, '')}
+    required = [name for name in ATTENDANCE_COLUMNS if name not in sheet]
+    rows = (
+        (line, {**sheet, **{key: value for key, value in row.items() if value}})
+        for line, row in read_csv_rows(lines, required)
+    )
+    return upsert_rows(
+        rows,
+        Attendance,
+        field_names=['total_classes', 'classes_attended', 'month', 'year'],
+        unique_fields=['student', 'subject', 'period'],
+        update_fields=['total_classes', 'classes_attended'],
+        chunk_size=chunk_size,
+        clean=clean_attendance,
+        progress=progress,
+    )
+
+
+class EnrollmentReport(BulkReport):
+    """BulkReport where ``processed`` counts (student, subject) pairs"""
+
+    def __init__(self):
+        super().__init__()
+        self.students = 0
+
+    @property
+    def already_enrolled(self):
+        return self.processed - self.written
+
+    def summary(self):
+        return (
+            f'{self.students} students, {self.processed} enrollments requested: '
+            f'{self.written} created, {self.already_enrolled} already present in {self.elapsed:.2f}s'
+        )
+
+
+def cohort_students(course=None, semester=None, roll_from=None, roll_to=None):
+    """Students selected by course, semester and an inclusive roll number range"""
+    students = StudentProfile.objects.all()
+    if course:
+        students = students.filter(course=course)
+    if semester is not None:
+        students = students.filter(semester=semester)
+    if roll_from:
+        students = students.filter(roll_number__gte=roll_from)
+    if roll_to:
+        students = students.filter(roll_number__lte=roll_to)
+    return students
+
+
+def enroll_cohort(students, subject_ids, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Enroll every student in ``students`` in every subject in ``subject_ids``.
+
+    Pairs are inserted in batches of about ``chunk_size`` rows, each in its
+    own transaction, skipping pairs that are already enrolled. Created
+    rows are told apart from existing ones by counting before and after.
+    ``progress`` is called with the report after each batch.
+    """
+    report = EnrollmentReport()
+    subject_ids = sorted(set(subject_ids))
+    if not subject_ids:
+        return report.finish()
+    # Read up front: SQLite cannot safely write while a read cursor is open
+    student_ids = list(students.order_by('id').values_list('id', flat=True))
+    report.students = len(student_ids)
+
+    for chunk in chunked(student_ids, max(1, chunk_size // len(subject_ids))):
+        existing = StudentSubject.objects.filter(student_id__in=chunk, subject_id__in=subject_ids)
+        with transaction.atomic():
+            before = existing.count()
+            StudentSubject.objects.bulk_create(
+                [StudentSubject(student_id=student_id, subject_id=subject_id) for student_id in chunk for subject_id in subject_ids],
+                ignore_conflicts=True,
+            )
+            created = existing.count() - before
+            if created:
+                # bulk_create sends no signals; credits enrolled have changed
+                refresh_summaries(chunk)
+        report.processed += len(chunk) * len(subject_ids)
+        report.written += created
+        if progress:
+            progress(report)
+
+    return report.finish()
@@ -0,0 +1,61 @@
+import threading
+
+from django.db import router
+
+from .fragments import bump_versions, get_version
+from .models import Subject
+
+SUBJECT_CATALOG_VERSION_KEY = 'main:subject_catalog_version'
+
+_lock = threading.Lock()
+_catalog = {'version': None, 'subjects': (), 'by_id': {}}
+
+
+def catalog_version():
+    """
+    Version token of the subject catalog, kept with the record versions in
+    the cache every worker process shares, so a change saved in one worker
+    reaches all of them.
+    """
+    return get_version(SUBJECT_CATALOG_VERSION_KEY)
+
+
+def current_catalog():
+    """
+    The catalog held in this process, reloaded with one query whenever the
+    shared version token has changed; checking it is a single cache read.
+
+    It is always loaded from the primary: it is kept under the current
+    token, which a lagging replica may not have caught up with yet.
+    """
+    global _catalog
+    version = catalog_version()
+    if _catalog['version'] != version:
+        with _lock:
+            if _catalog['version'] != version:
+                subjects = tuple(Subject.objects.using(router.db_for_write(Subject)).order_by('code'))
+                # Replaced whole, so other threads never see a half-updated catalog
+                _catalog = {
+                    'version': version,
+                    'subjects': subjects,
+                    'by_id': {str(subject.id): subject for subject in subjects},
+                }
+    return _catalog
+
+
+def subject_catalog():
+    """
+    Every subject, ordered by code, as a tuple of Subject instances shared
+    between requests; they must not be modified.
+    """
+    return current_catalog()['subjects']
+
+
+def catalog_subject(subject_id):
+    """The cached Subject with this id (an int or submitted string), or None"""
+    return current_catalog()['by_id'].get(str(subject_id))
+
+
+def bump_subject_catalog():
+    """Make every process reload the catalog on its next use"""
+    bump_versions([SUBJECT_CATALOG_VERSION_KEY])
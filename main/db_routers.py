@@ -0,0 +1,86 @@
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+
+PRIMARY = 'default'
+STICKY_COOKIE = 'primary_until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Set while a view decorated with read_from_replica runs
+replica_reads = ContextVar('main_replica_reads', default=False)
+
+
+def read_replicas():
+    return [alias for alias in settings.DATABASES if alias != PRIMARY]
+
+
+def reading_from_replica():
+    """
+    Whether reads are going to a replica right now. Replicas may lag the
+    primary, so what is read from them must not be cached under version
+    tokens that a newer write has already set.
+    """
+    return bool(read_replicas()) and replica_reads.get()
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends writes, and any read outside a read_from_replica view, to the
+    primary. Reads inside such views go to a randomly chosen replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = read_replicas()
+        if replicas and replica_reads.get():
+            return random.choice(replicas)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold copies of the primary's data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+def wants_primary(request):
+    """Unsafe requests, and requests shortly after one, read their own writes from the primary"""
+    if request.method not in SAFE_METHODS:
+        return True
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_from_replica(view):
+    """
+    Let a read-heavy view's queries go to a read replica.
+
+    The session and user are loaded by middleware before the view runs and
+    so always come from the primary.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            token = replica_reads.set(not wants_primary(request))
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                replica_reads.reset(token)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = replica_reads.set(not wants_primary(request))
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                replica_reads.reset(token)
+    return wrapper
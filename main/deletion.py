@@ -0,0 +1,111 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import router, transaction
+from django.utils import timezone
+
+from .fragments import bump_subject_versions
+from .models import StudentProfile, StudentSubject, Result, Attendance
+from .search import unindex_students
+from .stats import invalidate_dashboard_stats
+
+# Purged child tables, largest first; the profile and user go last
+PURGED_MODELS = [Result, Attendance, StudentSubject]
+
+
+def soft_delete_students(student_ids):
+    """
+    Mark students deleted and deactivate their users, in two UPDATEs.
+
+    The default manager hides them from then on, and inactive users can
+    neither log in nor keep using an open session. Returns the number of
+    students marked.
+    """
+    with transaction.atomic():
+        marked = dict(StudentProfile.objects.filter(id__in=list(student_ids)).values_list('id', 'user_id'))
+        StudentProfile.objects.filter(id__in=list(marked)).update(deleted_at=timezone.now())
+        User.objects.filter(id__in=list(marked.values())).update(is_active=False)
+        # Their records drop out of the cohort analytics
+        subject_ids = set()
+        for model in (Result, Attendance):
+            subject_ids.update(model.objects.filter(student_id__in=list(marked)).values_list('subject_id', flat=True).distinct())
+        # update() sends no signals
+        transaction.on_commit(lambda: unindex_students(list(marked)))
+        transaction.on_commit(invalidate_dashboard_stats)
+        transaction.on_commit(lambda: bump_subject_versions(subject_ids))
+    return len(marked)
+
+
+def delete_in_batches(queryset, batch_size, pause=0):
+    """
+    Delete the rows of ``queryset`` ``batch_size`` at a time, each batch in
+    its own short transaction, so the write lock is only ever held briefly
+    and an interrupted purge keeps the batches already deleted.
+
+    Rows are deleted without signals or cascades, so this is only for
+    tables nothing else references. Returns the number of rows deleted.
+    """
+    model = queryset.model
+    using = router.db_for_write(model)
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by().values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic(using=using):
+            # QuerySet.delete() would load the batch and send post_delete per
+            # row, each scheduling a summary refresh of the student being
+            # purged; _raw_delete is the single DELETE delete() ends with.
+            # Pinned by StudentDeletionTests.test_batches_send_no_signals.
+            deleted += model.objects.filter(id__in=ids)._raw_delete(using)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_student(student_id, batch_size=None, pause=None):
+    """
+    Physically delete a soft-deleted student, their records and their user.
+    Safe to call again after an interruption. Returns the rows deleted.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    pause = settings.PURGE_PAUSE_SECONDS if pause is None else pause
+    student = StudentProfile.all_objects.filter(id=student_id, deleted_at__isnull=False).first()
+    if student is None:
+        return 0
+
+    deleted = 0
+    for model in PURGED_MODELS:
+        records = model.objects.filter(student_id=student_id)
+        subject_ids = set(records.values_list('subject_id', flat=True).distinct())
+        deleted += delete_in_batches(records, batch_size, pause)
+        if model is not StudentSubject:
+            # Deleted without signals; drop the analytics built on these records
+            bump_subject_versions(subject_ids)
+
+    # Only the summary, the profile and the user are left for the cascade
+    with transaction.atomic():
+        deleted += User.objects.filter(id=student.user_id).delete()[0]
+    return deleted
+
+
+def deleted_students(student_ids=None):
+    """Ids of soft-deleted students still to be purged, oldest deletion first"""
+    students = StudentProfile.all_objects.filter(deleted_at__isnull=False)
+    if student_ids is not None:
+        students = students.filter(id__in=list(student_ids))
+    return list(students.order_by('deleted_at', 'id').values_list('id', flat=True))
+
+
+def purge_deleted_students(student_ids=None, batch_size=None, pause=None, progress=None):
+    """
+    Purge soft-deleted students one at a time; ``progress`` is called with
+    ``(students purged, total)`` after each. Returns ``(students, rows)``.
+    """
+    pending = deleted_students(student_ids)
+    rows = 0
+    for done, student_id in enumerate(pending, start=1):
+        rows += purge_student(student_id, batch_size=batch_size, pause=pause)
+        if progress:
+            progress(done, len(pending))
+    return len(pending), rows
@@ -0,0 +1,98 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .bulk import RESULT_COLUMNS, ATTENDANCE_COLUMNS
+from .models import Result, Attendance
+from .periods import month_name, period_key
+
+EXPORT_CHUNK_SIZE = 2000
+
+# Output column -> queryset lookup. Column names match the bulk import
+# format so an export can be loaded straight back in.
+EXPORT_FIELDS = {
+    'results': dict(zip(RESULT_COLUMNS, [
+        'student__roll_number', 'subject__code', 'marks_obtained', 'total_marks', 'grade', 'exam_date', 'exam_type',
+    ])),
+    'attendance': dict(zip(ATTENDANCE_COLUMNS + ['attendance_percentage'], [
+        'student__roll_number', 'subject__code', 'total_classes', 'classes_attended', 'month', 'year', 'attendance_percentage',
+    ])),
+}
+EXPORT_MODELS = {
+    'results': Result,
+    'attendance': Attendance,
+}
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+
+def export_rows(kind, course=None, semester=None, exam_type=None, month=None, year=None,
+                period_from=None, period_to=None, date_from=None, date_to=None, using=None):
+    """
+    Yield export rows as tuples in EXPORT_FIELDS[kind] order.
+
+    Only the exported columns are selected and rows are read with a
+    server-side chunked iterator, so memory use does not depend on the
+    number of rows. Month and date ranges filter on the period and exam_date
+    columns so they can use the period and exam_date indexes.
+    """
+    # Records of deleted students linger until purged; they are not exported
+    queryset = EXPORT_MODELS[kind].objects.using(using).filter(student__deleted_at__isnull=True)
+    if course:
+        queryset = queryset.filter(student__course=course)
+    if semester is not None:
+        queryset = queryset.filter(student__semester=semester)
+    if kind == 'results':
+        if exam_type:
+            queryset = queryset.filter(exam_type=exam_type)
+        if date_from:
+            queryset = queryset.filter(exam_date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(exam_date__lte=date_to)
+    if kind == 'attendance':
+        if month and month_name(month) is None:
+            # An unrecognised month has no period to match
+            queryset = queryset.none()
+        elif month and year is not None:
+            queryset = queryset.filter(period=period_key(month, year))
+        elif month:
+            # Months are stored by their canonical name
+            queryset = queryset.filter(month=month_name(month))
+        elif year is not None:
+            queryset = queryset.filter(period__range=(year * 100 + 1, year * 100 + 12))
+        if period_from:
+            queryset = queryset.filter(period__gte=period_from)
+        if period_to:
+            queryset = queryset.filter(period__lte=period_to)
+    lookups = EXPORT_FIELDS[kind].values()
+    return queryset.order_by('id').values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """File-like object whose write() hands the line back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(kind, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(list(EXPORT_FIELDS[kind]))
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def iter_ndjson(kind, rows):
+    columns = list(EXPORT_FIELDS[kind])
+    for row in rows:
+        yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def iter_export(kind, export_format, **filters):
+    rows = export_rows(kind, **filters)
+    if export_format == 'ndjson':
+        return iter_ndjson(kind, rows)
+    return iter_csv(kind, rows)
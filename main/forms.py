@@ -1,7 +1,49 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.forms.models import ModelChoiceIterator
+from .catalog import subject_catalog
 from .models import StudentProfile, Subject, Result, Attendance
+from .periods import month_name, parse_period
+from .search import filter_students
+
+class SubjectCatalogIterator(ModelChoiceIterator):
+    """Choices from the process-level subject catalog instead of a query per render"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        for subject in subject_catalog():
+            yield self.choice(subject)
+
+    def __len__(self):
+        return len(subject_catalog()) + (self.field.empty_label is not None)
+
+class SubjectCatalogMixin:
+    """Subject choice fields rendered and validated against the subject catalog"""
+    iterator = SubjectCatalogIterator
+
+    def __init__(self, **kwargs):
+        super().__init__(queryset=Subject.objects.order_by('code'), **kwargs)
+
+    def catalog_subject(self, value):
+        key = self.to_field_name or 'pk'
+        for subject in subject_catalog():
+            if str(getattr(subject, key)) == str(value):
+                return subject
+        raise forms.ValidationError(self.error_messages['invalid_choice'], code='invalid_choice', params={'value': value})
+
+class SubjectChoiceField(SubjectCatalogMixin, forms.ModelChoiceField):
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        return self.catalog_subject(value)
+
+class SubjectMultipleChoiceField(SubjectCatalogMixin, forms.ModelMultipleChoiceField):
+    def _check_values(self, value):
+        if not isinstance(value, (list, tuple)):
+            raise forms.ValidationError(self.error_messages['invalid_list'], code='invalid_list')
+        return [self.catalog_subject(item) for item in dict.fromkeys(value)]
 
 class StudentRegistrationForm(UserCreationForm):
     email = forms.EmailField(required=True)
@@ -48,26 +90,152 @@ class StudentProfileForm(forms.ModelForm):
         }
 
 class ResultForm(forms.ModelForm):
+    subject = SubjectChoiceField(widget=forms.Select(attrs={'class': 'form-control'}))
+
     class Meta:
         model = Result
-        fields = ['subject', 'marks_obtained', 'total_marks', 'grade', 'exam_date', 'exam_type']
+        fields = ['subject', 'marks_obtained', 'total_marks', 'exam_date', 'exam_type']
         widgets = {
-            'subject': forms.Select(attrs={'class': 'form-control'}),
             'marks_obtained': forms.NumberInput(attrs={'class': 'form-control'}),
             'total_marks': forms.NumberInput(attrs={'class': 'form-control'}),
-            'grade': forms.Select(attrs={'class': 'form-control'}),
             'exam_date': forms.DateInput(attrs={'type': 'date', 'class': 'form-control'}),
             'exam_type': forms.TextInput(attrs={'class': 'form-control'}),
         }
 
+    def clean(self):
+        # The grade is derived from these in Result.save()
+        cleaned_data = super().clean()
+        marks_obtained = cleaned_data.get('marks_obtained')
+        total_marks = cleaned_data.get('total_marks')
+        if total_marks is not None and total_marks < 1:
+            self.add_error('total_marks', 'Total marks must be at least 1.')
+        elif marks_obtained is not None and total_marks is not None and marks_obtained > total_marks:
+            self.add_error('marks_obtained', 'Marks obtained cannot exceed total marks.')
+        return cleaned_data
+
 class AttendanceForm(forms.ModelForm):
+    subject = SubjectChoiceField(widget=forms.Select(attrs={'class': 'form-control'}))
+
     class Meta:
         model = Attendance
         fields = ['subject', 'total_classes', 'classes_attended', 'month', 'year']
         widgets = {
-            'subject': forms.Select(attrs={'class': 'form-control'}),
             'total_classes': forms.NumberInput(attrs={'class': 'form-control'}),
             'classes_attended': forms.NumberInput(attrs={'class': 'form-control'}),
             'month': forms.TextInput(attrs={'class': 'form-control'}),
             'year': forms.NumberInput(attrs={'class': 'form-control'}),
-        }
\ No newline at end of file
+        }
+
+    def clean_month(self):
+        month = month_name(self.cleaned_data['month'])
+        if month is None:
+            raise forms.ValidationError('Enter a month name (e.g. July), abbreviation or number.')
+        return month
+
+class BulkUploadForm(forms.Form):
+    csv_file = forms.FileField(widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': '.csv'}))
+    background = forms.BooleanField(required=False, label='Run in the background', widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+
+class AttendanceUploadForm(BulkUploadForm):
+    """Optional sheet-wide values for files holding one subject for one month"""
+    subject = SubjectChoiceField(
+        required=False, to_field_name='code', widget=forms.Select(attrs={'class': 'form-control'}),
+    )
+    month = forms.CharField(max_length=20, required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    year = forms.IntegerField(required=False, widget=forms.NumberInput(attrs={'class': 'form-control'}))
+
+    def sheet(self):
+        subject = self.cleaned_data.get('subject')
+        return {
+            'subject_code': subject.code if subject else None,
+            'month': self.cleaned_data.get('month'),
+            'year': self.cleaned_data.get('year'),
+        }
+
+class StudentFilterForm(forms.Form):
+    STATUS_CHOICES = [
+        ('', 'All'),
+        ('completed', 'Completed'),
+        ('pending', 'Pending'),
+    ]
+
+    q = forms.CharField(max_length=100, required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Roll number, name, email, course or phone', 'autocomplete': 'off'}))
+    course = forms.CharField(max_length=100, required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Course'}))
+    semester = forms.IntegerField(required=False, widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Semester'}))
+    status = forms.ChoiceField(choices=STATUS_CHOICES, required=False, widget=forms.Select(attrs={'class': 'form-control'}))
+
+    def filter(self, queryset):
+        if not self.is_valid():
+            return queryset
+        data = self.cleaned_data
+        if data['q']:
+            # Matched against the full-text index, then paginated as usual
+            queryset = filter_students(queryset, data['q'])
+        if data['course']:
+            queryset = queryset.filter(course=data['course'])
+        if data['semester'] is not None:
+            queryset = queryset.filter(semester=data['semester'])
+        if data['status']:
+            queryset = queryset.filter(profile_completed=data['status'] == 'completed')
+        return queryset
+
+class CohortEnrollmentForm(forms.Form):
+    course = forms.CharField(max_length=100, required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    semester = forms.IntegerField(required=False, widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    roll_from = forms.CharField(max_length=20, required=False, label='Roll number from', widget=forms.TextInput(attrs={'class': 'form-control'}))
+    roll_to = forms.CharField(max_length=20, required=False, label='Roll number to', widget=forms.TextInput(attrs={'class': 'form-control'}))
+    subjects = SubjectMultipleChoiceField(
+        widget=forms.SelectMultiple(attrs={'class': 'form-control', 'size': 8}),
+    )
+    background = forms.BooleanField(required=False, label='Run in the background', widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}))
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Guard against enrolling the whole student body by accident
+        if not any(cleaned_data.get(name) not in (None, '') for name in ('course', 'semester', 'roll_from', 'roll_to')):
+            raise forms.ValidationError('Choose a course, semester or roll number range.')
+        return cleaned_data
+
+    def cohort(self):
+        return {name: self.cleaned_data[name] for name in ('course', 'semester', 'roll_from', 'roll_to')}
+
+class ExportForm(forms.Form):
+    KIND_CHOICES = [
+        ('results', 'Results'),
+        ('attendance', 'Attendance'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('ndjson', 'Newline-delimited JSON'),
+    ]
+
+    kind = forms.ChoiceField(choices=KIND_CHOICES, widget=forms.Select(attrs={'class': 'form-control'}))
+    export_format = forms.ChoiceField(choices=FORMAT_CHOICES, label='Format', widget=forms.Select(attrs={'class': 'form-control'}))
+    course = forms.CharField(max_length=100, required=False, widget=forms.TextInput(attrs={'class': 'form-control'}))
+    semester = forms.IntegerField(required=False, widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    exam_type = forms.CharField(max_length=50, required=False, help_text='Results only', widget=forms.TextInput(attrs={'class': 'form-control'}))
+    month = forms.CharField(max_length=20, required=False, help_text='Attendance only', widget=forms.TextInput(attrs={'class': 'form-control'}))
+    year = forms.IntegerField(required=False, help_text='Attendance only', widget=forms.NumberInput(attrs={'class': 'form-control'}))
+    period_from = forms.CharField(required=False, label='From month', help_text='Attendance only', widget=forms.TextInput(attrs={'class': 'form-control', 'type': 'month'}))
+    period_to = forms.CharField(required=False, label='To month', help_text='Attendance only', widget=forms.TextInput(attrs={'class': 'form-control', 'type': 'month'}))
+    date_from = forms.DateField(required=False, label='Exams from', help_text='Results only', widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+    date_to = forms.DateField(required=False, label='Exams to', help_text='Results only', widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}))
+
+    def clean_period_from(self):
+        return self.clean_period('period_from')
+
+    def clean_period_to(self):
+        return self.clean_period('period_to')
+
+    def clean_period(self, name):
+        value = self.cleaned_data[name]
+        if not value:
+            return None
+        period = parse_period(value)
+        if period is None:
+            raise forms.ValidationError('Enter a month as YYYY-MM.')
+        return period
+
+
+class AnalyticsFilterForm(forms.Form):
+    exam_type = forms.CharField(max_length=50, required=False, widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'All exam types'}))
@@ -0,0 +1,69 @@
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .db_routers import reading_from_replica
+
+# Version tokens must be seen by every process: the web workers render and
+# cache the fragments, but imports, jobs and commands bump the versions
+VERSION_CACHE_ALIAS = 'shared'
+
+STUDENT_VERSION_KEY = 'main:student_records_version:{}'
+SUBJECT_VERSION_KEY = 'main:subject_records_version:{}'
+ALL_RECORDS_VERSION_KEY = 'main:all_records_version'
+
+
+def get_version(key):
+    """
+    Current version token stored under ``key``.
+
+    Cached data is stored under keys that include this token, so changing it
+    orphans every dependent entry without having to find and delete them
+    individually.
+    """
+    cache = caches[VERSION_CACHE_ALIAS]
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(keys):
+    caches[VERSION_CACHE_ALIAS].set_many({key: uuid4().hex for key in keys}, None)
+
+
+def student_version(student_id):
+    return get_version(STUDENT_VERSION_KEY.format(student_id))
+
+
+def bump_student_versions(student_ids):
+    bump_versions(STUDENT_VERSION_KEY.format(student_id) for student_id in student_ids)
+
+
+def subject_versions(subject_ids):
+    keys = {SUBJECT_VERSION_KEY.format(subject_id): subject_id for subject_id in subject_ids}
+    found = caches[VERSION_CACHE_ALIAS].get_many(keys)
+    return {subject_id: found.get(key) or get_version(key) for key, subject_id in keys.items()}
+
+
+def all_records_version():
+    return get_version(ALL_RECORDS_VERSION_KEY)
+
+
+def bump_all_records_version():
+    bump_versions([ALL_RECORDS_VERSION_KEY])
+
+
+def bump_subject_versions(subject_ids):
+    """Invalidate data derived from these subjects' results or attendance"""
+    bump_versions([SUBJECT_VERSION_KEY.format(subject_id) for subject_id in subject_ids] + [ALL_RECORDS_VERSION_KEY])
+
+
+def fragment_cache_seconds():
+    """
+    Lifetime of the student record fragments rendered now: 0, which stores
+    nothing, when the records were read from a possibly lagging replica.
+    """
+    return 0 if reading_from_replica() else settings.STUDENT_FRAGMENT_CACHE_SECONDS
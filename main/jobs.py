@@ -0,0 +1,187 @@
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Registered task functions by name; each takes the running Job and its kwargs
+TASKS = {}
+# Tasks whose kwargs hold secrets, such as initial passwords
+SENSITIVE_TASKS = set()
+
+
+class TaskError(Exception):
+    """Raised by a task for a failure that retrying will not fix"""
+
+
+def task(name, sensitive=False):
+    """
+    Register a function as a background task under ``name``.
+
+    The kwargs of a ``sensitive`` task are wiped as soon as a worker claims
+    the job, or when it is cancelled, so such a job runs at most once.
+    """
+    def register(function):
+        TASKS[name] = function
+        if sensitive:
+            SENSITIVE_TASKS.add(name)
+        return function
+    return register
+
+
+def enqueue(name, description='', created_by=None, max_attempts=None, **kwargs):
+    """
+    Store a job for ``name`` with JSON-serializable ``kwargs`` and return it.
+
+    Workers only see the job once the surrounding transaction commits.
+    """
+    if name not in TASKS:
+        raise ValueError(f'Unknown task {name!r}')
+    if name in SENSITIVE_TASKS:
+        # A retry would find the kwargs gone
+        max_attempts = 1
+    return Job.objects.create(
+        task=name,
+        description=description[:200],
+        kwargs=kwargs,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        created_by=created_by,
+    )
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim_jobs(worker, limit):
+    """
+    Mark up to ``limit`` due jobs as running for ``worker`` and return their ids.
+
+    Each claim is a conditional UPDATE that only succeeds while the job is
+    still queued, so concurrent workers never run the same job, on SQLite
+    as well as on databases with row locks.
+    """
+    now = timezone.now()
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by('run_after', 'id')
+        .values_list('id', flat=True)[:limit * 2]
+    )
+    claimed = []
+    for job_id in list(candidates):
+        updated = Job.objects.filter(id=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_by=worker, locked_at=now,
+            started_at=now, attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(job_id)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def heartbeat(job_ids):
+    """Renew the lease on jobs this worker is still running"""
+    if job_ids:
+        Job.objects.filter(id__in=job_ids, status=Job.RUNNING).update(locked_at=timezone.now())
+
+
+def requeue_stale():
+    """
+    Return jobs whose worker stopped renewing their lease to the queue, or
+    fail them once they are out of attempts. Returns the number recovered.
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS),
+    )
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status=Job.QUEUED, locked_by='', locked_at=None, error='Worker stopped responding',
+    )
+    failed = stale.update(
+        status=Job.FAILED, locked_by='', locked_at=None, finished_at=timezone.now(),
+        error='Worker stopped responding',
+    )
+    return requeued + failed
+
+
+def set_progress(job, done, total=None, message=None):
+    """Record progress on a running job; cheap enough to call once per batch"""
+    job.progress = done
+    fields = {'progress': done}
+    if total is not None:
+        job.progress_total = fields['progress_total'] = total
+    if message is not None:
+        job.message = fields['message'] = message[:255]
+    Job.objects.filter(id=job.id).update(**fields)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: JOB_RETRY_DELAY, then twice that, and so on"""
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** max(0, attempts - 1))
+
+
+def run_job(job_id):
+    """
+    Run one claimed job and record its outcome. Runs in a worker thread or
+    process, on that thread's own database connection.
+    """
+    try:
+        job = Job.objects.get(id=job_id)
+        function = TASKS.get(job.task)
+        if job.task in SENSITIVE_TASKS:
+            Job.objects.filter(id=job.id).update(kwargs={})
+        try:
+            if function is None:
+                raise TaskError(f'Unknown task {job.task!r}')
+            result = function(job, **job.kwargs)
+        except Exception as e:
+            will_retry = not isinstance(e, TaskError) and job.attempts < job.max_attempts
+            logger.warning('Job %s (%s) failed on attempt %s', job.id, job.task, job.attempts, exc_info=not isinstance(e, TaskError))
+            error = str(e) if isinstance(e, TaskError) else traceback.format_exc()
+            if will_retry:
+                Job.objects.filter(id=job.id).update(
+                    status=Job.QUEUED, locked_by='', locked_at=None, error=error,
+                    run_after=timezone.now() + retry_delay(job.attempts),
+                )
+            else:
+                Job.objects.filter(id=job.id).update(
+                    status=Job.FAILED, locked_by='', locked_at=None, error=error, finished_at=timezone.now(),
+                )
+            return job.id, Job.QUEUED if will_retry else Job.FAILED
+
+        Job.objects.filter(id=job.id).update(
+            status=Job.SUCCEEDED, locked_by='', locked_at=None, result=result,
+            error='', finished_at=timezone.now(),
+        )
+        return job.id, Job.SUCCEEDED
+    finally:
+        # Pool threads outlive the job; do not leave a connection open per thread
+        if threading.current_thread() is not threading.main_thread():
+            connections.close_all()
+
+
+def cancel(job):
+    """Cancel a job that has not started; returns whether it was cancelled"""
+    fields = {'kwargs': {}} if job.task in SENSITIVE_TASKS else {}
+    return bool(Job.objects.filter(id=job.id, status=Job.QUEUED).update(
+        status=Job.CANCELLED, finished_at=timezone.now(), **fields,
+    ))
+
+
+def retry(job):
+    """Queue a failed or cancelled job again with a fresh set of attempts"""
+    return bool(Job.objects.filter(id=job.id, status__in=[Job.FAILED, Job.CANCELLED]).update(
+        status=Job.QUEUED, attempts=0, run_after=timezone.now(), progress=0,
+        error='', message='', locked_by='', locked_at=None, started_at=None, finished_at=None,
+    ))
@@ -0,0 +1,128 @@
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from main.models import StudentProfile
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-compare the sync dashboard views under the gunicorn WSGI setup from the '
+        'Procfile with the async views under gunicorn + uvicorn workers (ASGI). Uses the '
+        'configured database, so point it at a copy with realistic data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('roll_number', help='Student whose dashboard and detail pages are requested')
+        parser.add_argument('--staff-username', help='Staff user for the detail pages (skipped if omitted)')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--workers', type=int, default=2)
+
+    def handle(self, *args, **options):
+        try:
+            student = StudentProfile.objects.select_related('user').get(roll_number=options['roll_number'])
+        except StudentProfile.DoesNotExist:
+            raise CommandError(f"No student with roll number {options['roll_number']}")
+
+        targets = [
+            ('dashboard', student.user, reverse('student_dashboard'), reverse('student_dashboard_async')),
+        ]
+        if options['staff_username']:
+            staff = self.get_staff(options['staff_username'])
+            targets.append((
+                'detail',
+                staff,
+                reverse('student_detail', args=[student.id]),
+                reverse('student_detail_async', args=[student.id]),
+            ))
+
+        servers = [
+            ('wsgi', 'student_system.wsgi:application', []),
+            ('asgi', 'student_system.asgi:application', ['-k', 'uvicorn.workers.UvicornWorker']),
+        ]
+        self.stdout.write(f"{'page':<12}{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for name, app, extra_args in servers:
+            port = free_port()
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', app, '--bind', f'127.0.0.1:{port}',
+                 '--workers', str(options['workers']), '--log-level', 'warning', *extra_args],
+            )
+            try:
+                self.wait_until_up(port, process)
+                for page, user, sync_url, async_url in targets:
+                    url = f'http://127.0.0.1:{port}' + (sync_url if name == 'wsgi' else async_url)
+                    stats = self.run_load(url, self.session_cookie(user), options['requests'], options['concurrency'])
+                    self.stdout.write(
+                        f"{page:<12}{name:<8}{stats['rps']:>10.1f}{stats['p50']:>10.1f}"
+                        f"{stats['p95']:>10.1f}{stats['errors']:>8}"
+                    )
+            finally:
+                process.terminate()
+                process.wait()
+
+    def get_staff(self, username):
+        try:
+            return User.objects.get(username=username, is_staff=True)
+        except User.DoesNotExist:
+            raise CommandError(f'No staff user named {username}')
+
+    def session_cookie(self, user):
+        client = Client()
+        client.force_login(user)
+        return f'{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}'
+
+    def wait_until_up(self, port, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError('Server exited during startup; is gunicorn (and uvicorn for ASGI) installed?')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise CommandError(f'Server on port {port} did not start within {timeout}s')
+
+    def run_load(self, url, cookie, requests, concurrency):
+        def fetch(_):
+            started = time.perf_counter()
+            try:
+                with urlopen(Request(url, headers={'Cookie': cookie}), timeout=30) as response:
+                    response.read()
+                    ok = response.status == 200 and response.url == url
+            except (URLError, OSError):
+                ok = False
+            return time.perf_counter() - started, ok
+
+        fetch(None)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            samples = list(pool.map(fetch, range(requests)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(duration * 1000 for duration, _ in samples)
+        quantiles = statistics.quantiles(latencies, n=100)
+        return {
+            'rps': requests / elapsed,
+            'p50': quantiles[49],
+            'p95': quantiles[94],
+            'errors': sum(1 for _, ok in samples if not ok),
+        }
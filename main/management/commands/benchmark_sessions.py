@@ -0,0 +1,67 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from main.models import StudentProfile
+
+SLIDING_MIDDLEWARE = 'main.middleware.SlidingSessionMiddleware'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare django_session reads and writes per request between saving the session on '
+        'every request and the threshold-refreshed cached_db mode. Runs against a throwaway '
+        'test database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--interval', type=int, default=30, help='Simulated seconds between requests')
+
+    def handle(self, *args, **options):
+        modes = [
+            ('db, save every request', {
+                'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+                'SESSION_SAVE_EVERY_REQUEST': True,
+                'MIDDLEWARE': [name for name in settings.MIDDLEWARE if name != SLIDING_MIDDLEWARE],
+            }),
+            ('cached_db, refresh when due', {}),
+        ]
+        caches = {**settings.CACHES, 'sessions': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            user = User.objects.create_user('session-bench', password='unused')
+            StudentProfile.objects.create(user=user, roll_number='SESSION-BENCH')
+            self.stdout.write(f"{'mode':<30}{'requests':>10}{'writes':>10}{'reads':>10}")
+            for label, overrides in modes:
+                with override_settings(CACHES=caches, **overrides):
+                    writes, reads = self.measure(user, options['requests'], options['interval'])
+                self.stdout.write(f"{label:<30}{options['requests']:>10}{writes:>10}{reads:>10}")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def measure(self, user, requests, interval):
+        client = Client()
+        client.force_login(user)
+        url = reverse('student_dashboard')
+        now = [client.session.get('_refreshed_at', 0)]
+
+        # Only the refresh decision sees the simulated clock; patching
+        # time.time globally would also skew session expiry itself
+        fake_time = mock.Mock(time=lambda: now[0])
+        with mock.patch('main.middleware.time', fake_time):
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(requests):
+                    now[0] += interval
+                    client.get(url)
+
+        session_queries = [query['sql'] for query in queries.captured_queries if 'django_session' in query['sql']]
+        writes = sum(1 for sql in session_queries if sql.startswith(('INSERT', 'UPDATE', 'DELETE')))
+        return writes, len(session_queries) - writes
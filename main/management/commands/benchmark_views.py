@@ -0,0 +1,163 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.urls import URLPattern, reverse
+
+from main import metrics, urls
+from main.models import StudentProfile, Subject, Result, Attendance
+
+from .generate_benchmark_data import ROLL_PREFIX, STAFF_USERNAME
+
+# POST-only views that end the session; the client is logged back in, untimed, after each request
+LOGOUT_VIEWS = {'student_logout', 'ajax_logout'}
+# Cleared by --cold; clearing the sessions would log the client out
+COLD_CACHES = ['default', 'shared', 'template_fragments']
+ANONYMOUS_VIEWS = {'home', 'student_register', 'student_login'}
+STUDENT_VIEWS = {'student_dashboard', 'student_dashboard_async', 'api_student_me', 'student_logout', 'ajax_logout'}
+
+
+def percentile(sorted_values, fraction):
+    """Linear-interpolated percentile of an already sorted list"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every view in main/urls.py through the test client and report p50/p95/p99 '
+        'latency, queries per request and peak Python memory. Run generate_benchmark_data first; '
+        'use --output to write JSON that can be compared across commits.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--output', help='Write the machine-readable report to this file')
+        parser.add_argument('--cold', action='store_true', help='Clear every cache but the sessions before every request')
+        parser.add_argument('--view', action='append', dest='views', help='Only benchmark these URL names')
+
+    def handle(self, *args, **options):
+        student = StudentProfile.objects.filter(roll_number__startswith=ROLL_PREFIX).select_related('user').order_by('id').first()
+        staff = User.objects.filter(username=STAFF_USERNAME).first()
+        if student is None or staff is None:
+            raise CommandError('No benchmark data found; run generate_benchmark_data first')
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        users = {'anonymous': None, 'student': student.user, 'staff': staff}
+        report = {
+            'commit': git_commit(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'iterations': options['iterations'],
+            'cold_cache': options['cold'],
+            'dataset': {
+                'students': StudentProfile.objects.count(),
+                'subjects': Subject.objects.count(),
+                'results': Result.objects.count(),
+                'attendance': Attendance.objects.count(),
+            },
+            'views': [],
+        }
+
+        self.stdout.write(f"{'view':<28}{'status':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'peak KiB':>10}")
+        for pattern in urls.urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            name = pattern.name
+            if options['views'] and name not in options['views']:
+                continue
+            kwargs = {key: student.id for key in pattern.pattern.converters}
+            role = 'anonymous' if name in ANONYMOUS_VIEWS else 'student' if name in STUDENT_VIEWS else 'staff'
+            result = self.measure(name, reverse(name, kwargs=kwargs), users[role], name in LOGOUT_VIEWS, options)
+            result.update({'name': name, 'role': role})
+            report['views'].append(result)
+            self.stdout.write(
+                f"{name:<28}{result['status']:>7}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+                f"{result['p99_ms']:>9.2f}{result['queries_per_request']:>9.1f}{result['peak_memory_kib']:>10.0f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(report, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+
+    def measure(self, name, url, user, logs_out, options):
+        client = Client()
+        if user is not None:
+            client.force_login(user)
+
+        send = client.post if logs_out else client.get
+
+        def request():
+            if options['cold']:
+                for alias in COLD_CACHES:
+                    caches[alias].clear()
+            response = send(url)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            return response
+
+        def relogin():
+            if logs_out:
+                client.force_login(user)
+
+        request()
+        relogin()
+        # Queries are read from MetricsMiddleware, which also sees the ones
+        # async views run on worker threads with their own connections
+        latencies = []
+        _, queries_before = metrics.QUERIES.totals((name,))
+        for _ in range(options['iterations']):
+            started = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - started) * 1000)
+            relogin()
+        _, queries_after = metrics.QUERIES.totals((name,))
+
+        # Tracing slows Python down, so memory is sampled on a separate request
+        tracemalloc.start()
+        try:
+            request()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+        return {
+            'url': url,
+            'status': response.status_code,
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'mean_ms': statistics.fmean(latencies),
+            'queries_per_request': (queries_after - queries_before) / options['iterations'],
+            'peak_memory_kib': peak / 1024,
+        }
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.bulk import DEFAULT_CHUNK_SIZE, cohort_students, enroll_cohort
+from main.models import Subject
+
+
+class Command(BaseCommand):
+    help = 'Enroll a cohort (course/semester/roll number range) in one or more subjects, skipping existing enrollments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', action='append', dest='subjects', required=True, help='Subject code; repeat for several')
+        parser.add_argument('--course')
+        parser.add_argument('--semester', type=int)
+        parser.add_argument('--roll-from')
+        parser.add_argument('--roll-to')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        cohort = {name: options[name] for name in ('course', 'semester', 'roll_from', 'roll_to')}
+        if all(value in (None, '') for value in cohort.values()):
+            raise CommandError('Choose a cohort with --course, --semester, --roll-from or --roll-to')
+
+        subjects = dict(Subject.objects.filter(code__in=options['subjects']).values_list('code', 'id'))
+        missing = sorted(set(options['subjects']) - set(subjects))
+        if missing:
+            raise CommandError(f"Unknown subject code(s): {', '.join(missing)}")
+
+        report = enroll_cohort(cohort_students(**cohort), subjects.values(), chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(report.summary()))
@@ -0,0 +1,47 @@
+import argparse
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from main.exports import EXPORT_FORMATS, EXPORT_MODELS, iter_export
+from main.periods import parse_period
+
+
+def period_argument(value):
+    period = parse_period(value)
+    if period is None:
+        raise argparse.ArgumentTypeError(f"enter a month as YYYY-MM, not '{value}'")
+    return period
+
+
+class Command(BaseCommand):
+    help = 'Stream a cohort export of results or attendance as CSV or newline-delimited JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORT_MODELS))
+        parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--output', help='File to write to (default: stdout)')
+        parser.add_argument('--course')
+        parser.add_argument('--semester', type=int)
+        parser.add_argument('--exam-type')
+        parser.add_argument('--month')
+        parser.add_argument('--year', type=int)
+        parser.add_argument('--period-from', type=period_argument, help='First month, as YYYY-MM (attendance only)')
+        parser.add_argument('--period-to', type=period_argument, help='Last month, as YYYY-MM (attendance only)')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='First exam date, as YYYY-MM-DD (results only)')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Last exam date, as YYYY-MM-DD (results only)')
+
+    def handle(self, *args, **options):
+        chunks = iter_export(
+            options['kind'], options['export_format'],
+            course=options['course'], semester=options['semester'], exam_type=options['exam_type'],
+            month=options['month'], year=options['year'],
+            period_from=options['period_from'], period_to=options['period_to'],
+            date_from=options['date_from'], date_to=options['date_to'],
+        )
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.writelines(chunks)
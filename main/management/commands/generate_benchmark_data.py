@@ -0,0 +1,177 @@
+import random
+from datetime import date, timedelta
+from itertools import product
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from main.bulk import chunked
+from main.catalog import bump_subject_catalog
+from main.models import StudentProfile, Subject, StudentSubject, Result, Attendance
+from main.periods import MONTH_NAMES, period_key
+from main.search import reindex
+from main.stats import invalidate_dashboard_stats
+from main.summaries import refresh_summaries
+
+ROLL_PREFIX = 'BENCH/'
+USERNAME_PREFIX = 'bench'
+STAFF_USERNAME = 'bench-staff'
+BENCH_PASSWORD = 'bench-password'
+COURSES = ['Computer Science', 'Electronics', 'Mechanical', 'Civil', 'Electrical', 'Biotechnology']
+EXAM_TYPES = ['Final Exam', 'Mid Term', 'Quiz 1', 'Quiz 2']
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create a synthetic dataset for benchmarking, e.g. --students 50000 --subjects 500 '
+        '--results 2000000 --attendance 5000000. Rows are generated and inserted one batch at a '
+        'time, so memory stays flat. The same --seed always produces the same data.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--subjects', type=int, default=50)
+        parser.add_argument('--results', type=int, default=20000)
+        parser.add_argument('--attendance', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if StudentProfile.all_objects.filter(roll_number__startswith=ROLL_PREFIX).exists():
+            raise CommandError('Benchmark data already exists; generate into a fresh database')
+
+        students, subjects = options['students'], options['subjects']
+        if students < 1 or subjects < 1:
+            raise CommandError('--students and --subjects must be at least 1')
+        # Each student is enrolled in just enough subjects to hold their share of
+        # results (one per exam type) and attendance (one per month)
+        per_student_results = -(-options['results'] // students)
+        per_student_attendance = -(-options['attendance'] // students)
+        enrolled = max(-(-per_student_results // len(EXAM_TYPES)), -(-per_student_attendance // len(MONTH_NAMES)), 1)
+        if enrolled > subjects:
+            raise CommandError(
+                f'{subjects} subjects cannot hold {per_student_results} results and '
+                f'{per_student_attendance} attendance rows per student; add subjects'
+            )
+
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+
+        subject_ids = self.create_subjects(subjects)
+        self.create_staff()
+        student_ids = self.create_students(students)
+
+        counts = {'enrollments': 0, 'results': 0, 'attendance': 0}
+        remaining_results, remaining_attendance = options['results'], options['attendance']
+        for chunk in chunked(student_ids, max(1, self.batch_size // enrolled)):
+            enrollments, results, attendance = [], [], []
+            for student_id in chunk:
+                subjects_taken = self.rng.sample(subject_ids, enrolled)
+                enrollments.extend(StudentSubject(student_id=student_id, subject_id=subject_id) for subject_id in subjects_taken)
+
+                take = min(per_student_results, remaining_results)
+                remaining_results -= take
+                for subject_id, exam_type in list(product(subjects_taken, EXAM_TYPES))[:take]:
+                    results.append(self.make_result(student_id, subject_id, exam_type))
+
+                take = min(per_student_attendance, remaining_attendance)
+                remaining_attendance -= take
+                for subject_id, month in list(product(subjects_taken, MONTH_NAMES))[:take]:
+                    attendance.append(self.make_attendance(student_id, subject_id, month))
+
+            with transaction.atomic():
+                StudentSubject.objects.bulk_create(enrollments, batch_size=self.batch_size)
+                Result.objects.bulk_create(results, batch_size=self.batch_size)
+                Attendance.objects.bulk_create(attendance, batch_size=self.batch_size)
+                # bulk_create sends no signals, so summaries are refreshed here
+                refresh_summaries(chunk)
+            counts['enrollments'] += len(enrollments)
+            counts['results'] += len(results)
+            counts['attendance'] += len(attendance)
+            self.stdout.write(f"  {counts['results']} results, {counts['attendance']} attendance rows")
+
+        invalidate_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(subject_ids)} subjects, {len(student_ids)} students, {counts['enrollments']} "
+            f"enrollments, {counts['results']} results and {counts['attendance']} attendance rows"
+        ))
+
+    def create_subjects(self, count):
+        existing = set(Subject.objects.values_list('code', flat=True))
+        Subject.objects.bulk_create(
+            [
+                Subject(name=f'Benchmark Subject {i}', code=f'BS{i:05d}', credits=self.rng.randint(2, 5))
+                for i in range(count) if f'BS{i:05d}' not in existing
+            ],
+            batch_size=self.batch_size,
+        )
+        # bulk_create sends no signals
+        transaction.on_commit(bump_subject_catalog)
+        return list(Subject.objects.filter(code__startswith='BS').order_by('id').values_list('id', flat=True)[:count])
+
+    def create_staff(self):
+        staff, created = User.objects.get_or_create(username=STAFF_USERNAME, defaults={'is_staff': True})
+        if created:
+            staff.set_password(BENCH_PASSWORD)
+            staff.save(update_fields=['password'])
+
+    def create_students(self, count):
+        # Hashing is deliberately slow, so every benchmark user shares one hash
+        password = make_password(BENCH_PASSWORD)
+        for chunk in chunked(range(count), self.batch_size):
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=f'{USERNAME_PREFIX}{i:07d}',
+                        first_name='Student',
+                        last_name=str(i),
+                        email=f'{USERNAME_PREFIX}{i:07d}@example.com',
+                        password=password,
+                    )
+                    for i in chunk
+                ])
+                if users[0].pk is None:
+                    users = User.objects.filter(username__in=[user.username for user in users])
+                StudentProfile.objects.bulk_create([
+                    StudentProfile(
+                        user=user,
+                        roll_number=f'{ROLL_PREFIX}{user.username[len(USERNAME_PREFIX):]}',
+                        phone=f'9{self.rng.randrange(10 ** 9):09d}',
+                        course=self.rng.choice(COURSES),
+                        semester=self.rng.randint(1, 8),
+                        profile_completed=self.rng.random() < 0.8,
+                    )
+                    for user in users
+                ])
+        # bulk_create sends no signals, so the search index is filled here
+        reindex(roll_number__startswith=ROLL_PREFIX)
+        return list(
+            StudentProfile.objects.filter(roll_number__startswith=ROLL_PREFIX).order_by('id').values_list('id', flat=True)
+        )
+
+    def make_result(self, student_id, subject_id, exam_type):
+        total = 100
+        marks = min(total, max(0, int(self.rng.gauss(62, 18))))
+        return Result(
+            student_id=student_id,
+            subject_id=subject_id,
+            marks_obtained=marks,
+            total_marks=total,
+            grade=Result.grade_for(marks, total),
+            exam_date=date(2024, 1, 1) + timedelta(days=self.rng.randrange(730)),
+            exam_type=exam_type,
+        )
+
+    def make_attendance(self, student_id, subject_id, month):
+        total = self.rng.randint(10, 30)
+        return Attendance(
+            student_id=student_id,
+            subject_id=subject_id,
+            total_classes=total,
+            classes_attended=self.rng.randint(total // 2, total),
+            month=month,
+            year=2025,
+            period=period_key(month, 2025),
+        )
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.bulk import cohort_students
+from main.transcripts import DEFAULT_BATCH_SIZE, TRANSCRIPT_FORMATS, generate_transcripts, zip_transcripts
+
+
+class Command(BaseCommand):
+    help = (
+        'Write HTML and PDF transcripts for a cohort (course/semester/roll number range) into a directory, '
+        'rendering in a process pool. Re-running resumes: students whose files already exist are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', required=True, help='Directory the transcripts are written to')
+        parser.add_argument('--zip', dest='archive', help='Also pack the directory into this zip archive')
+        parser.add_argument('--format', action='append', dest='formats', choices=TRANSCRIPT_FORMATS,
+                            help='Format to write; repeat for several (default: all)')
+        parser.add_argument('--course')
+        parser.add_argument('--semester', type=int)
+        parser.add_argument('--roll-from')
+        parser.add_argument('--roll-to')
+        parser.add_argument('--workers', type=int, help='Worker processes (default: one per core)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError('--workers must be at least 1')
+        formats = options['formats'] or TRANSCRIPT_FORMATS
+        cohort = {name: options[name] for name in ('course', 'semester', 'roll_from', 'roll_to')}
+
+        def progress(done, total):
+            self.stdout.write(f'{done}/{total} transcripts rendered')
+
+        started = time.perf_counter()
+        rendered, skipped = generate_transcripts(
+            cohort_students(**cohort), options['output'], formats=formats,
+            workers=options['workers'], batch_size=options['batch_size'], progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{rendered} transcripts rendered, {skipped} already present, '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
+        if options['archive']:
+            zip_transcripts(options['output'], options['archive'], formats=formats)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['archive']}"))
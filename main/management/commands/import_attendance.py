@@ -0,0 +1,35 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from main.bulk import DEFAULT_CHUNK_SIZE, import_attendance
+
+
+class Command(BaseCommand):
+    help = 'Bulk import monthly attendance from a CSV file, upserting on (student, subject, month, year)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='CSV with roll_number, subject_code, total_classes, classes_attended, month, year')
+        parser.add_argument('--subject', help='Subject code for a single-subject sheet without a subject_code column')
+        parser.add_argument('--month', help='Month for a sheet without a month column')
+        parser.add_argument('--year', type=int, help='Year for a sheet without a year column')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        sheet = {
+            'subject_code': options['subject'],
+            'month': options['month'],
+            'year': options['year'],
+        }
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                report = import_attendance(csv_file, sheet=sheet, chunk_size=options['chunk_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        for line, message in report.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... and {report.error_count - len(report.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(report.summary()))
@@ -0,0 +1,27 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from main.bulk import DEFAULT_CHUNK_SIZE, import_results
+
+
+class Command(BaseCommand):
+    help = 'Bulk import exam results from a CSV file, upserting on (student, subject, exam_type)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help='CSV with roll_number, subject_code, marks_obtained, total_marks, exam_date, exam_type')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                report = import_results(csv_file, chunk_size=options['chunk_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        for line, message in report.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... and {report.error_count - len(report.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(report.summary()))
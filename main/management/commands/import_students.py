@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from main.onboarding import ONBOARDING_CHUNK_SIZE, STUDENT_COLUMNS, import_students
+
+
+class Command(BaseCommand):
+    help = 'Create student accounts in bulk from a CSV file, hashing initial passwords in a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path', help=f"CSV with {', '.join(STUDENT_COLUMNS)}")
+        parser.add_argument('--chunk-size', type=int, default=ONBOARDING_CHUNK_SIZE)
+        parser.add_argument('--workers', type=int, default=settings.ONBOARDING_HASH_WORKERS,
+                            help='Password hashing processes (default: ONBOARDING_HASH_WORKERS)')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as csv_file:
+                report = import_students(csv_file, chunk_size=options['chunk_size'], workers=options['workers'])
+        except OSError as e:
+            raise CommandError(str(e))
+        except ValidationError as e:
+            raise CommandError(' '.join(e.messages))
+
+        for line, message in report.errors:
+            self.stderr.write(f'line {line}: {message}')
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'... and {report.error_count - len(report.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(report.summary()))
@@ -0,0 +1,118 @@
+import re
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+
+TAG_PATTERN = re.compile(r'<(link|script)\b([^>]*)>')
+ATTRIBUTE_PATTERN = re.compile(r'([\w-]+)="([^"]*)"')
+# Browsers fetch the first format they support from a @font-face src list
+FONT_PATTERN = re.compile(r'src:\s*url\(([^)]+)\)')
+MAX_AGE_PATTERN = re.compile(r'max-age=(\d+)')
+
+
+def page_assets(html):
+    """URLs of the stylesheets and scripts a page loads, in document order"""
+    for tag, attributes in TAG_PATTERN.findall(html):
+        attributes = dict(ATTRIBUTE_PATTERN.findall(attributes))
+        if tag == 'link' and attributes.get('rel') == 'stylesheet' and attributes.get('href'):
+            yield attributes['href']
+        elif tag == 'script' and attributes.get('src'):
+            yield attributes['src']
+
+
+def response_bytes(response):
+    """Body plus header bytes, roughly as sent on the wire"""
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    headers = sum(len(name) + len(value) + 4 for name, value in response.items())
+    return len(body) + headers + len(f'HTTP/1.1 {response.status_code}\r\n\r\n'), body
+
+
+def is_fresh(cache_control):
+    """Whether a browser reuses the asset without asking the server again"""
+    max_age = MAX_AGE_PATTERN.search(cache_control)
+    return 'no-cache' not in cache_control and 'no-store' not in cache_control and bool(max_age and int(max_age.group(1)))
+
+
+class Command(BaseCommand):
+    help = (
+        'Report the bytes a browser transfers for a cold and a warm load of a page and the static '
+        'assets it references, and how each asset is compressed and cached.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/student/login/', help='Page to load')
+        parser.add_argument('--user', help='Username to load the page as')
+        parser.add_argument('--accept-encoding', default='br, gzip', help='Accept-Encoding the browser sends')
+        parser.add_argument('--production', action='store_true',
+                            help='Serve as with DEBUG off: fingerprinted names from the collectstatic manifest')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        if not options['production']:
+            return self.measure(options)
+        manifest = Path(settings.STATIC_ROOT) / getattr(staticfiles_storage, 'manifest_name', 'staticfiles.json')
+        if not manifest.exists():
+            raise CommandError(f'{manifest} not found; run collectstatic first')
+        with override_settings(DEBUG=False):
+            return self.measure(options)
+
+    def measure(self, options):
+        client = Client(HTTP_ACCEPT_ENCODING=options['accept_encoding'])
+        if options['user']:
+            try:
+                client.force_login(User.objects.get(username=options['user']))
+            except User.DoesNotExist:
+                raise CommandError(f"No user {options['user']!r}")
+
+        page = client.get(options['path'])
+        if page.status_code != 200:
+            raise CommandError(f"{options['path']} returned {page.status_code}")
+        page_bytes, html = response_bytes(page)
+        rows = [(options['path'], page.status_code, page.get('Content-Encoding', '-'), page_bytes,
+                 page_bytes, page.get('Cache-Control', '-'))]
+
+        pending = [urljoin(options['path'], url) for url in page_assets(html.decode())]
+        seen = set()
+        while pending:
+            url = pending.pop(0)
+            if url in seen:
+                continue
+            seen.add(url)
+            if urlsplit(url).netloc:
+                self.stderr.write(f'{url} is not served by this site and was not measured')
+                continue
+            response = client.get(url)
+            cold, _ = response_bytes(response)
+            cache_control = response.get('Cache-Control', '')
+            if is_fresh(cache_control):
+                warm = 0
+            else:
+                validators = {}
+                if response.has_header('ETag'):
+                    validators['HTTP_IF_NONE_MATCH'] = response['ETag']
+                if response.has_header('Last-Modified'):
+                    validators['HTTP_IF_MODIFIED_SINCE'] = response['Last-Modified']
+                warm, _ = response_bytes(client.get(url, **validators))
+            rows.append((url, response.status_code, response.get('Content-Encoding', '-'), cold, warm, cache_control or '-'))
+
+            if url.split('?')[0].endswith('.css') and response.status_code == 200:
+                # Fetched again uncompressed only to find the fonts it loads
+                _, css = response_bytes(Client().get(url))
+                pending.extend(urljoin(url, font.strip('\'"')) for font in FONT_PATTERN.findall(css.decode()))
+
+        width = max(len(row[0]) for row in rows)
+        self.stdout.write(f"{'Resource':<{width}}  Status  Encoding  {'Cold':>9}  {'Warm':>9}  Cache-Control")
+        for url, status, encoding, cold, warm, cache_control in rows:
+            self.stdout.write(f'{url:<{width}}  {status:>6}  {encoding:<8}  {cold:>9,}  {warm:>9,}  {cache_control}')
+        cold_total = sum(row[3] for row in rows)
+        warm_total = sum(row[4] for row in rows)
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(rows)} requests: {cold_total:,} bytes cold, {warm_total:,} bytes warm '
+            f"(DEBUG={'on' if settings.DEBUG else 'off'})"
+        ))
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from main.deletion import purge_deleted_students
+
+
+class Command(BaseCommand):
+    help = (
+        'Physically delete soft-deleted students and their records in small batches. '
+        'Safe to interrupt and run again; the purge job queued on deletion does the same.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.PURGE_BATCH_SIZE, help='Rows deleted per transaction')
+        parser.add_argument('--pause', type=float, default=settings.PURGE_PAUSE_SECONDS, help='Seconds to wait between batches')
+
+    def handle(self, *args, **options):
+        def progress(done, total):
+            self.stdout.write(f'{done}/{total} students purged')
+
+        students, rows = purge_deleted_students(batch_size=options['batch_size'], pause=options['pause'], progress=progress)
+        self.stdout.write(self.style.SUCCESS(f'Purged {students} students ({rows} rows)'))
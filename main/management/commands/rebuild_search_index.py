@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+
+from main.models import StudentProfile
+from main.search import SEARCH_TABLE, reindex
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text student search index from StudentProfile and User'
+
+    def handle(self, *args, **options):
+        connection = connections[router.db_for_write(StudentProfile)]
+        # One transaction, so searches never see a half-built index
+        with transaction.atomic(using=connection.alias):
+            if connection.vendor in ('sqlite', 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+            reindex()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {StudentProfile.objects.count()} students'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from main.bulk import DEFAULT_CHUNK_SIZE, chunked
+from main.models import StudentProfile
+from main.summaries import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute every AcademicSummary row from the raw results, attendance and enrollments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        student_ids = StudentProfile.objects.order_by('id').values_list('id', flat=True).iterator(chunk_size=options['chunk_size'])
+        total = 0
+        for chunk in chunked(student_ids, options['chunk_size']):
+            refresh_summaries(chunk)
+            total += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt summaries for {total} students'))
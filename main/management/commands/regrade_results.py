@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+from main.fragments import bump_subject_versions
+from main.models import Result
+from main.summaries import refresh_summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute every Result.grade from its marks with set-based UPDATEs over id ranges'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000, help='Ids covered by each UPDATE')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the results whose grade would change')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        bounds = Result.objects.aggregate(first=Min('id'), last=Max('id'))
+        if bounds['first'] is None:
+            self.stdout.write('No results to regrade')
+            return
+
+        started = time.monotonic()
+        changed = 0
+        expression = Result.grade_expression()
+        for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+            # Short transactions over id ranges keep each write lock brief
+            with transaction.atomic():
+                stale = Result.objects.filter(id__gte=start, id__lt=start + batch_size).exclude(grade=expression)
+                if options['dry_run']:
+                    changed += stale.count()
+                    continue
+                affected = list(stale.values_list('student_id', 'subject_id'))
+                if not affected:
+                    continue
+                changed += stale.update(grade=expression)
+                refresh_summaries({student_id for student_id, _ in affected})
+                bump_subject_versions({subject_id for _, subject_id in affected})
+
+        verb = 'would change' if options['dry_run'] else 'regraded'
+        self.stdout.write(self.style.SUCCESS(
+            f'{changed} results {verb} in {time.monotonic() - started:.2f}s'
+        ))
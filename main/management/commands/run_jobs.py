@@ -0,0 +1,73 @@
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.jobs import claim_jobs, heartbeat, requeue_stale, run_job, worker_name
+from main.workers import process_pool
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued background jobs from the database in a thread or process pool until stopped. '
+        'Several workers may run at once, on one machine or many.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.JOB_WORKERS, help='Jobs run at the same time')
+        parser.add_argument('--pool', choices=['thread', 'process'], default='thread',
+                            help='Threads suit database-bound jobs; processes suit CPU-bound ones')
+        parser.add_argument('--poll-interval', type=float, default=settings.JOB_POLL_SECONDS)
+        parser.add_argument('--burst', action='store_true', help='Exit once no jobs are due')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+        name = worker_name()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        if options['pool'] == 'process':
+            pool = process_pool(workers)
+        else:
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.stdout.write(f"Worker {name} running up to {workers} jobs in a {options['pool']} pool")
+
+        running = {}
+        with pool:
+            while not self.stopping or running:
+                if not self.stopping:
+                    recovered = requeue_stale()
+                    if recovered:
+                        self.stdout.write(self.style.WARNING(f'Recovered {recovered} abandoned job(s)'))
+                    for job_id in claim_jobs(name, workers - len(running)) if len(running) < workers else []:
+                        running[pool.submit(run_job, job_id)] = job_id
+                heartbeat(list(running.values()))
+
+                if not running:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+                done, _ = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        _, status = future.result()
+                    except Exception as e:
+                        # The job's row could not be updated; its lease will lapse and it is retried
+                        self.stderr.write(f'Job {job_id} crashed: {e}')
+                    else:
+                        self.stdout.write(f'Job {job_id} {status}')
+        self.stdout.write(f'Worker {name} stopped')
+
+    def stop(self, signum, frame):
+        if self.stopping:
+            raise KeyboardInterrupt
+        # Finish the running jobs, claim no more; a second signal exits at once
+        self.stdout.write('Stopping after running jobs finish')
+        self.stopping = True
@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from main.db_routers import PRIMARY, read_replicas
+
+SQLITE_ENGINE = 'django.db.backends.sqlite3'
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite primary into every SQLite read replica with the online backup API. '
+        'Lets a second SQLite file stand in for a replica; run it whenever the replica should '
+        'catch up. Real replicas are kept in sync by the database server instead.'
+    )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[PRIMARY]
+        if primary['ENGINE'] != SQLITE_ENGINE:
+            raise CommandError('The primary is not SQLite; replicate with the database server instead')
+        replicas = [alias for alias in read_replicas() if settings.DATABASES[alias]['ENGINE'] == SQLITE_ENGINE]
+        if not replicas:
+            raise CommandError('No SQLite replicas configured; set DATABASE_REPLICA_URLS')
+
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for alias in replicas:
+                target = sqlite3.connect(settings.DATABASES[alias]['NAME'])
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(self.style.SUCCESS(f"Copied {primary['NAME']} to {alias} ({settings.DATABASES[alias]['NAME']})"))
+        finally:
+            source.close()
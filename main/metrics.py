@@ -0,0 +1,210 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Counters for the request being handled. Being a context variable, it
+# follows the request into threads started with sync_to_async.
+current_request = ContextVar('main_metrics_request', default=None)
+
+
+class RequestStats:
+    """
+    What one request spent on queries and template rendering. An async
+    view's concurrent queries run on several threads at once, so updates
+    take a lock.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.template_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def add_query(self, seconds):
+        with self.lock:
+            self.queries += 1
+            self.query_seconds += seconds
+
+    def add_template(self, seconds):
+        with self.lock:
+            self.template_seconds += seconds
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} counter'
+        with self.lock:
+            values = sorted(self.values.items())
+        for labels, value in values:
+            yield f'{self.name}{format_labels(self.label_names, labels)} {value}'
+
+
+class Histogram:
+    def __init__(self, name, documentation, label_names, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def observe(self, labels, value):
+        with self.lock:
+            counts, total = self.values.get(labels) or ([0] * (len(self.buckets) + 1), 0)
+            counts[bisect_left(self.buckets, value)] += 1
+            self.values[labels] = (counts, total + value)
+
+    def totals(self, labels):
+        """``(count, sum)`` observed so far for one label set"""
+        with self.lock:
+            counts, total = self.values.get(labels) or ((), 0)
+            return sum(counts), total
+
+    def expose(self):
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} histogram'
+        with self.lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self.values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                bucket_labels = format_labels(self.label_names + ('le',), labels + (str(bound),))
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            yield f'{self.name}_sum{format_labels(self.label_names, labels)} {total}'
+            yield f'{self.name}_count{format_labels(self.label_names, labels)} {cumulative}'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values)) + '}'
+
+
+REQUESTS = Counter('http_requests_total', 'Requests handled, by URL name and status code.', ('view', 'status'))
+REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by URL name.', ('view',), LATENCY_BUCKETS,
+)
+QUERIES = Histogram('db_queries_per_request', 'SQL queries issued per request, by URL name.', ('view',), QUERY_COUNT_BUCKETS)
+QUERY_SECONDS = Counter('db_query_seconds_total', 'Time spent executing SQL, by URL name.', ('view',))
+TEMPLATE_SECONDS = Histogram(
+    'template_render_seconds', 'Time spent rendering templates per request, by URL name.', ('view',), LATENCY_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    'http_response_size_bytes', 'Size of non-streaming response bodies, by URL name.', ('view',), SIZE_BUCKETS,
+)
+METRICS = [REQUESTS, REQUEST_SECONDS, QUERIES, QUERY_SECONDS, TEMPLATE_SECONDS, RESPONSE_BYTES]
+
+
+def expose():
+    """
+    All metrics in the Prometheus text exposition format.
+
+    Metrics are kept in memory per process: with several gunicorn workers
+    each scrape of /metrics sees only the worker that answered it, and a
+    worker's counts start again from zero when it is restarted. Compare
+    rates and latency distributions, not absolute totals, or run a
+    single worker when the totals matter (as benchmark_views does).
+    """
+    return '\n'.join(line for metric in METRICS for line in metric.expose()) + '\n'
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper that charges each query to the current request"""
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add_query(time.perf_counter() - started)
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    """connection_created receiver; a reconnect reuses the same wrapper object"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def start_request():
+    return current_request.set(RequestStats())
+
+
+def finish_request(request, response, token, started):
+    """Record the request's metrics and log it if it went over budget"""
+    elapsed = time.perf_counter() - started
+    stats = current_request.get()
+    current_request.reset(token)
+
+    match = getattr(request, 'resolver_match', None)
+    view = match.view_name if match else 'unmatched'
+    REQUESTS.inc((view, response.status_code))
+    REQUEST_SECONDS.observe((view,), elapsed)
+    QUERIES.observe((view,), stats.queries)
+    QUERY_SECONDS.inc((view,), stats.query_seconds)
+    TEMPLATE_SECONDS.observe((view,), stats.template_seconds)
+    if not response.streaming:
+        RESPONSE_BYTES.observe((view,), len(response.content))
+
+    time_budget = settings.METRICS_SLOW_REQUEST_SECONDS
+    query_budget = settings.METRICS_QUERY_BUDGET
+    if (time_budget is not None and elapsed > time_budget) or (query_budget is not None and stats.queries > query_budget):
+        logger.warning(
+            '%s %s (%s) took %.3fs with %d queries (%.3fs in SQL, %.3fs rendering)',
+            request.method, request.path, view, elapsed,
+            stats.queries, stats.query_seconds, stats.template_seconds,
+        )
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        stats = current_request.get()
+        if stats is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats.add_template(time.perf_counter() - started)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, timing every top-level render.
+
+    Extended and included templates render inside their parent, so each
+    page is counted once.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
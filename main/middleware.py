@@ -1,40 +1,97 @@
+import re
+import time
+from abc import ABC, abstractmethod
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
 from django.http import HttpResponseRedirect
 from django.urls import reverse
-from django.contrib.auth import logout
+from django.contrib.auth import logout, alogout
 from django.contrib import messages
 from django.middleware.csrf import get_token
 
-class SessionSecurityMiddleware:
+from .db_routers import SAFE_METHODS, STICKY_COOKIE, read_replicas
+from .metrics import finish_request, start_request
+from .roles import ROLE_STUDENT, get_role, aget_role
+
+# URLs that require authentication, grouped by the role each one needs
+PROTECTED_PATHS = re.compile(r'^/(?:(?P<student>student/dashboard/)|(?P<staff>admin-panel/))')
+
+class HybridMiddleware(ABC):
     """
-    Middleware to ensure proper session handling and prevent unauthorized access
+    Base for middleware that runs natively under both WSGI and ASGI.
+
+    Under ASGI Django would otherwise run sync-only middleware in a thread
+    and hop back to the event loop for every layer of the stack.
+    Subclasses implement ``handle`` for WSGI and ``__acall__`` for ASGI;
+    ``__call__`` dispatches to whichever fits the stack.
     """
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # List of URLs that require authentication
-        protected_urls = [
-            '/student/dashboard/',
-            '/admin-panel/',
-        ]
-        
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    @abstractmethod
+    def handle(self, request):
+        """Process a request under WSGI"""
+
+    @abstractmethod
+    async def __acall__(self, request):
+        """Process a request under ASGI"""
+
+class MetricsMiddleware(HybridMiddleware):
+    """
+    Records latency, SQL queries, template time and response size per URL name.
+
+    List it first so the other middleware is included in the timings.
+    """
+    def handle(self, request):
+        started = time.perf_counter()
+        token = start_request()
+        response = self.get_response(request)
+        finish_request(request, response, token, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        token = start_request()
+        response = await self.get_response(request)
+        finish_request(request, response, token, started)
+        return response
+
+class SessionSecurityMiddleware(HybridMiddleware):
+    """
+    Middleware to ensure proper session handling and prevent unauthorized access
+    """
+    def handle(self, request):
         # Check if the current path requires authentication
-        requires_auth = any(request.path.startswith(url) for url in protected_urls)
+        match = PROTECTED_PATHS.match(request.path)
+        requires_auth = match is not None
         
         if requires_auth and not request.user.is_authenticated:
             # User is trying to access protected page without authentication
             return HttpResponseRedirect(reverse('student_login'))
         
-        # If user is authenticated, check if they have proper permissions
-        if request.user.is_authenticated:
-            if request.path.startswith('/student/dashboard/'):
-                if not hasattr(request.user, 'studentprofile'):
+        # If user is authenticated, check if they have proper permissions.
+        # The student role comes from the session and staff flags from the
+        # already-loaded user, so this costs no queries.
+        if requires_auth:
+            if match.group('student'):
+                if get_role(request) != ROLE_STUDENT:
                     # Store a message in session before logout
                     messages.error(request, 'Access denied. Invalid session.')
                     logout(request)
                     return HttpResponseRedirect(reverse('student_login'))
             
-            elif request.path.startswith('/admin-panel/'):
+            elif match.group('staff'):
                 if not (request.user.is_staff or request.user.is_superuser):
                     # Store a message in session before logout
                     messages.error(request, 'Access denied. Insufficient permissions.')
@@ -45,22 +102,50 @@ class SessionSecurityMiddleware:
         
         # Add cache control headers for authenticated pages
         if requires_auth and request.user.is_authenticated:
-            response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
-            response['Pragma'] = 'no-cache'
-            response['Expires'] = '0'
-            response['X-Frame-Options'] = 'DENY'
-            # Don't interfere with CSRF headers
+            self.add_no_store_headers(response)
         
         return response
 
-class LogoutRedirectMiddleware:
+    async def __acall__(self, request):
+        match = PROTECTED_PATHS.match(request.path)
+        if match is None:
+            return await self.get_response(request)
+
+        user = await request.auser()
+        # Templates read request.user, which must not hit the database from async code
+        request.user = user
+        if not user.is_authenticated:
+            return HttpResponseRedirect(reverse('student_login'))
+
+        if match.group('student'):
+            if await aget_role(request) != ROLE_STUDENT:
+                messages.error(request, 'Access denied. Invalid session.')
+                await alogout(request)
+                return HttpResponseRedirect(reverse('student_login'))
+
+        elif match.group('staff'):
+            if not (user.is_staff or user.is_superuser):
+                messages.error(request, 'Access denied. Insufficient permissions.')
+                await alogout(request)
+                return HttpResponseRedirect(reverse('student_login'))
+
+        response = await self.get_response(request)
+        self.add_no_store_headers(response)
+        return response
+
+    @staticmethod
+    def add_no_store_headers(response):
+        response['Cache-Control'] = 'no-cache, no-store, must-revalidate, private'
+        response['Pragma'] = 'no-cache'
+        response['Expires'] = '0'
+        response['X-Frame-Options'] = 'DENY'
+        # Don't interfere with CSRF headers
+
+class LogoutRedirectMiddleware(HybridMiddleware):
     """
     Middleware to handle logout redirects properly
     """
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
+    def handle(self, request):
         # Process the request first
         response = self.get_response(request)
         
@@ -70,8 +155,90 @@ class LogoutRedirectMiddleware:
             if 'just_logged_out' in request.session:
                 del request.session['just_logged_out']
             # Add headers to prevent caching
-            response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
-            response['Pragma'] = 'no-cache'
-            response['Expires'] = '0'
+            self.add_no_cache_headers(response)
         
-        return response
\ No newline at end of file
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        # The session flag is checked first so the user is only loaded when it is set
+        if await request.session.aget('just_logged_out', False) and not (await request.auser()).is_authenticated:
+            await request.session.apop('just_logged_out', None)
+            self.add_no_cache_headers(response)
+
+        return response
+
+    @staticmethod
+    def add_no_cache_headers(response):
+        response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+        response['Pragma'] = 'no-cache'
+        response['Expires'] = '0'
+
+class SlidingSessionMiddleware(HybridMiddleware):
+    """
+    Sliding session expiry without a session write on every request.
+
+    Stands in for SESSION_SAVE_EVERY_REQUEST: a session that has not been
+    saved for SESSION_REFRESH_AFTER seconds is marked modified so
+    SessionMiddleware saves it and pushes its expiry out to a full
+    SESSION_COOKIE_AGE again. Must be listed after SessionMiddleware.
+    """
+    REFRESHED_AT_KEY = '_refreshed_at'
+
+    def handle(self, request):
+        response = self.get_response(request)
+
+        session = getattr(request, 'session', None)
+        if session is None or session.is_empty():
+            return response
+        self.refresh(session, session.get(self.REFRESHED_AT_KEY, 0))
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+
+        session = getattr(request, 'session', None)
+        if session is None or session.is_empty():
+            return response
+        # Loads the session without blocking; refresh() then only touches memory
+        self.refresh(session, await session.aget(self.REFRESHED_AT_KEY, 0))
+        return response
+
+    def refresh(self, session, refreshed_at):
+        if session.session_key is None:
+            # Cookie for a session that no longer exists; don't recreate it
+            return
+
+        now = int(time.time())
+        if session.modified or now - refreshed_at >= settings.SESSION_REFRESH_AFTER:
+            # A session being saved anyway gets its expiry refreshed for free
+            session[self.REFRESHED_AT_KEY] = now
+
+class ReplicaStickinessMiddleware(HybridMiddleware):
+    """
+    Read-your-writes for replica routing: after a write request the client
+    gets a short-lived cookie that keeps its reads on the primary until the
+    replicas have caught up (see main.db_routers.wants_primary).
+    """
+    def handle(self, request):
+        response = self.get_response(request)
+        self.pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self.pin_to_primary(request, response)
+        return response
+
+    @staticmethod
+    def pin_to_primary(request, response):
+        if request.method in SAFE_METHODS or not read_replicas():
+            return
+        response.set_cookie(
+            STICKY_COOKIE,
+            str(time.time() + settings.REPLICA_STICKY_SECONDS),
+            max_age=settings.REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
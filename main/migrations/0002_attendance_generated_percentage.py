@@ -0,0 +1,26 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:50
+
+import django.db.models.expressions
+import django.db.models.functions.math
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0001_initial'),
+    ]
+
+    # Django cannot alter a regular column into a generated one in place,
+    # so the stored value is dropped and recomputed by the database.
+    operations = [
+        migrations.RemoveField(
+            model_name='attendance',
+            name='attendance_percentage',
+        ),
+        migrations.AddField(
+            model_name='attendance',
+            name='attendance_percentage',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.math.Round(django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('classes_attended'), '*', models.Value(100.0)), '/', models.F('total_classes')), 2), output_field=models.DecimalField(decimal_places=2, max_digits=5)),
+        ),
+    ]
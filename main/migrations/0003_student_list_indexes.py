@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0002_attendance_generated_percentage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['course', 'semester', 'roll_number'], name='student_course_sem_roll_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentprofile',
+            index=models.Index(fields=['profile_completed', 'roll_number'], name='student_status_roll_idx'),
+        ),
+    ]
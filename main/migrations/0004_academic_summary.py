@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-18 02:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_student_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AcademicSummary',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='main.studentprofile')),
+                ('gpa', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True)),
+                ('credits_enrolled', models.IntegerField(default=0)),
+                ('credits_earned', models.IntegerField(default=0)),
+                ('results_count', models.IntegerField(default=0)),
+                ('passed_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('average_attendance', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('last_exam_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'academic summaries',
+            },
+        ),
+    ]
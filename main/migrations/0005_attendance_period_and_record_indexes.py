@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-18 03:07
+
+from django.db import migrations, models, transaction
+from django.db.models import Max
+
+from main.periods import period_key
+
+BACKFILL_BATCH_SIZE = 50000
+
+
+def backfill_periods(apps, schema_editor):
+    """
+    Set period from month/year one id range at a time, each range in its own
+    transaction, with one UPDATE per distinct month/year in the range.
+    """
+    Attendance = apps.get_model('main', 'Attendance')
+    last_id = Attendance.objects.aggregate(last=Max('id'))['last'] or 0
+    for start in range(0, last_id, BACKFILL_BATCH_SIZE):
+        batch = Attendance.objects.filter(id__gt=start, id__lte=start + BACKFILL_BATCH_SIZE)
+        with transaction.atomic():
+            for month, year in batch.values_list('month', 'year').distinct().order_by():
+                key = period_key(month, year)
+                if key is not None:
+                    batch.filter(month=month, year=year).update(period=key)
+
+
+class Migration(migrations.Migration):
+    # Lets every backfill batch commit on its own
+    atomic = False
+
+    dependencies = [
+        ('main', '0004_academic_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='period',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['student', 'period'], name='attendance_student_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['subject', 'period'], name='attendance_subject_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['student', 'exam_date'], name='result_student_date_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from main.search import INDEX_BATCH_SIZE, SOURCE_FIELDS, create_index, drop_index, index_rows
+
+
+def build_search_index(apps, schema_editor):
+    create_index(schema_editor.connection)
+    StudentProfile = apps.get_model('main', 'StudentProfile')
+    rows = StudentProfile.objects.using(schema_editor.connection.alias).order_by('id').values(*SOURCE_FIELDS)
+    batch = []
+    for row in rows.iterator(chunk_size=INDEX_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == INDEX_BATCH_SIZE:
+            index_rows(schema_editor.connection, batch)
+            batch = []
+    index_rows(schema_editor.connection, batch)
+
+
+def remove_search_index(apps, schema_editor):
+    drop_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_attendance_period_and_record_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(build_search_index, remove_search_index),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:12
+
+from decimal import Decimal
+
+from django.db import migrations, transaction
+from django.db.models import Avg, Case, Count, Exists, F, Max, OuterRef, Q, Sum, Value, When
+from django.utils import timezone
+
+BATCH_SIZE = 2000
+# Frozen copy of main.summaries.GRADE_POINTS as of this migration
+GRADE_POINTS = {'A+': 10, 'A': 9, 'B+': 8, 'B': 7, 'C+': 6, 'C': 5, 'F': 0}
+FAIL_GRADE = 'F'
+
+
+def summarize(apps, student_ids):
+    """The same figures as main.summaries.refresh_summaries, from the historical models"""
+    StudentSubject = apps.get_model('main', 'StudentSubject')
+    Result = apps.get_model('main', 'Result')
+    Attendance = apps.get_model('main', 'Attendance')
+    AcademicSummary = apps.get_model('main', 'AcademicSummary')
+
+    points = Case(*[When(grade=grade, then=Value(value)) for grade, value in GRADE_POINTS.items()], default=Value(0))
+    results = Result.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        weighted_points=Sum(points * F('subject__credits')),
+        credits=Sum('subject__credits'),
+        results_count=Count('id'),
+        failed_count=Count('id', filter=Q(grade=FAIL_GRADE)),
+        last_exam_date=Max('exam_date'),
+    )
+    passed = Result.objects.filter(
+        student_id=OuterRef('student_id'), subject_id=OuterRef('subject_id'),
+    ).exclude(grade=FAIL_GRADE)
+    credits = StudentSubject.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        enrolled=Sum('subject__credits'),
+        earned=Sum('subject__credits', filter=Q(Exists(passed))),
+    )
+    attendance = Attendance.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        average=Avg('attendance_percentage'),
+    )
+
+    summaries = {student_id: AcademicSummary(student_id=student_id, updated_at=timezone.now()) for student_id in student_ids}
+    for row in results:
+        summary = summaries[row['student_id']]
+        summary.results_count = row['results_count']
+        summary.failed_count = row['failed_count']
+        summary.passed_count = row['results_count'] - row['failed_count']
+        summary.last_exam_date = row['last_exam_date']
+        if row['credits']:
+            summary.gpa = (Decimal(row['weighted_points']) / row['credits']).quantize(Decimal('0.01'))
+    for row in credits:
+        summary = summaries[row['student_id']]
+        summary.credits_enrolled = row['enrolled'] or 0
+        summary.credits_earned = row['earned'] or 0
+    for row in attendance:
+        if row['average'] is not None:
+            summaries[row['student_id']].average_attendance = Decimal(row['average']).quantize(Decimal('0.01'))
+    # Summaries written meanwhile by the running site are already current
+    AcademicSummary.objects.bulk_create(summaries.values(), ignore_conflicts=True)
+
+
+def backfill_summaries(apps, schema_editor):
+    """Create the AcademicSummary rows missing for students added before 0004"""
+    StudentProfile = apps.get_model('main', 'StudentProfile')
+    missing = list(
+        StudentProfile.objects.filter(summary__isnull=True).order_by('id').values_list('id', flat=True)
+    )
+    for start in range(0, len(missing), BATCH_SIZE):
+        with transaction.atomic():
+            summarize(apps, missing[start:start + BATCH_SIZE])
+
+
+class Migration(migrations.Migration):
+    # Lets every backfill batch commit on its own
+    atomic = False
+
+    dependencies = [
+        ('main', '0008_student_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
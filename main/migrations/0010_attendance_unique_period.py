@@ -0,0 +1,74 @@
+# Generated by Django 5.2.5 on 2026-10-18 11:40
+
+from django.db import migrations, transaction
+from django.db.models import Avg, Count, Max, OuterRef, Subquery
+from django.db.models.functions import Round
+
+from main.periods import month_name
+
+BATCH_SIZE = 50000
+
+
+def normalize_months(apps, schema_editor):
+    """
+    Store every recognisable month by its canonical name, one id range at a
+    time, each range in its own transaction.
+    """
+    Attendance = apps.get_model('main', 'Attendance')
+    last_id = Attendance.objects.aggregate(last=Max('id'))['last'] or 0
+    for start in range(0, last_id, BATCH_SIZE):
+        batch = Attendance.objects.filter(id__gt=start, id__lte=start + BATCH_SIZE)
+        with transaction.atomic():
+            for month in batch.values_list('month', flat=True).distinct().order_by():
+                name = month_name(month)
+                if name is not None and name != month:
+                    batch.filter(month=month).update(month=name)
+
+
+def remove_duplicate_periods(apps, schema_editor):
+    """
+    Keep only the latest record of each (student, subject, period), as
+    "Jul" and "July" of the same year were allowed side by side until now,
+    then recompute the average attendance of the students affected.
+    """
+    Attendance = apps.get_model('main', 'Attendance')
+    AcademicSummary = apps.get_model('main', 'AcademicSummary')
+    duplicates = (
+        Attendance.objects.filter(period__isnull=False)
+        .values('student_id', 'subject_id', 'period')
+        .annotate(records=Count('id'), latest=Max('id'))
+        .filter(records__gt=1)
+        .order_by()
+    )
+    students = set()
+    with transaction.atomic():
+        for row in duplicates.iterator():
+            Attendance.objects.filter(
+                student_id=row['student_id'], subject_id=row['subject_id'], period=row['period'],
+            ).exclude(id=row['latest']).delete()
+            students.add(row['student_id'])
+        average = (
+            Attendance.objects.filter(student_id=OuterRef('student_id'))
+            .values('student_id').annotate(average=Round(Avg('attendance_percentage'), 2)).values('average')
+        )
+        AcademicSummary.objects.filter(student_id__in=students).update(average_attendance=Subquery(average))
+
+
+class Migration(migrations.Migration):
+    # Lets every normalization batch commit on its own
+    atomic = False
+
+    dependencies = [
+        ('main', '0009_backfill_academic_summaries'),
+    ]
+
+    operations = [
+        # Duplicates go first, or renaming "Jul" to "July" could clash with
+        # the old (student, subject, month, year) constraint
+        migrations.RunPython(remove_duplicate_periods, migrations.RunPython.noop),
+        migrations.RunPython(normalize_months, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='attendance',
+            unique_together={('student', 'subject', 'period')},
+        ),
+    ]
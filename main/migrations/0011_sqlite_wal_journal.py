@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-18 12:05
+
+from django.db import migrations
+
+
+def enable_wal(apps, schema_editor):
+    """
+    Put a SQLite database in WAL mode, which lets readers run alongside the
+    writer. The mode is stored in the database file, so this is done once
+    here rather than by every connection; other databases are left alone.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+
+def disable_wal(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite' and not connection.is_in_memory_db():
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=DELETE')
+
+
+class Migration(migrations.Migration):
+    # The journal mode cannot be changed inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('main', '0010_attendance_unique_period'),
+    ]
+
+    operations = [
+        migrations.RunPython(enable_wal, disable_wal),
+    ]
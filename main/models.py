@@ -1,6 +1,17 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.db.models.functions import Round
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from .periods import month_name, period_key
+
+class StudentProfileManager(models.Manager):
+    """Hides soft-deleted students; see StudentProfile.all_objects"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
 
 class StudentProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -13,6 +24,21 @@ class StudentProfile(models.Model):
     profile_completed = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Set when the student is deleted; the rows are purged later by main.deletion
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    objects = StudentProfileManager()
+    # Includes soft-deleted students
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            # Serve the filtered, roll_number-ordered keyset pages of the student list
+            models.Index(fields=['course', 'semester', 'roll_number'], name='student_course_sem_roll_idx'),
+            models.Index(fields=['profile_completed', 'roll_number'], name='student_status_roll_idx'),
+            # Only the few students awaiting purge are indexed
+            models.Index(fields=['deleted_at'], condition=models.Q(deleted_at__isnull=False), name='student_deleted_idx'),
+        ]
 
     def __str__(self):
         return f"{self.roll_number} - {self.user.get_full_name()}"
@@ -46,6 +72,17 @@ class Result(models.Model):
         ('C', 'C (40-49)'),
         ('F', 'F (Below 40)'),
     ]
+    # Minimum percentage for each grade, highest first; anything below the
+    # last band is an F. Run the regrade_results command after changing these.
+    GRADE_BANDS = [
+        (90, 'A+'),
+        (80, 'A'),
+        (70, 'B+'),
+        (60, 'B'),
+        (50, 'C+'),
+        (40, 'C'),
+    ]
+    FAIL_GRADE = 'F'
     
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='results')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
@@ -57,6 +94,34 @@ class Result(models.Model):
 
     class Meta:
         unique_together = ('student', 'subject', 'exam_type')
+        indexes = [
+            # Per-student result lists, newest exam first, and exam date ranges
+            models.Index(fields=['student', 'exam_date'], name='result_student_date_idx'),
+        ]
+
+    @classmethod
+    def grade_for(cls, marks_obtained, total_marks):
+        # Compared as integers (marks * 100 >= band * total) to match grade_expression exactly
+        for minimum, grade in cls.GRADE_BANDS:
+            if marks_obtained * 100 >= minimum * total_marks:
+                return grade
+        return cls.FAIL_GRADE
+
+    @classmethod
+    def grade_expression(cls):
+        """SQL equivalent of grade_for, for set-based regrading"""
+        return models.Case(
+            *[
+                models.When(GreaterThanOrEqual(models.F('marks_obtained') * 100, models.F('total_marks') * minimum), then=models.Value(grade))
+                for minimum, grade in cls.GRADE_BANDS
+            ],
+            default=models.Value(cls.FAIL_GRADE),
+            output_field=models.CharField(),
+        )
+
+    def save(self, *args, **kwargs):
+        self.grade = self.grade_for(self.marks_obtained, self.total_marks)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.student.roll_number} - {self.subject.code} - {self.grade}"
@@ -66,17 +131,106 @@ class Attendance(models.Model):
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     total_classes = models.IntegerField(validators=[MinValueValidator(1)])
     classes_attended = models.IntegerField(validators=[MinValueValidator(0)])
-    attendance_percentage = models.DecimalField(max_digits=5, decimal_places=2)
+    # Computed by the database so bulk_create/bulk_update/upserts keep it in sync
+    attendance_percentage = models.GeneratedField(
+        expression=Round(models.F('classes_attended') * 100.0 / models.F('total_classes'), 2),
+        output_field=models.DecimalField(max_digits=5, decimal_places=2),
+        db_persist=True,
+    )
     month = models.CharField(max_length=20)
     year = models.IntegerField()
+    # year * 100 + month number (see main.periods), so month ranges can be
+    # filtered and sorted on an index; null only for unrecognisable months
+    period = models.PositiveIntegerField(blank=True, null=True, editable=False)
 
     class Meta:
-        unique_together = ('student', 'subject', 'month', 'year')
+        # On period rather than month/year, so "Jul" and "July" are one record
+        unique_together = ('student', 'subject', 'period')
+        indexes = [
+            models.Index(fields=['student', 'period'], name='attendance_student_period_idx'),
+            models.Index(fields=['subject', 'period'], name='attendance_subject_period_idx'),
+        ]
 
     def save(self, *args, **kwargs):
-        if self.classes_attended and self.total_classes:
-            self.attendance_percentage = (self.classes_attended / self.total_classes) * 100
+        self.month = month_name(self.month) or self.month
+        self.period = period_key(self.month, self.year)
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.student.roll_number} - {self.subject.code} - {self.attendance_percentage}%"
\ No newline at end of file
+        return f"{self.student.roll_number} - {self.subject.code} - {self.attendance_percentage}%"
+
+class AcademicSummary(models.Model):
+    """Denormalized per-student totals, kept current by main.summaries"""
+    student = models.OneToOneField(StudentProfile, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    gpa = models.DecimalField(max_digits=4, decimal_places=2, blank=True, null=True)
+    credits_enrolled = models.IntegerField(default=0)
+    credits_earned = models.IntegerField(default=0)
+    results_count = models.IntegerField(default=0)
+    passed_count = models.IntegerField(default=0)
+    failed_count = models.IntegerField(default=0)
+    average_attendance = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+    last_exam_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'academic summaries'
+
+    def __str__(self):
+        return f"{self.student_id} - GPA {self.gpa}"
+
+class Job(models.Model):
+    """A unit of background work, stored here and run by the run_jobs worker"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    task = models.CharField(max_length=100)
+    description = models.CharField(max_length=200, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    progress = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(blank=True, null=True)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True)
+    # Worker holding the job; locked_at is refreshed while it runs
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Workers poll for the oldest due job in a status
+            models.Index(fields=['status', 'run_after'], name='job_status_run_after_idx'),
+        ]
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    @property
+    def percent(self):
+        if self.status == self.SUCCEEDED:
+            return 100
+        if not self.progress_total:
+            return None
+        return min(100, round(self.progress * 100 / self.progress_total))
+
+    def __str__(self):
+        return f"#{self.id} {self.task} ({self.status})"
@@ -0,0 +1,140 @@
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Lower
+
+from .bulk import BulkReport, chunked, clean_fields, read_csv_rows
+from .models import StudentProfile
+from .search import index_students
+from .stats import invalidate_dashboard_stats
+from .workers import process_pool
+
+STUDENT_COLUMNS = ['roll_number', 'username', 'email', 'password', 'first_name', 'last_name', 'phone', 'course', 'semester', 'date_of_birth']
+STUDENT_REQUIRED_COLUMNS = ['roll_number', 'username', 'email', 'password']
+USER_FIELDS = ['username', 'email', 'first_name', 'last_name']
+PROFILE_FIELDS = ['roll_number', 'phone', 'course', 'semester', 'date_of_birth']
+
+# Hashing is the slow part, so chunks are smaller than for record imports
+ONBOARDING_CHUNK_SIZE = 500
+# Below this many passwords a chunk is hashed in-process; starting the pool costs more
+MIN_POOL_PASSWORDS = 32
+
+
+class TakenKeys:
+    """
+    Roll numbers, usernames and emails already in use, loaded once with three
+    queries so every row is checked with set lookups. Emails compare
+    case-insensitively. Rows accepted from the file are added as they pass.
+    """
+
+    def __init__(self):
+        # Soft-deleted students keep their roll number until purged
+        self.roll_numbers = set(StudentProfile.all_objects.values_list('roll_number', flat=True))
+        self.usernames = set(User.objects.values_list('username', flat=True))
+        self.emails = set(User.objects.exclude(email='').values_list(Lower('email'), flat=True))
+
+    def check(self, values):
+        errors = []
+        if values['roll_number'] in self.roll_numbers:
+            errors.append(f"roll_number '{values['roll_number']}' is already taken")
+        if values['username'] in self.usernames:
+            errors.append(f"username '{values['username']}' is already taken")
+        if values['email'].lower() in self.emails:
+            errors.append(f"email '{values['email']}' is already taken")
+        if errors:
+            raise ValidationError(errors)
+
+    def add(self, values):
+        self.roll_numbers.add(values['roll_number'])
+        self.usernames.add(values['username'])
+        self.emails.add(values['email'].lower())
+
+
+def clean_student(row, taken):
+    """Validated ``(user fields, profile fields, password)`` for a CSV row"""
+    user_values = clean_fields(User, row, USER_FIELDS)
+    profile_values = clean_fields(StudentProfile, row, PROFILE_FIELDS)
+    if not user_values['email']:
+        raise ValidationError('email: This field cannot be blank.')
+    taken.check({**user_values, **profile_values})
+    # Read unstripped: spaces are as much a part of a password as any character
+    password = row.get('password', '')
+    validate_password(password, user=User(**user_values))
+    return user_values, profile_values, password
+
+
+def hash_passwords(passwords, pool=None, workers=1):
+    if pool is None or len(passwords) < MIN_POOL_PASSWORDS:
+        return [make_password(password) for password in passwords]
+    return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (4 * workers))))
+
+
+def insert_students(students):
+    """
+    Insert ``(user fields, profile fields, password hash)`` tuples as Users
+    and StudentProfiles with one bulk_create each, in one transaction.
+    Returns the new profile ids.
+    """
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(password=password_hash, **user_values) for user_values, _, password_hash in students
+        ])
+        profiles = StudentProfile.objects.bulk_create([
+            StudentProfile(user_id=user.id, **profile_values) for user, (_, profile_values, _) in zip(users, students)
+        ])
+    return [profile.id for profile in profiles]
+
+
+def import_students(lines, chunk_size=ONBOARDING_CHUNK_SIZE, workers=1, progress=None):
+    """
+    Create student accounts from CSV text, one transaction per chunk.
+
+    Every row is validated, and checked against existing and earlier rows'
+    roll numbers, usernames and emails, before anything is hashed. Initial
+    passwords are hashed in this process, or across a pool of ``workers``
+    spawned processes when more than one is asked for. A chunk that still
+    hits a unique constraint, because a student registered meanwhile, is
+    rolled back and reported as a whole. ``progress`` is called with the
+    report after each chunk.
+    """
+    report = BulkReport()
+    taken = TakenKeys()
+    pool = None
+    try:
+        for chunk in chunked(read_csv_rows(lines, STUDENT_REQUIRED_COLUMNS, unstripped=['password']), chunk_size):
+            report.processed += len(chunk)
+            valid = []
+            for line, row in chunk:
+                try:
+                    user_values, profile_values, password = clean_student(row, taken)
+                except ValidationError as e:
+                    report.add_error(line, '; '.join(e.messages))
+                    continue
+                taken.add({**user_values, **profile_values})
+                valid.append((line, user_values, profile_values, password))
+
+            if valid:
+                if pool is None and workers > 1 and len(valid) >= MIN_POOL_PASSWORDS:
+                    pool = process_pool(workers)
+                hashes = hash_passwords([password for *_, password in valid], pool, workers)
+                try:
+                    student_ids = insert_students([
+                        (user_values, profile_values, password_hash)
+                        for (_, user_values, profile_values, _), password_hash in zip(valid, hashes)
+                    ])
+                except IntegrityError as e:
+                    report.add_error(valid[0][0], f'{len(valid)} students from this line on were not created: {e}')
+                else:
+                    report.written += len(student_ids)
+                    # bulk_create sends no signals
+                    index_students(student_ids)
+            if progress:
+                progress(report)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    if report.written:
+        invalidate_dashboard_stats()
+    return report.finish()
@@ -0,0 +1,75 @@
+from django.db.models import Q
+from django.utils.encoding import force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset plus the cursors around it"""
+
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def encode_cursor(obj, key):
+    """Encode ``(key value, id)`` of a row into an opaque URL-safe token"""
+    return urlsafe_base64_encode(f'{getattr(obj, key)}\x00{obj.id}'.encode())
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor; returns None for missing or malformed tokens"""
+    if not token:
+        return None
+    try:
+        value, pk = force_str(urlsafe_base64_decode(token)).split('\x00')
+        return value, int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def keyset_paginate(queryset, key, page_size, after=None, before=None):
+    """
+    Return the page of ``queryset`` ordered by ``(key, id)`` that starts after
+    or ends before the given cursor.
+
+    Unlike OFFSET pagination, every page is a range scan on the ``key`` index,
+    so the cost of a page does not grow with how deep into the list it is.
+    """
+    after, before = decode_cursor(after), decode_cursor(before)
+    if before:
+        value, pk = before
+        queryset = queryset.filter(Q(**{f'{key}__lt': value}) | Q(**{key: value, 'id__lt': pk}))
+        rows = list(queryset.order_by(f'-{key}', '-id')[:page_size + 1])
+        has_more = len(rows) > page_size
+        items = rows[:page_size][::-1]
+        has_previous, has_next = has_more, True
+    else:
+        if after:
+            value, pk = after
+            queryset = queryset.filter(Q(**{f'{key}__gt': value}) | Q(**{key: value, 'id__gt': pk}))
+        rows = list(queryset.order_by(key, 'id')[:page_size + 1])
+        items = rows[:page_size]
+        has_previous, has_next = after is not None, len(rows) > page_size
+
+    if not items:
+        return KeysetPage(items)
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(items[-1], key) if has_next else None,
+        previous_cursor=encode_cursor(items[0], key) if has_previous else None,
+    )
@@ -0,0 +1,42 @@
+MONTH_NAMES = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December',
+]
+_MONTH_NUMBERS = {
+    **{name.lower(): number for number, name in enumerate(MONTH_NAMES, start=1)},
+    **{name[:3].lower(): number for number, name in enumerate(MONTH_NAMES, start=1)},
+    **{str(number): number for number in range(1, 13)},
+    **{f'{number:02d}': number for number in range(1, 10)},
+}
+
+
+def month_number(month):
+    """1-12 for a month name, three-letter abbreviation or number; None if unrecognised"""
+    return _MONTH_NUMBERS.get(str(month).strip().lower())
+
+
+def month_name(month):
+    """The canonical name (e.g. July) of a month in any accepted form; None if unrecognised"""
+    number = month_number(month)
+    return MONTH_NAMES[number - 1] if number else None
+
+
+def period_key(month, year):
+    """
+    Sortable integer for a month of a year, e.g. July 2025 -> 202507.
+
+    Attendance.month is stored by name, so this is what range filters and
+    ordering use. Returns None when the month cannot be recognised.
+    """
+    number = month_number(month)
+    if number is None or year is None:
+        return None
+    return int(year) * 100 + number
+
+
+def parse_period(value):
+    """Period key for a ``YYYY-MM`` string, as sent by a month input"""
+    year, _, month = str(value).partition('-')
+    if not (year.isdigit() and month.isdigit()):
+        return None
+    return period_key(month, year)
@@ -0,0 +1,80 @@
+import time
+
+from django.conf import settings
+
+from .models import StudentProfile
+
+ROLE_STUDENT = 'student'
+ROLE_STAFF = 'staff'
+
+ROLE_SESSION_KEY = 'role'
+ROLE_CHECKED_SESSION_KEY = 'role_checked_at'
+
+
+def resolve_role(user):
+    """Look the user's role up in the database; students take precedence over staff"""
+    if hasattr(user, 'studentprofile'):
+        return ROLE_STUDENT
+    if user.is_staff or user.is_superuser:
+        return ROLE_STAFF
+    return None
+
+
+def remember_role(request, role):
+    request.session[ROLE_SESSION_KEY] = role
+    request.session[ROLE_CHECKED_SESSION_KEY] = int(time.time())
+    request.role = role
+
+
+def is_fresh(role, checked_at, user):
+    if role is None:
+        return False
+    if time.time() - checked_at > settings.ROLE_RECHECK_SECONDS:
+        return False
+    # Staff status is on the already-loaded user, so it is re-checked for free
+    return role != ROLE_STAFF or user.is_staff or user.is_superuser
+
+
+def get_role(request):
+    """
+    Role of the authenticated user, resolved at most once per request.
+
+    The role saved in the session at login is trusted until it is older than
+    ROLE_RECHECK_SECONDS; only then, or when it is missing, is the database
+    consulted.
+    """
+    if hasattr(request, 'role'):
+        return request.role
+    if not request.user.is_authenticated:
+        return None
+
+    role = request.session.get(ROLE_SESSION_KEY)
+    if not is_fresh(role, request.session.get(ROLE_CHECKED_SESSION_KEY, 0), request.user):
+        role = resolve_role(request.user)
+        remember_role(request, role)
+    request.role = role
+    return role
+
+
+async def aresolve_role(user):
+    if await StudentProfile.objects.filter(user=user).aexists():
+        return ROLE_STUDENT
+    if user.is_staff or user.is_superuser:
+        return ROLE_STAFF
+    return None
+
+
+async def aget_role(request):
+    """Async twin of get_role, for ASGI middleware and views"""
+    if hasattr(request, 'role'):
+        return request.role
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+
+    role = await request.session.aget(ROLE_SESSION_KEY)
+    if not is_fresh(role, await request.session.aget(ROLE_CHECKED_SESSION_KEY, 0), user):
+        role = await aresolve_role(user)
+        remember_role(request, role)
+    request.role = role
+    return role
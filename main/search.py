@@ -0,0 +1,187 @@
+import re
+
+from django.db import connections, router, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import StudentProfile
+
+SEARCH_TABLE = 'main_student_search'
+MAX_TERMS = 8
+# Typeahead ranks at most this many matches, so a term shared by most
+# students (a course, an email domain) costs no more than a rare one
+RANK_CANDIDATES = 200
+INDEX_BATCH_SIZE = 2000
+
+# Columns of the index, in the order they are weighted for ranking
+DOCUMENT_FIELDS = ['roll_number', 'name', 'email', 'course', 'phone']
+SOURCE_FIELDS = ['id', 'roll_number', 'course', 'phone', 'user__username', 'user__first_name', 'user__last_name', 'user__email']
+SEARCH_SOURCE_USER_FIELDS = {'username', 'first_name', 'last_name', 'email'}
+
+SQLITE_SCHEMA = [
+    # rowid is the StudentProfile id. The prefix indexes make 2-4 character
+    # typeahead prefixes index lookups instead of term scans.
+    f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+    f"{', '.join(DOCUMENT_FIELDS)}, tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+]
+POSTGRES_SCHEMA = [
+    f"CREATE TABLE {SEARCH_TABLE} ("
+    f"student_id bigint PRIMARY KEY REFERENCES main_studentprofile (id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+    f"document tsvector NOT NULL)",
+    f"CREATE INDEX {SEARCH_TABLE}_document_idx ON {SEARCH_TABLE} USING gin (document)",
+]
+
+
+def terms(text):
+    """Lower-cased word tokens, split the same way for documents and queries"""
+    return re.findall(r'\w+', (text or '').lower())
+
+
+def document(row):
+    """Index columns for a ``values(*SOURCE_FIELDS)`` row"""
+    name = ' '.join(filter(None, [row['user__first_name'], row['user__last_name'], row['user__username']]))
+    return {
+        'roll_number': row['roll_number'],
+        'name': name,
+        'email': row['user__email'],
+        'course': row['course'],
+        'phone': row['phone'],
+    }
+
+
+def create_index(connection):
+    for statement in {'sqlite': SQLITE_SCHEMA, 'postgresql': POSTGRES_SCHEMA}.get(connection.vendor, []):
+        with connection.cursor() as cursor:
+            cursor.execute(statement)
+
+
+def drop_index(connection):
+    if connection.vendor in ('sqlite', 'postgresql'):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+def write_documents(connection, rows):
+    """Replace the index entries for ``(student id, document)`` pairs"""
+    rows = list(rows)
+    if not rows or connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            placeholders = ', '.join(['%s'] * len(rows))
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', [pk for pk, _ in rows])
+            cursor.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(DOCUMENT_FIELDS)}) "
+                f"VALUES (%s, {', '.join(['%s'] * len(DOCUMENT_FIELDS))})",
+                [[pk] + [doc[field] for field in DOCUMENT_FIELDS] for pk, doc in rows],
+            )
+        else:
+            # Text is pre-split with terms() so both backends tokenize alike
+            weights = dict(zip(DOCUMENT_FIELDS, 'ABCCC'))
+            vector = ' || '.join(f"setweight(to_tsvector('simple', %s), '{weights[field]}')" for field in DOCUMENT_FIELDS)
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (student_id, document) VALUES (%s, {vector}) '
+                f'ON CONFLICT (student_id) DO UPDATE SET document = EXCLUDED.document',
+                [[pk] + [' '.join(terms(doc[field])) for field in DOCUMENT_FIELDS] for pk, doc in rows],
+            )
+
+
+def delete_documents(connection, student_ids):
+    student_ids = list(student_ids)
+    if not student_ids or connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    column = 'rowid' if connection.vendor == 'sqlite' else 'student_id'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SEARCH_TABLE} WHERE {column} IN ({', '.join(['%s'] * len(student_ids))})", student_ids,
+        )
+
+
+def index_rows(connection, rows):
+    write_documents(connection, ((row['id'], document(row)) for row in rows))
+
+
+def reindex(**filters):
+    """Re-index the students matching ``filters``, in batches"""
+    connection = connections[router.db_for_write(StudentProfile)]
+    rows = StudentProfile.objects.filter(**filters).order_by('id').values(*SOURCE_FIELDS)
+    batch = []
+    for row in rows.iterator(chunk_size=INDEX_BATCH_SIZE):
+        batch.append(row)
+        if len(batch) == INDEX_BATCH_SIZE:
+            index_rows(connection, batch)
+            batch = []
+    index_rows(connection, batch)
+
+
+def index_students(student_ids):
+    reindex(id__in=list(student_ids))
+
+
+def unindex_students(student_ids):
+    delete_documents(connections[router.db_for_write(StudentProfile)], student_ids)
+
+
+def schedule_reindex(**filters):
+    """Re-index after the surrounding transaction commits"""
+    transaction.on_commit(lambda: reindex(**filters))
+
+
+def match_expression(connection, query, ranked=False):
+    """``(SQL selecting matching ids, params)``, or None if unsupported or empty"""
+    words = terms(query)[:MAX_TERMS]
+    if not words or connection.vendor not in ('sqlite', 'postgresql'):
+        return None
+    if connection.vendor == 'sqlite':
+        # Every term must match, each as a prefix of a word
+        weights = ', '.join(['10.0', '5.0', '2.0', '1.0', '1.0'])
+        expression = ' '.join(f'"{word}"*' for word in words)
+        if ranked:
+            return (
+                f'SELECT id FROM (SELECT rowid AS id, bm25({SEARCH_TABLE}, {weights}) AS score '
+                f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s LIMIT {RANK_CANDIDATES}) ORDER BY score',
+                [expression],
+            )
+        return f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [expression]
+    expression = ' & '.join(f'{word}:*' for word in words)
+    if ranked:
+        return (
+            f"SELECT student_id FROM (SELECT student_id, ts_rank(document, to_tsquery('simple', %s)) AS score "
+            f"FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s) LIMIT {RANK_CANDIDATES}) AS candidates "
+            f"ORDER BY score DESC",
+            [expression, expression],
+        )
+    return f"SELECT student_id FROM {SEARCH_TABLE} WHERE document @@ to_tsquery('simple', %s)", [expression]
+
+
+def fallback_filter(query):
+    return (
+        Q(roll_number__icontains=query) | Q(user__first_name__icontains=query) | Q(user__last_name__icontains=query)
+        | Q(user__email__icontains=query) | Q(course__icontains=query) | Q(phone__icontains=query)
+    )
+
+
+def filter_students(queryset, query):
+    """Restrict a StudentProfile queryset to students matching ``query``"""
+    connection = connections[queryset.db]
+    match = match_expression(connection, query)
+    if match is None:
+        return queryset.filter(fallback_filter(query)) if terms(query) else queryset
+    sql, params = match
+    return queryset.filter(id__in=RawSQL(sql, params))
+
+
+def search_students(query, limit=10):
+    """Best-ranked matching students, with their users, for typeahead"""
+    alias = router.db_for_read(StudentProfile)
+    match = match_expression(connections[alias], query, ranked=True)
+    students = StudentProfile.objects.using(alias).select_related('user')
+    if match is None:
+        return list(students.filter(fallback_filter(query)).order_by('roll_number')[:limit]) if terms(query) else []
+
+    sql, params = match
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'{sql} LIMIT %s', params + [limit])
+        ids = [row[0] for row in cursor.fetchall()]
+    found = students.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
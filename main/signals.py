@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import StudentProfile, Subject, StudentSubject, Result, Attendance
+from .catalog import bump_subject_catalog
+from .analytics import COURSE_STATS_STUDENT_FIELDS
+from .fragments import bump_all_records_version, bump_subject_versions
+from .stats import invalidate_dashboard_stats
+from .search import SEARCH_SOURCE_USER_FIELDS, schedule_reindex, unindex_students
+from .summaries import schedule_refresh, schedule_subject_refresh
+
+
+@receiver([post_save, post_delete], sender=Result)
+@receiver([post_save, post_delete], sender=Attendance)
+@receiver([post_save, post_delete], sender=StudentSubject)
+def update_academic_summary(sender, instance, **kwargs):
+    schedule_refresh(instance.student_id)
+
+
+@receiver([post_save, post_delete], sender=Result)
+@receiver([post_save, post_delete], sender=Attendance)
+def invalidate_subject_analytics(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_subject_versions([instance.subject_id]))
+
+
+@receiver(post_save, sender=StudentProfile)
+def invalidate_course_analytics(sender, instance, created, update_fields=None, **kwargs):
+    # A new student has no results yet, and deleted ones take theirs along
+    if not created and (update_fields is None or COURSE_STATS_STUDENT_FIELDS.intersection(update_fields)):
+        transaction.on_commit(bump_all_records_version)
+
+
+@receiver(post_save, sender=Subject)
+def update_subject_summaries(sender, instance, created, **kwargs):
+    # Credits weight the GPA and credit totals. Deleting a subject cascades to
+    # its enrollments and results, whose own post_delete refreshes the students.
+    if not created:
+        schedule_subject_refresh(instance.id)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+@receiver([post_save, post_delete], sender=Subject)
+def clear_dashboard_stats(sender, **kwargs):
+    # After commit, or another worker could re-cache the old figures meanwhile
+    transaction.on_commit(invalidate_dashboard_stats)
+
+
+@receiver([post_save, post_delete], sender=Subject)
+def invalidate_subject_catalog(sender, **kwargs):
+    transaction.on_commit(bump_subject_catalog)
+
+
+@receiver(post_save, sender=StudentProfile)
+def index_student(sender, instance, **kwargs):
+    schedule_reindex(id=instance.id)
+
+
+@receiver(post_save, sender=User)
+def index_student_user(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only, which the index does not contain
+    if update_fields is None or SEARCH_SOURCE_USER_FIELDS.intersection(update_fields):
+        schedule_reindex(user_id=instance.id)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def unindex_student(sender, instance, **kwargs):
+    student_id = instance.id
+    transaction.on_commit(lambda: unindex_students([student_id]))
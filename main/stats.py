@@ -0,0 +1,62 @@
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Func, Q, Subquery
+
+from .db_routers import reading_from_replica
+from .models import StudentProfile, Subject
+
+DASHBOARD_STATS_KEY = 'main:admin_dashboard_stats'
+# Imports, jobs and other workers invalidate the figures, so every process
+# must see the same copy
+STATS_CACHE_ALIAS = 'shared'
+
+
+def compute_dashboard_stats():
+    """
+    Build every admin dashboard figure from one grouped conditional-aggregate
+    query over students, which carries the subject count as a subquery.
+
+    Totals, per-course and per-semester counts are all folded from the
+    (course, semester) groups in Python, so adding another breakdown does not
+    add a query.
+    """
+    subject_count = Subject.objects.annotate(count=Func('id', function='COUNT')).values('count')
+    groups = list(StudentProfile.objects.values('course', 'semester').annotate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(profile_completed=True)),
+        subjects=Subquery(subject_count),
+    ).order_by())
+
+    totals = Counter()
+    by_course = Counter()
+    by_semester = Counter()
+    for group in groups:
+        totals['total'] += group['total']
+        totals['completed'] += group['completed']
+        by_course[group['course'] or 'Not Set'] += group['total']
+        by_semester[group['semester']] += group['total']
+
+    return {
+        'total_students': totals['total'],
+        'pending_students': totals['total'] - totals['completed'],
+        'completed_students': totals['completed'],
+        # With no students there are no groups to carry the count
+        'total_subjects': groups[0]['subjects'] if groups else Subject.objects.count(),
+        'students_by_course': sorted(by_course.items()),
+        'students_by_semester': sorted(by_semester.items(), key=lambda item: (item[0] is None, item[0] or 0)),
+    }
+
+
+def dashboard_stats():
+    cache = caches[STATS_CACHE_ALIAS]
+    if reading_from_replica():
+        # A lagging replica could cache figures older than the last invalidation
+        stats = cache.get(DASHBOARD_STATS_KEY)
+        return compute_dashboard_stats() if stats is None else stats
+    return cache.get_or_set(DASHBOARD_STATS_KEY, compute_dashboard_stats, settings.DASHBOARD_STATS_CACHE_SECONDS)
+
+
+def invalidate_dashboard_stats():
+    caches[STATS_CACHE_ALIAS].delete(DASHBOARD_STATS_KEY)
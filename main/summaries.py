@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Avg, Case, Count, Exists, F, Max, OuterRef, Q, Sum, Value, When
+from django.utils import timezone
+
+from .fragments import bump_student_versions
+from .models import StudentProfile, StudentSubject, Result, Attendance, AcademicSummary
+
+# Grade points on a 10-point scale, weighted by Subject.credits for the GPA
+GRADE_POINTS = {
+    'A+': 10,
+    'A': 9,
+    'B+': 8,
+    'B': 7,
+    'C+': 6,
+    'C': 5,
+    'F': 0,
+}
+FAIL_GRADE = Result.FAIL_GRADE
+
+
+def grade_points():
+    return Case(
+        *[When(grade=grade, then=Value(points)) for grade, points in GRADE_POINTS.items()],
+        default=Value(0),
+    )
+
+
+def refresh_summaries(student_ids):
+    """
+    Recompute AcademicSummary rows for the given students.
+
+    Each call costs three grouped aggregate queries and one upsert however
+    many students are passed, and only touches the affected students' rows.
+    """
+    student_ids = set(StudentProfile.objects.filter(id__in=set(student_ids)).values_list('id', flat=True))
+    if not student_ids:
+        return
+
+    results = Result.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        weighted_points=Sum(grade_points() * F('subject__credits')),
+        credits=Sum('subject__credits'),
+        results_count=Count('id'),
+        failed_count=Count('id', filter=Q(grade=FAIL_GRADE)),
+        last_exam_date=Max('exam_date'),
+    )
+    passed = Result.objects.filter(
+        student_id=OuterRef('student_id'), subject_id=OuterRef('subject_id'),
+    ).exclude(grade=FAIL_GRADE)
+    credits = StudentSubject.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        enrolled=Sum('subject__credits'),
+        earned=Sum('subject__credits', filter=Q(Exists(passed))),
+    )
+    attendance = Attendance.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        average=Avg('attendance_percentage'),
+    )
+
+    summaries = {student_id: AcademicSummary(student_id=student_id, updated_at=timezone.now()) for student_id in student_ids}
+    for row in results:
+        summary = summaries[row['student_id']]
+        summary.results_count = row['results_count']
+        summary.failed_count = row['failed_count']
+        summary.passed_count = row['results_count'] - row['failed_count']
+        summary.last_exam_date = row['last_exam_date']
+        if row['credits']:
+            summary.gpa = (Decimal(row['weighted_points']) / row['credits']).quantize(Decimal('0.01'))
+    for row in credits:
+        summary = summaries[row['student_id']]
+        summary.credits_enrolled = row['enrolled'] or 0
+        summary.credits_earned = row['earned'] or 0
+    for row in attendance:
+        if row['average'] is not None:
+            summaries[row['student_id']].average_attendance = Decimal(row['average']).quantize(Decimal('0.01'))
+
+    AcademicSummary.objects.bulk_create(
+        summaries.values(),
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=[
+            'gpa', 'credits_enrolled', 'credits_earned', 'results_count', 'passed_count',
+            'failed_count', 'average_attendance', 'last_exam_date', 'updated_at',
+        ],
+    )
+    # Bumped after the summary is written so no stale summary gets re-cached
+    bump_student_versions(student_ids)
+
+
+def schedule_refresh(student_id):
+    """Refresh a student's summary once the current transaction commits"""
+    transaction.on_commit(lambda: refresh_summaries([student_id]))
+
+
+def subject_student_ids(subject_id):
+    """Ids of the students enrolled in or graded on a subject, in one query"""
+    return StudentProfile.objects.filter(
+        Exists(StudentSubject.objects.filter(student=OuterRef('pk'), subject_id=subject_id))
+        | Exists(Result.objects.filter(student=OuterRef('pk'), subject_id=subject_id))
+    ).values_list('id', flat=True)
+
+
+def schedule_subject_refresh(subject_id):
+    """Refresh, once the transaction commits, the summaries a subject's credits feed into"""
+    transaction.on_commit(lambda: refresh_summaries(subject_student_ids(subject_id)))
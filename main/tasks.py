@@ -0,0 +1,71 @@
+import io
+
+from django.conf import settings
+
+from .bulk import MAX_REPORTED_ERRORS, cohort_students, enroll_cohort, import_attendance, import_results
+from .deletion import purge_deleted_students
+from .jobs import TaskError, set_progress, task
+from .onboarding import import_students
+
+# Errors kept on a finished job for display; the full count is in the summary
+MAX_JOB_ERRORS = min(MAX_REPORTED_ERRORS, 200)
+
+
+def report_result(report):
+    return {
+        'summary': report.summary(),
+        'errors': [[line, message] for line, message in report.errors[:MAX_JOB_ERRORS]],
+    }
+
+
+def csv_progress(job, csv_text):
+    """Progress callback for an import, measured against the file's line count"""
+    total = max(1, csv_text.rstrip('\n').count('\n'))
+
+    def progress(report):
+        set_progress(job, min(report.processed, total), total, f'{report.processed} rows processed')
+    return progress
+
+
+@task('purge_students')
+def purge_students_task(job, student_ids=None):
+    def progress(done, total):
+        set_progress(job, done, total, f'{done} of {total} students purged')
+
+    students, rows = purge_deleted_students(student_ids, progress=progress)
+    return {'summary': f'Purged {students} students ({rows} rows)'}
+
+
+@task('import_results')
+def import_results_task(job, csv_text):
+    report = import_results(io.StringIO(csv_text, newline=''), progress=csv_progress(job, csv_text))
+    return report_result(report)
+
+
+@task('import_attendance')
+def import_attendance_task(job, csv_text, sheet=None):
+    report = import_attendance(io.StringIO(csv_text, newline=''), sheet=sheet, progress=csv_progress(job, csv_text))
+    return report_result(report)
+
+
+@task('enroll_cohort')
+def enroll_cohort_task(job, cohort, subject_ids):
+    def progress(report):
+        set_progress(job, report.processed, total, f'{report.written} enrollments created')
+
+    students = cohort_students(**cohort)
+    total = students.count() * len(set(subject_ids))
+    report = enroll_cohort(students, subject_ids, progress=progress)
+    return report_result(report)
+
+
+# The file holds initial passwords, so it is wiped from the job once claimed
+@task('import_students', sensitive=True)
+def import_students_task(job, csv_text=None):
+    if csv_text is None:
+        raise TaskError('The uploaded file is no longer stored; upload it again')
+    report = import_students(
+        io.StringIO(csv_text, newline=''), workers=settings.ONBOARDING_HASH_WORKERS,
+        progress=csv_progress(job, csv_text),
+    )
+    return report_result(report)
@@ -1,3 +1,1205 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import tempfile
+import threading
+import zipfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models.signals import post_delete
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import jobs, metrics
+from .analytics import course_stats, grade_indexes, subject_stats
+from .bulk import cohort_students, enroll_cohort, import_attendance, import_results
+from .catalog import bump_subject_catalog, catalog_subject, catalog_version, subject_catalog
+from .db_routers import PRIMARY, STICKY_COOKIE, PrimaryReplicaRouter, reading_from_replica, replica_reads
+from .deletion import PURGED_MODELS, purge_deleted_students, soft_delete_students
+from .exports import iter_export
+from .forms import AttendanceForm, CohortEnrollmentForm
+from .fragments import STUDENT_VERSION_KEY, VERSION_CACHE_ALIAS, bump_student_versions, student_version
+from .models import StudentProfile, Subject, StudentSubject, Result, Attendance, AcademicSummary, Job
+from .middleware import HybridMiddleware, SlidingSessionMiddleware
+from .onboarding import import_students
+from .pagination import keyset_paginate
+from .roles import ROLE_CHECKED_SESSION_KEY, ROLE_SESSION_KEY, ROLE_STAFF, ROLE_STUDENT, get_role
+from .search import filter_students, search_students
+from .stats import DASHBOARD_STATS_KEY, STATS_CACHE_ALIAS, dashboard_stats
+from .transcripts import generate_transcripts, text_to_pdf, transcript_name, zip_transcripts
+
+
+def clear_caches():
+    for cache in caches.all():
+        cache.clear()
+
+
+def make_student(roll_number, **fields):
+    user = User.objects.create_user(roll_number.lower(), email=f'{roll_number.lower()}@example.com', password='pw')
+    return StudentProfile.objects.create(user=user, roll_number=roll_number, **fields)
+
+
+def make_subject(code, credits=3):
+    return Subject.objects.create(code=code, name=f'Subject {code}', credits=credits)
+
+
+def csv_lines(*rows):
+    return io.StringIO('\n'.join(rows) + '\n', newline='')
+
+
+class ImportResultsTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.subject = make_subject('MATH')
+
+    def test_rows_are_upserted_on_student_subject_and_exam_type(self):
+        header = 'roll_number,subject_code,marks_obtained,total_marks,exam_date,exam_type'
+        import_results(csv_lines(header, 'CS001,MATH,55,100,2025-01-10,Final Exam'))
+        report = import_results(csv_lines(header, 'CS001,MATH,91,100,2025-01-11,Final Exam'))
+
+        self.assertEqual(report.written, 1)
+        result = Result.objects.get()
+        self.assertEqual((result.marks_obtained, result.grade, result.exam_date), (91, 'A+', date(2025, 1, 11)))
+
+    def test_later_row_for_the_same_key_wins(self):
+        report = import_results(csv_lines(
+            'roll_number,subject_code,marks_obtained,exam_date',
+            'CS001,MATH,40,2025-01-10',
+            'CS001,MATH,70,2025-01-10',
+        ))
+        self.assertEqual(report.processed, 2)
+        self.assertEqual(Result.objects.get().marks_obtained, 70)
+
+    def test_invalid_rows_are_reported_and_skipped(self):
+        report = import_results(csv_lines(
+            'roll_number,subject_code,marks_obtained,total_marks,exam_date',
+            'NOPE,MATH,50,100,2025-01-10',
+            'CS001,NOPE,50,100,2025-01-10',
+            'CS001,MATH,120,100,2025-01-10',
+            'CS001,MATH,abc,100,2025-01-10',
+            'CS001,MATH,50,100,2025-01-10',
+        ))
+        self.assertEqual((report.processed, report.written, report.error_count), (5, 1, 4))
+        self.assertEqual([line for line, _ in report.errors], [2, 3, 4, 5])
+        self.assertIn("Unknown roll number 'NOPE'", report.errors[0][1])
+
+    def test_missing_required_column_is_rejected(self):
+        with self.assertRaisesMessage(ValidationError, 'exam_date'):
+            import_results(csv_lines('roll_number,subject_code,marks_obtained', 'CS001,MATH,50'))
+
+    def test_rows_are_written_in_chunks(self):
+        for number in range(2, 6):
+            make_student(f'CS00{number}')
+        rows = [f'CS00{number},MATH,{50 + number},2025-01-10' for number in range(1, 6)]
+        seen = []
+        report = import_results(
+            csv_lines('roll_number,subject_code,marks_obtained,exam_date', *rows),
+            chunk_size=2, progress=lambda report: seen.append(report.processed),
+        )
+        self.assertEqual(seen, [2, 4, 5])
+        self.assertEqual(report.written, 5)
+        self.assertEqual(Result.objects.count(), 5)
+
+    def test_upload_view_imports_the_file(self):
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        upload = SimpleUploadedFile('results.csv', b'roll_number,subject_code,marks_obtained,exam_date\nCS001,MATH,65,2025-01-10\n')
+        response = self.client.post(reverse('import_results'), {'csv_file': upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '1 written')
+        self.assertEqual(Result.objects.get().grade, 'B')
+
+
+class StaticAssetTests(TestCase):
+    def test_pages_render_with_debug_off(self):
+        response = self.client.get(reverse('student_login'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '/static/vendor/bootstrap-5.1.3/css/bootstrap.min.css')
+        self.assertContains(response, '/static/vendor/fontawesome-6.0.0/css/all.min.css')
+        self.assertNotContains(response, 'cdn.jsdelivr.net')
+        self.assertNotContains(response, 'cdnjs.cloudflare.com')
+
+    def test_authenticated_pages_are_not_cached(self):
+        staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-store', response['Cache-Control'])
+
+
+class ImportAttendanceTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.subject = make_subject('MATH')
+
+    def test_percentage_is_computed_by_the_database(self):
+        report = import_attendance(csv_lines(
+            'roll_number,subject_code,total_classes,classes_attended,month,year',
+            'CS001,MATH,30,20,July,2025',
+        ))
+        self.assertEqual(report.written, 1)
+        attendance = Attendance.objects.get()
+        self.assertEqual(attendance.attendance_percentage, Decimal('66.67'))
+        self.assertEqual(attendance.period, 202507)
+
+    def test_sheet_values_fill_missing_columns_and_rows_are_upserted(self):
+        sheet = {'subject_code': 'MATH', 'month': 'July', 'year': 2025}
+        import_attendance(csv_lines('roll_number,total_classes,classes_attended', 'CS001,30,20'), sheet=sheet)
+        import_attendance(csv_lines('roll_number,total_classes,classes_attended', 'CS001,30,27'), sheet=sheet)
+        attendance = Attendance.objects.get()
+        self.assertEqual((attendance.classes_attended, attendance.attendance_percentage), (27, Decimal('90.00')))
+
+    def test_invalid_rows_are_reported(self):
+        report = import_attendance(csv_lines(
+            'roll_number,subject_code,total_classes,classes_attended,month,year',
+            'CS001,MATH,30,31,July,2025',
+            'CS001,MATH,30,20,Julember,2025',
+            'CS001,MATH,0,0,July,2025',
+        ))
+        self.assertEqual((report.written, report.error_count), (0, 3))
+        self.assertIn('classes_attended cannot exceed total_classes', report.errors[0][1])
+        self.assertIn("Unrecognised month 'Julember'", report.errors[1][1])
+        self.assertFalse(Attendance.objects.exists())
+
+
+    def test_months_are_stored_by_name_and_keyed_on_period(self):
+        for month, attended in [('Jul', 20), ('7', 25), ('JULY', 27)]:
+            import_attendance(csv_lines(
+                'roll_number,subject_code,total_classes,classes_attended,month,year',
+                f'CS001,MATH,30,{attended},{month},2025',
+            ))
+        attendance = Attendance.objects.get()
+        self.assertEqual((attendance.month, attendance.period, attendance.classes_attended), ('July', 202507, 27))
+
+
+class AttendancePeriodTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.subject = make_subject('MATH')
+
+    def test_form_and_save_normalize_the_month(self):
+        form = AttendanceForm(data={'subject': self.subject.id, 'total_classes': 10, 'classes_attended': 5, 'month': '03', 'year': 2025})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['month'], 'March')
+
+        attendance = Attendance.objects.create(student=self.student, subject=self.subject, total_classes=10, classes_attended=5, month='apr', year=2025)
+        self.assertEqual((attendance.month, attendance.period), ('April', 202504))
+
+    def test_form_rejects_unknown_months(self):
+        form = AttendanceForm(data={'subject': self.subject.id, 'total_classes': 10, 'classes_attended': 5, 'month': 'Julember', 'year': 2025})
+        self.assertIn('month', form.errors)
+
+    def test_one_record_per_student_subject_and_period(self):
+        Attendance.objects.create(student=self.student, subject=self.subject, total_classes=10, classes_attended=5, month='July', year=2025)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Attendance.objects.create(student=self.student, subject=self.subject, total_classes=10, classes_attended=6, month='Jul', year=2025)
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        for number in range(1, 8):
+            make_student(f'R{number:02d}', course='CS' if number % 2 else 'EE')
+        self.students = StudentProfile.objects.all()
+
+    def rolls(self, page):
+        return [student.roll_number for student in page]
+
+    def test_pages_forward_and_back(self):
+        first = keyset_paginate(self.students, 'roll_number', 3)
+        self.assertEqual(self.rolls(first), ['R01', 'R02', 'R03'])
+        self.assertFalse(first.has_previous)
+
+        second = keyset_paginate(self.students, 'roll_number', 3, after=first.next_cursor)
+        self.assertEqual(self.rolls(second), ['R04', 'R05', 'R06'])
+        third = keyset_paginate(self.students, 'roll_number', 3, after=second.next_cursor)
+        self.assertEqual(self.rolls(third), ['R07'])
+        self.assertFalse(third.has_next)
+
+        back = keyset_paginate(self.students, 'roll_number', 3, before=third.previous_cursor)
+        self.assertEqual(self.rolls(back), ['R04', 'R05', 'R06'])
+        self.assertTrue(back.has_previous and back.has_next)
+
+    def test_malformed_cursor_starts_from_the_beginning(self):
+        page = keyset_paginate(self.students, 'roll_number', 3, after='not-a-cursor')
+        self.assertEqual(self.rolls(page), ['R01', 'R02', 'R03'])
+
+    def test_list_view_filters_and_links_to_the_next_page(self):
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        response = self.client.get(reverse('student_list'), {'course': 'CS'})
+        self.assertEqual(self.rolls(response.context['page']), ['R01', 'R03', 'R05', 'R07'])
+        self.assertFalse(response.context['page'].has_next)
+        self.assertEqual(response.context['filter_query'], 'course=CS')
+
+
+class AcademicSummaryTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.math = make_subject('MATH', credits=4)
+        self.physics = make_subject('PHY', credits=2)
+
+    def add_result(self, subject, marks):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Result.objects.create(student=self.student, subject=subject, marks_obtained=marks, exam_date=date(2025, 1, 10))
+
+    def test_summary_follows_results_enrollments_and_attendance(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentSubject.objects.create(student=self.student, subject=self.math)
+            StudentSubject.objects.create(student=self.student, subject=self.physics)
+            Attendance.objects.create(student=self.student, subject=self.math, total_classes=10, classes_attended=8, month='July', year=2025)
+        self.add_result(self.math, 95)
+        failed = self.add_result(self.physics, 20)
+
+        summary = AcademicSummary.objects.get(student=self.student)
+        # (10 points * 4 credits + 0 * 2) / 6 credits
+        self.assertEqual(summary.gpa, Decimal('6.67'))
+        self.assertEqual((summary.credits_enrolled, summary.credits_earned), (6, 4))
+        self.assertEqual((summary.passed_count, summary.failed_count), (1, 1))
+        self.assertEqual(summary.average_attendance, Decimal('80.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            failed.delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.gpa, summary.results_count, summary.failed_count), (Decimal('10.00'), 1, 0))
+
+    def test_subject_credit_changes_refresh_summaries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentSubject.objects.create(student=self.student, subject=self.math)
+            StudentSubject.objects.create(student=self.student, subject=self.physics)
+        self.add_result(self.math, 95)
+        self.add_result(self.physics, 75)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics.credits = 4
+            self.physics.save()
+        summary = AcademicSummary.objects.get(student=self.student)
+        # (10 points * 4 credits + 8 * 4) / 8 credits
+        self.assertEqual((summary.credits_enrolled, summary.gpa), (8, Decimal('9.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics.delete()
+        summary.refresh_from_db()
+        self.assertEqual((summary.credits_enrolled, summary.gpa), (4, Decimal('10.00')))
+
+    def test_migration_backfills_missing_summaries(self):
+        self.add_result(self.math, 85)
+        AcademicSummary.objects.all().delete()
+        migration = importlib.import_module('main.migrations.0009_backfill_academic_summaries')
+
+        migration.backfill_summaries(apps, SimpleNamespace(connection=connection))
+
+        summary = AcademicSummary.objects.get(student=self.student)
+        self.assertEqual((summary.gpa, summary.results_count), (Decimal('9.00'), 1))
+
+
+class DashboardStatsTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        make_student('CS001', course='CS', semester=1, profile_completed=True)
+        make_student('CS002', course='CS', semester=2)
+        make_student('XX001')
+        make_subject('MATH')
+
+    def test_stats_come_from_one_query_and_are_cached(self):
+        with self.assertNumQueries(1):
+            stats = dashboard_stats()
+        self.assertEqual((stats['total_students'], stats['completed_students'], stats['pending_students']), (3, 1, 2))
+        self.assertEqual(stats['total_subjects'], 1)
+        self.assertEqual(stats['students_by_course'], [('CS', 2), ('Not Set', 1)])
+        self.assertEqual(stats['students_by_semester'], [(1, 1), (2, 1), (None, 1)])
+        with self.assertNumQueries(0):
+            dashboard_stats()
+
+    def test_cache_is_dropped_when_a_student_or_subject_changes(self):
+        dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_student('CS003', course='CS')
+            make_subject('PHY')
+        stats = dashboard_stats()
+        self.assertEqual((stats['total_students'], stats['total_subjects']), (4, 2))
+        self.assertEqual(caches[STATS_CACHE_ALIAS].get(DASHBOARD_STATS_KEY), stats)
+
+    def test_subjects_are_counted_without_students(self):
+        StudentProfile.objects.all().delete()
+        self.assertEqual(dashboard_stats()['total_subjects'], 1)
+
+
+class StudentFragmentCacheTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.subject = make_subject('MATH')
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        self.url = reverse('student_detail', args=[self.student.id])
+
+    def record_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries if 'main_result' in query['sql']]
+
+    def test_fragments_are_reused_until_the_records_change(self):
+        _, queries = self.record_queries()
+        self.assertEqual(len(queries), 1)
+        _, queries = self.record_queries()
+        self.assertEqual(queries, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('add_result', args=[self.student.id]), {
+                'subject': self.subject.id, 'marks_obtained': 77, 'total_marks': 100,
+                'exam_date': '2025-01-10', 'exam_type': 'Midterm',
+            })
+        response, queries = self.record_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Midterm')
+
+    def test_fragments_follow_the_subject_catalog(self):
+        Result.objects.create(student=self.student, subject=self.subject, marks_obtained=77, exam_date=date(2025, 1, 10))
+        self.record_queries()
+        # A bulk rename bypasses the record signals; only the catalog moves on
+        Subject.objects.filter(id=self.subject.id).update(name='Linear Algebra')
+        bump_subject_catalog()
+        response, queries = self.record_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'Linear Algebra')
+
+    def test_versions_live_in_the_shared_cache(self):
+        version = student_version(self.student.id)
+        self.assertEqual(caches[VERSION_CACHE_ALIAS].get(STUDENT_VERSION_KEY.format(self.student.id)), version)
+        bump_student_versions([self.student.id])
+        self.assertNotEqual(student_version(self.student.id), version)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.subject = make_subject('MATH')
+        self.cs = make_student('CS001', course='CS')
+        self.ee = make_student('EE001', course='EE')
+        for student, marks in [(self.cs, 81), (self.ee, 45)]:
+            Result.objects.create(student=student, subject=self.subject, marks_obtained=marks, exam_date=date(2025, 1, 10))
+
+    def test_csv_uses_the_import_columns(self):
+        lines = list(iter_export('results', 'csv', course='CS'))
+        self.assertEqual(lines, [
+            'roll_number,subject_code,marks_obtained,total_marks,grade,exam_date,exam_type\r\n',
+            'CS001,MATH,81,100,A,2025-01-10,Final Exam\r\n',
+        ])
+
+    def test_ndjson_has_one_object_per_line(self):
+        rows = [json.loads(line) for line in iter_export('results', 'ndjson')]
+        self.assertEqual([row['roll_number'] for row in rows], ['CS001', 'EE001'])
+        self.assertEqual(rows[1]['grade'], 'C')
+
+    def test_deleted_students_are_not_exported(self):
+        StudentProfile.objects.filter(id=self.ee.id).update(deleted_at=timezone.now())
+        rows = list(iter_export('results', 'ndjson'))
+        self.assertEqual(len(rows), 1)
+
+    def test_view_streams_an_attachment(self):
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        response = self.client.get(reverse('export_records'), {'kind': 'results', 'export_format': 'csv', 'course': 'EE'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="results.csv"')
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines()[1], 'EE001,MATH,45,100,C,2025-01-10,Final Exam')
+
+
+    def attendance_months(self, **filters):
+        return [row['month'] for row in map(json.loads, iter_export('attendance', 'ndjson', **filters))]
+
+    def test_attendance_is_filtered_by_month_and_period(self):
+        for month, year in [('January', 2025), ('March', 2025), ('July', 2025), ('March', 2026)]:
+            Attendance.objects.create(student=self.cs, subject=self.subject, total_classes=10, classes_attended=5, month=month, year=year)
+        self.assertEqual(self.attendance_months(month='mar'), ['March', 'March'])
+        self.assertEqual(self.attendance_months(month='3', year=2026), ['March'])
+        self.assertEqual(self.attendance_months(month='Julember'), [])
+        self.assertEqual(self.attendance_months(period_from=202503, period_to=202507), ['March', 'July'])
+
+    def test_command_takes_period_and_date_ranges(self):
+        Result.objects.create(student=self.cs, subject=self.subject, marks_obtained=70, exam_date=date(2025, 5, 1), exam_type='Resit')
+        for month in ['January', 'March']:
+            Attendance.objects.create(student=self.cs, subject=self.subject, total_classes=10, classes_attended=5, month=month, year=2025)
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            call_command('export_records', 'results', '--date-from', '2025-02-01', '--date-to', '2025-12-31')
+        self.assertEqual(out.getvalue().splitlines()[1:], ['CS001,MATH,70,100,B+,2025-05-01,Resit'])
+
+        out = io.StringIO()
+        with redirect_stdout(out):
+            call_command('export_records', 'attendance', '--period-from', '2025-02', '--format', 'ndjson')
+        self.assertEqual([json.loads(line)['month'] for line in out.getvalue().splitlines()], ['March'])
+
+        with self.assertRaises(CommandError):
+            call_command('export_records', 'attendance', '--period-from', 'March')
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.subject = make_subject('MATH')
+        self.students = [make_student(f'CS00{number}', course='CS') for number in range(1, 5)]
+        for student, marks in zip(self.students, [95, 75, 55, 30]):
+            Result.objects.create(student=student, subject=self.subject, marks_obtained=marks, exam_date=date(2025, 1, 10))
+
+    def math_results(self):
+        return subject_stats()[0]['results']
+
+    def test_subject_statistics(self):
+        results = self.math_results()
+        self.assertEqual(results['count'], 4)
+        self.assertAlmostEqual(results['mean'], 63.75)
+        self.assertAlmostEqual(results['median'], 65.0)
+        self.assertEqual(results['pass_rate'], 75.0)
+        self.assertEqual(dict(results['histogram']), {'A+': 1, 'A': 0, 'B+': 1, 'B': 0, 'C+': 1, 'C': 0, 'F': 1})
+        self.assertEqual(course_stats()[0][1]['count'], 4)
+
+    def test_statistics_follow_new_results(self):
+        self.math_results()
+        with self.captureOnCommitCallbacks(execute=True):
+            Result.objects.create(student=self.students[0], subject=self.subject, marks_obtained=45, exam_date=date(2025, 2, 1), exam_type='Resit')
+        self.assertEqual(self.math_results()['count'], 5)
+
+    def test_soft_deleted_students_are_left_out(self):
+        self.math_results()
+        with self.captureOnCommitCallbacks(execute=True):
+            soft_delete_students([self.students[3].id])
+        results = self.math_results()
+        self.assertEqual((results['count'], results['pass_rate']), (3, 100.0))
+
+    def test_course_statistics_follow_course_changes(self):
+        course_stats()
+        student = self.students[0]
+        student.course = 'EE'
+        with self.captureOnCommitCallbacks(execute=True):
+            student.save(update_fields=['course'])
+        self.assertEqual([(course, stats['count']) for course, stats in course_stats()], [('CS', 3), ('EE', 1)])
+
+    def test_grades_off_the_scale_are_skipped(self):
+        Result.objects.filter(student=self.students[0]).update(grade='Z')
+        self.assertEqual(self.math_results()['count'], 3)
+
+    def test_grade_indexes_rejects_unknown_grades(self):
+        self.assertEqual(grade_indexes(np.array(['A+', 'F', 'C'], dtype=object)).tolist(), [0, 6, 5])
+        with self.assertRaisesMessage(ValueError, 'Z'):
+            grade_indexes(np.array(['A', 'Z'], dtype=object))
+
+
+class GradeDerivationTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.subject = make_subject('MATH')
+
+    def test_grade_bands(self):
+        cases = [(90, 100, 'A+'), (89, 100, 'A'), (70, 100, 'B+'), (40, 100, 'C'), (39, 100, 'F'), (27, 30, 'A+'), (26, 30, 'A')]
+        for marks, total, grade in cases:
+            with self.subTest(marks=marks, total=total):
+                self.assertEqual(Result.grade_for(marks, total), grade)
+
+    def test_save_derives_the_grade_and_the_sql_expression_agrees(self):
+        for marks in range(0, 101, 7):
+            Result.objects.create(student=self.student, subject=self.subject, marks_obtained=marks, total_marks=100,
+                                  grade='A+', exam_date=date(2025, 1, 10), exam_type=f'Exam {marks}')
+        self.assertFalse(Result.objects.exclude(grade=Result.grade_expression()).exists())
+        self.assertEqual(Result.objects.get(exam_type='Exam 42').grade, 'C')
+
+    def test_regrade_command_fixes_stale_grades(self):
+        result = Result.objects.create(student=self.student, subject=self.subject, marks_obtained=85, exam_date=date(2025, 1, 10))
+        Result.objects.filter(id=result.id).update(grade='F')
+
+        out = io.StringIO()
+        call_command('regrade_results', '--dry-run', stdout=out)
+        self.assertIn('1 results would change', out.getvalue())
+        result.refresh_from_db()
+        self.assertEqual(result.grade, 'F')
+
+        call_command('regrade_results', stdout=io.StringIO())
+        result.refresh_from_db()
+        self.assertEqual(result.grade, 'A')
+        self.assertEqual(AcademicSummary.objects.get(student=self.student).gpa, Decimal('9.00'))
+
+
+class StudentApiTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.subject = make_subject('MATH')
+        with self.captureOnCommitCallbacks(execute=True):
+            Result.objects.create(student=self.student, subject=self.subject, marks_obtained=81, exam_date=date(2025, 1, 10))
+        self.url = reverse('api_student_me')
+
+    def test_requires_a_student_login(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.client.force_login(User.objects.create_user('other', password='pw'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_conditional_get(self):
+        self.client.force_login(self.student.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['grade'], 'A')
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        # The session's user, then the profile and summary in one query
+        with self.assertNumQueries(2):
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Result.objects.create(student=self.student, subject=self.subject, marks_obtained=20, exam_date=date(2025, 2, 1), exam_type='Resit')
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.json()['results']), 2)
+
+    def test_subject_changes_change_the_etag(self):
+        self.client.force_login(self.student.user)
+        response = self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.name = 'Mathematics'
+            self.subject.save()
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(changed.json()['results'][0]['subject_name'], 'Mathematics')
+
+    def test_dates_alone_never_validate(self):
+        self.client.force_login(self.student.user)
+        response = self.client.get(self.url)
+        self.assertNotIn('Last-Modified', response)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.subject.name = 'Mathematics'
+            self.subject.save()
+        changed = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+        self.assertEqual(changed.status_code, 200)
+
+    def test_staff_can_read_any_student(self):
+        url = reverse('api_student_detail', args=[self.student.id])
+        self.client.force_login(self.student.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.json()['student']['roll_number'], 'CS001')
+        self.assertEqual(response.json()['summary']['gpa'], '9.00')
+
+
+class RoleResolutionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+
+    def request_for(self, user, role, checked_at):
+        return SimpleNamespace(user=user, session={ROLE_SESSION_KEY: role, ROLE_CHECKED_SESSION_KEY: checked_at})
+
+    def test_login_stores_the_role_in_the_session(self):
+        response = self.client.post(reverse('student_login'), {'username': 'cs001', 'password': 'pw'})
+        self.assertRedirects(response, reverse('student_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(self.client.session[ROLE_SESSION_KEY], ROLE_STUDENT)
+
+    def test_fresh_role_costs_no_queries(self):
+        request = self.request_for(User.objects.get(id=self.student.user_id), ROLE_STUDENT, time.time())
+        with self.assertNumQueries(0):
+            self.assertEqual(get_role(request), ROLE_STUDENT)
+
+    @override_settings(ROLE_RECHECK_SECONDS=60)
+    def test_stale_role_is_looked_up_again(self):
+        request = self.request_for(User.objects.get(id=self.student.user_id), ROLE_STAFF, time.time() - 61)
+        self.assertEqual(get_role(request), ROLE_STUDENT)
+        self.assertEqual(request.session[ROLE_SESSION_KEY], ROLE_STUDENT)
+        self.assertGreater(request.session[ROLE_CHECKED_SESSION_KEY], time.time() - 5)
+
+    def test_revoked_staff_status_takes_effect_at_once(self):
+        self.staff.is_staff = False
+        request = self.request_for(self.staff, ROLE_STAFF, time.time())
+        self.assertIsNone(get_role(request))
+
+    def test_students_cannot_open_the_admin_panel(self):
+        self.client.post(reverse('student_login'), {'username': 'cs001', 'password': 'pw'})
+        response = self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn('_auth_user_id', self.client.session)
+
+
+class SlidingSessionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        make_student('CS001')
+        self.client.post(reverse('student_login'), {'username': 'cs001', 'password': 'pw'})
+
+    def session_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(reverse('student_dashboard')).status_code, 200)
+        return [query['sql'] for query in queries if 'django_session' in query['sql']]
+
+    def test_session_is_not_saved_on_every_request(self):
+        self.assertTrue(self.client.session[SlidingSessionMiddleware.REFRESHED_AT_KEY])
+        self.assertEqual(self.session_writes(), [])
+        self.assertEqual(self.session_writes(), [])
+
+    def test_session_is_refreshed_once_the_threshold_has_passed(self):
+        session = self.client.session
+        session[SlidingSessionMiddleware.REFRESHED_AT_KEY] = int(time.time()) - settings.SESSION_REFRESH_AFTER
+        session.save()
+        self.assertTrue(self.session_writes())
+        self.assertGreater(self.client.session[SlidingSessionMiddleware.REFRESHED_AT_KEY], time.time() - 5)
+        self.assertEqual(self.session_writes(), [])
+
+
+class AsyncViewTests(TransactionTestCase):
+    """Committed data, since the async views read on worker threads with their own connections"""
+
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        subject = make_subject('MATH')
+        StudentSubject.objects.create(student=self.student, subject=subject)
+        Result.objects.create(student=self.student, subject=subject, marks_obtained=81, exam_date=date(2025, 1, 10), exam_type='Midterm')
+
+    async def test_async_dashboard_renders_the_records(self):
+        await self.async_client.aforce_login(self.student.user)
+        response = await self.async_client.get(reverse('student_dashboard_async'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Midterm')
+        self.assertContains(response, 'MATH')
+
+    async def test_async_detail_renders_the_catalog_and_records(self):
+        staff = await User.objects.acreate(username='staff', is_staff=True)
+        await self.async_client.aforce_login(staff)
+        response = await self.async_client.get(reverse('student_detail_async', args=[self.student.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Midterm')
+        self.assertEqual(len(response.context['all_subjects']), 1)
+
+
+class HybridMiddlewareTests(TestCase):
+    def test_subclasses_must_implement_both_paths(self):
+        class SyncOnly(HybridMiddleware):
+            def handle(self, request):
+                return self.get_response(request)
+
+        with self.assertRaises(TypeError):
+            SyncOnly(lambda request: None)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+
+    def test_requests_are_counted_per_view(self):
+        self.client.force_login(self.staff)
+        count, _ = metrics.QUERIES.totals(('admin_dashboard',))
+        self.client.get(reverse('admin_dashboard'))
+        self.assertEqual(metrics.QUERIES.totals(('admin_dashboard',))[0], count + 1)
+
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{view="admin_dashboard",status="200"}', body)
+        self.assertIn('db_queries_per_request_bucket{view="admin_dashboard",le="+Inf"}', body)
+
+    def test_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        self.client.force_login(make_student('CS001').user)
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(METRICS_QUERY_BUDGET=0)
+    def test_requests_over_the_query_budget_are_logged(self):
+        self.client.force_login(self.staff)
+        with self.assertLogs('main.metrics', 'WARNING') as logs:
+            self.client.get(reverse('admin_dashboard'))
+        self.assertIn('admin_dashboard', logs.output[0])
+
+    def test_request_stats_are_safe_to_update_from_several_threads(self):
+        stats = metrics.RequestStats()
+
+        def work():
+            for _ in range(10000):
+                stats.add_query(0.001)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(stats.queries, 40000)
+        self.assertAlmostEqual(stats.query_seconds, 40.0)
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def generate(self, **options):
+        call_command('generate_benchmark_data', stdout=io.StringIO(), **options)
+
+    def test_generates_the_requested_volumes(self):
+        self.generate(students=10, subjects=5, results=30, attendance=40, batch_size=7)
+        self.assertEqual(StudentProfile.objects.count(), 10)
+        self.assertEqual(Subject.objects.count(), 5)
+        self.assertEqual(Result.objects.count(), 30)
+        self.assertEqual(Attendance.objects.count(), 40)
+        self.assertEqual(AcademicSummary.objects.count(), 10)
+
+    def test_refuses_to_generate_twice(self):
+        self.generate(students=2, subjects=2, results=2, attendance=2)
+        with self.assertRaisesMessage(CommandError, 'already exists'):
+            self.generate(students=2, subjects=2, results=2, attendance=2)
+
+    def test_reports_latency_and_queries_as_json(self):
+        self.generate(students=5, subjects=3, results=10, attendance=10)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        output = Path(directory.name) / 'report.json'
+        call_command(
+            'benchmark_views', iterations=3, views=['student_list', 'api_student_me'], output=str(output),
+            stdout=io.StringIO(),
+        )
+
+        report = json.loads(output.read_text())
+        self.assertEqual(report['dataset']['students'], 5)
+        self.assertEqual([view['name'] for view in report['views']], ['student_list', 'api_student_me'])
+        for view in report['views']:
+            self.assertEqual(view['status'], 200)
+            self.assertLessEqual(view['p50_ms'], view['p99_ms'])
+            self.assertGreater(view['queries_per_request'], 0)
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.student = make_student('CS001')
+        self.subject = make_subject('MATH')
+        self.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+
+    def replicas(self, aliases):
+        # The test primary stands in for a replica, so routed queries still run
+        return mock.patch('main.db_routers.read_replicas', return_value=aliases)
+
+    def test_only_reads_inside_replica_views_are_routed(self):
+        router = PrimaryReplicaRouter()
+        with self.replicas(['replica1']):
+            self.assertEqual(router.db_for_read(Result), PRIMARY)
+            token = replica_reads.set(True)
+            try:
+                self.assertEqual(router.db_for_read(Result), 'replica1')
+                self.assertEqual(router.db_for_write(Result), PRIMARY)
+                self.assertTrue(reading_from_replica())
+            finally:
+                replica_reads.reset(token)
+        self.assertFalse(reading_from_replica())
+
+    def test_fragments_read_from_a_replica_are_not_cached(self):
+        self.client.force_login(self.staff)
+        url = reverse('student_detail', args=[self.student.id])
+        with self.replicas([PRIMARY]):
+            self.assertEqual(self.client.get(url).context['fragment_cache_seconds'], 0)
+            self.client.cookies[STICKY_COOKIE] = str(time.time() + 60)
+            response = self.client.get(url)
+        self.assertEqual(response.context['fragment_cache_seconds'], settings.STUDENT_FRAGMENT_CACHE_SECONDS)
+
+    def test_analytics_read_from_a_replica_are_not_cached(self):
+        Result.objects.create(student=self.student, subject=self.subject, marks_obtained=90, exam_date=date(2025, 1, 10))
+        with self.replicas([PRIMARY]):
+            token = replica_reads.set(True)
+            try:
+                self.assertEqual(subject_stats()[0]['results']['pass_rate'], 100.0)
+                self.assertEqual(course_stats()[0][1]['count'], 1)
+            finally:
+                replica_reads.reset(token)
+        # A write the replica had not seen yet; it sends no signal, so only
+        # figures computed now can reflect it
+        Result.objects.update(grade='F')
+        self.assertEqual(subject_stats()[0]['results']['pass_rate'], 0.0)
+
+
+class StudentSearchTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ada = make_student('CS001', course='Computer Science', phone='5550101')
+            self.alan = make_student('CS002', course='Computer Science')
+            self.grace = make_student('EE001', course='Electronics')
+            self.ada.user.first_name, self.ada.user.last_name = 'Ada', 'Lovelace'
+            self.ada.user.save()
+
+    def matching(self, query):
+        return sorted(filter_students(StudentProfile.objects.all(), query).values_list('roll_number', flat=True))
+
+    def test_every_term_matches_as_a_word_prefix(self):
+        self.assertEqual(self.matching('comp'), ['CS001', 'CS002'])
+        self.assertEqual(self.matching('comp love'), ['CS001'])
+        self.assertEqual(self.matching('555'), ['CS001'])
+        self.assertEqual(self.matching('electr'), ['EE001'])
+        self.assertEqual(self.matching('nobody'), [])
+
+    def test_edits_are_reindexed(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.grace.course = 'Civil'
+            self.grace.save()
+        self.assertEqual(self.matching('electr'), [])
+        self.assertEqual(self.matching('civ'), ['EE001'])
+
+    def test_roll_numbers_outrank_other_fields(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alan.course = 'EE001 bridging'
+            self.alan.save()
+        self.assertEqual([student.roll_number for student in search_students('ee001')], ['EE001', 'CS002'])
+
+    def test_typeahead_endpoint(self):
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        results = self.client.get(reverse('student_search'), {'q': 'ada'}).json()['results']
+        self.assertEqual([(row['roll_number'], row['name']) for row in results], [('CS001', 'Ada Lovelace')])
+        self.assertEqual(self.client.get(reverse('student_search'), {'q': '  '}).json(), {'results': []})
+
+
+class CohortEnrollmentTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.math = make_subject('MATH', credits=4)
+        self.physics = make_subject('PHY')
+        for roll_number, course, semester in [('CS001', 'CS', 1), ('CS002', 'CS', 1), ('CS003', 'CS', 2), ('EE001', 'EE', 1)]:
+            make_student(roll_number, course=course, semester=semester)
+
+    def enrolled(self):
+        return sorted(StudentSubject.objects.values_list('student__roll_number', 'subject__code'))
+
+    def test_cohort_is_selected_by_course_semester_and_roll_range(self):
+        def roll_numbers(**cohort):
+            return sorted(cohort_students(**cohort).values_list('roll_number', flat=True))
+
+        self.assertEqual(roll_numbers(course='CS', semester=1), ['CS001', 'CS002'])
+        self.assertEqual(roll_numbers(roll_from='CS002', roll_to='CS003'), ['CS002', 'CS003'])
+
+    def test_existing_enrollments_are_skipped(self):
+        StudentSubject.objects.create(student=StudentProfile.objects.get(roll_number='CS001'), subject=self.math)
+        report = enroll_cohort(cohort_students(course='CS', semester=1), [self.math.id, self.physics.id], chunk_size=2)
+        self.assertEqual((report.students, report.processed, report.written, report.already_enrolled), (2, 4, 3, 1))
+        self.assertEqual(self.enrolled(), [('CS001', 'MATH'), ('CS001', 'PHY'), ('CS002', 'MATH'), ('CS002', 'PHY')])
+        self.assertEqual(AcademicSummary.objects.get(student__roll_number='CS002').credits_enrolled, 7)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('enroll_cohort', '--subject', 'PHY', '--course', 'EE', stdout=out)
+        self.assertIn('1 created', out.getvalue())
+        self.assertEqual(self.enrolled(), [('EE001', 'PHY')])
+        with self.assertRaisesMessage(CommandError, 'BIO'):
+            call_command('enroll_cohort', '--subject', 'BIO', '--course', 'EE')
+        with self.assertRaisesMessage(CommandError, 'Choose a cohort'):
+            call_command('enroll_cohort', '--subject', 'PHY')
+
+    def test_form_requires_a_cohort(self):
+        form = CohortEnrollmentForm(data={'subjects': [self.math.id]})
+        self.assertFalse(form.is_valid())
+        self.assertIn('Choose a course, semester or roll number range.', form.non_field_errors())
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def record(job, value):
+            self.calls.append(value)
+            if value == 'flaky':
+                raise RuntimeError('try again')
+            if value == 'broken':
+                raise jobs.TaskError('cannot be done')
+            return {'value': value}
+
+        jobs.task('test_record')(record)
+        self.addCleanup(jobs.TASKS.pop, 'test_record')
+
+    def test_unknown_tasks_are_refused(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue('no_such_task')
+
+    def test_a_job_is_claimed_once(self):
+        job = jobs.enqueue('test_record', value='ok')
+        self.assertEqual(jobs.claim_jobs('worker-1', 5), [job.id])
+        self.assertEqual(jobs.claim_jobs('worker-2', 5), [])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by, job.attempts), (Job.RUNNING, 'worker-1', 1))
+
+    def test_successful_job_stores_its_result(self):
+        job = jobs.enqueue('test_record', value='ok')
+        jobs.claim_jobs('worker', 1)
+        self.assertEqual(jobs.run_job(job.id), (job.id, Job.SUCCEEDED))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.locked_by), (Job.SUCCEEDED, {'value': 'ok'}, ''))
+
+    def test_failures_are_retried_with_backoff_until_out_of_attempts(self):
+        job = jobs.enqueue('test_record', max_attempts=2, value='flaky')
+        jobs.claim_jobs('worker', 1)
+        with self.assertLogs('main.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_job(job.id), (job.id, Job.QUEUED))
+        job.refresh_from_db()
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('try again', job.error)
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        jobs.claim_jobs('worker', 1)
+        with self.assertLogs('main.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_job(job.id), (job.id, Job.FAILED))
+        self.assertEqual(self.calls, ['flaky', 'flaky'])
+
+    def test_task_errors_are_not_retried(self):
+        job = jobs.enqueue('test_record', value='broken')
+        jobs.claim_jobs('worker', 1)
+        with self.assertLogs('main.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_job(job.id), (job.id, Job.FAILED))
+        job.refresh_from_db()
+        self.assertEqual(job.error, 'cannot be done')
+
+    def test_jobs_of_a_lost_worker_are_requeued(self):
+        job = jobs.enqueue('test_record', value='ok')
+        jobs.claim_jobs('worker', 1)
+        self.assertEqual(jobs.requeue_stale(), 0)
+        Job.objects.filter(id=job.id).update(locked_at=timezone.now() - timedelta(seconds=settings.JOB_LEASE_SECONDS + 1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.locked_by), (Job.QUEUED, ''))
+
+    def test_cancel_and_retry_from_the_admin_panel(self):
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        job = jobs.enqueue('test_record', value='ok')
+        self.assertEqual(self.client.get(reverse('job_cancel', args=[job.id])).status_code, 405)
+        self.client.post(reverse('job_cancel', args=[job.id]))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.CANCELLED)
+
+        self.client.post(reverse('job_retry', args=[job.id]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 0))
+
+
+class JobWorkerTests(TransactionTestCase):
+    # Jobs run on pool threads, which need the data committed
+
+    def test_worker_command_runs_due_jobs(self):
+        jobs.task('test_echo')(lambda job, value: {'value': value})
+        self.addCleanup(jobs.TASKS.pop, 'test_echo')
+        job = jobs.enqueue('test_echo', value='ok')
+        out = io.StringIO()
+        call_command('run_jobs', '--burst', '--workers', '2', stdout=out)
+        self.assertIn(f'Job {job.id} succeeded', out.getvalue())
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'value': 'ok'})
+
+
+class TranscriptTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = Path(directory.name)
+        subject = make_subject('MATH')
+        self.students = [make_student('CS/01', course='CS'), make_student('CS_01', course='CS')]
+        Result.objects.create(student=self.students[0], subject=subject, marks_obtained=88, exam_date=date(2025, 1, 10))
+
+    def test_names_stay_unique_once_roll_numbers_are_sanitized(self):
+        names = {transcript_name(student.id, student.roll_number) for student in self.students}
+        self.assertEqual(len(names), 2)
+        self.assertTrue(all('/' not in name for name in names))
+
+    def test_generates_resumes_and_zips(self):
+        students = StudentProfile.objects.filter(course='CS')
+        self.assertEqual(generate_transcripts(students, self.output, workers=1), (2, 0))
+        html = self.output / f'{transcript_name(self.students[0].id, "CS/01")}.html'
+        self.assertIn('MATH', html.read_text())
+        self.assertEqual(len(list(self.output.glob('*.pdf'))), 2)
+
+        self.assertEqual(generate_transcripts(students, self.output, workers=1), (0, 2))
+
+        archive = self.output / 'transcripts.zip'
+        zip_transcripts(self.output, archive)
+        with zipfile.ZipFile(archive) as contents:
+            self.assertEqual(len(contents.namelist()), 4)
+
+    def test_pdf_has_a_page_per_block_of_lines(self):
+        pdf = text_to_pdf('\n'.join(f'line {number}' for number in range(100)))
+        self.assertTrue(pdf.startswith(b'%PDF-1.4'))
+        self.assertIn(b'/Count 2', pdf)
+
+
+class StudentDeletionTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        self.staff = User.objects.create_user('staff', password='pw', is_staff=True)
+        self.subject = make_subject('MATH')
+        self.student = make_student('CS001')
+        StudentSubject.objects.create(student=self.student, subject=self.subject)
+        Result.objects.create(student=self.student, subject=self.subject, marks_obtained=70, exam_date=date(2025, 1, 10))
+        for month in ['January', 'February', 'March']:
+            Attendance.objects.create(student=self.student, subject=self.subject, total_classes=10, classes_attended=8, month=month, year=2025)
+
+    def test_delete_needs_a_post(self):
+        self.client.force_login(self.staff)
+        url = reverse('delete_student', args=[self.student.id])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertTrue(StudentProfile.objects.filter(id=self.student.id).exists())
+
+        self.assertRedirects(self.client.post(url), reverse('student_list'))
+        self.assertFalse(StudentProfile.objects.filter(id=self.student.id).exists())
+        self.assertFalse(User.objects.get(id=self.student.user_id).is_active)
+        self.assertEqual(Job.objects.get().kwargs, {'student_ids': [self.student.id]})
+
+    def test_student_list_deletes_through_a_form(self):
+        self.client.force_login(self.staff)
+        html = self.client.get(reverse('student_list')).content.decode()
+        self.assertIn(f'<form method="post" action="{reverse("delete_student", args=[self.student.id])}"', html)
+
+    def test_purge_removes_records_in_batches(self):
+        soft_delete_students([self.student.id])
+        with CaptureQueriesContext(connection) as queries:
+            students, rows = purge_deleted_students(batch_size=2, pause=0)
+        self.assertEqual(students, 1)
+        self.assertFalse(StudentProfile.all_objects.filter(id=self.student.id).exists())
+        self.assertFalse(User.objects.filter(id=self.student.user_id).exists())
+        self.assertFalse(Attendance.objects.exists())
+        self.assertEqual(len([query for query in queries if query['sql'].startswith('DELETE FROM "main_attendance"')]), 2)
+
+    def test_batches_send_no_signals(self):
+        soft_delete_students([self.student.id])
+        receiver = mock.Mock()
+        for model in PURGED_MODELS:
+            post_delete.connect(receiver, sender=model)
+            self.addCleanup(post_delete.disconnect, receiver, sender=model)
+        purge_deleted_students(batch_size=2, pause=0)
+        receiver.assert_not_called()
+        self.assertFalse(Result.objects.exists() or Attendance.objects.exists() or StudentSubject.objects.exists())
+
+    def test_only_soft_deleted_students_are_purged(self):
+        self.assertEqual(purge_deleted_students(pause=0), (0, 0))
+        self.assertTrue(Result.objects.exists())
+
+
+class OnboardingTests(TestCase):
+    HEADER = 'roll_number,username,email,password,first_name,course,semester'
+
+    def setUp(self):
+        clear_caches()
+        make_student('CS001')
+
+    def test_students_are_created_with_hashed_passwords(self):
+        report = import_students(csv_lines(
+            self.HEADER,
+            'CS002,ada,ada@example.com,  Analytical engine 1843 ,Ada,CS,1',
+            'CS003,alan,alan@example.com,Bombe-Enigma-1940,Alan,CS,2',
+        ))
+        self.assertEqual((report.written, report.error_count), (2, 0))
+        ada = StudentProfile.objects.select_related('user').get(roll_number='CS002')
+        self.assertEqual((ada.user.first_name, ada.course, ada.semester), ('Ada', 'CS', 1))
+        # Surrounding spaces are part of the password
+        self.assertTrue(ada.user.check_password('  Analytical engine 1843 '))
+        self.assertFalse(ada.user.check_password('Analytical engine 1843'))
+
+    def test_taken_and_repeated_keys_are_rejected_up_front(self):
+        report = import_students(csv_lines(
+            self.HEADER,
+            'CS001,someone,someone@example.com,Bombe-Enigma-1940,,,',
+            'CS002,ada,CS001@EXAMPLE.COM,Bombe-Enigma-1940,,,',
+            'CS003,grace,grace@example.com,Bombe-Enigma-1940,,,',
+            'CS004,grace,grace2@example.com,Bombe-Enigma-1940,,,',
+            'CS005,weak,weak@example.com,123,,,',
+        ))
+        self.assertEqual((report.written, report.error_count), (1, 4))
+        self.assertIn("roll_number 'CS001' is already taken", report.errors[0][1])
+        self.assertIn("email 'CS001@EXAMPLE.COM' is already taken", report.errors[1][1])
+        self.assertIn("username 'grace' is already taken", report.errors[2][1])
+        self.assertEqual(StudentProfile.objects.count(), 2)
+
+    def test_passwords_can_be_hashed_in_a_process_pool(self):
+        rows = [f'P{number:03d},user{number},user{number}@example.com,Bombe-Enigma-{number}x,,,' for number in range(40)]
+        report = import_students(csv_lines(self.HEADER, *rows), workers=2)
+        self.assertEqual(report.written, 40)
+        self.assertTrue(User.objects.get(username='user7').check_password('Bombe-Enigma-7x'))
+
+    def test_background_import_keeps_no_passwords(self):
+        csv_text = f'{self.HEADER}\nCS002,ada,ada@example.com,Analytical engine 1843,Ada,CS,1\n'
+        job = jobs.enqueue('import_students', csv_text=csv_text)
+        self.assertEqual(job.max_attempts, 1)
+        jobs.claim_jobs('worker', 1)
+        with self.settings(ONBOARDING_HASH_WORKERS=1):
+            self.assertEqual(jobs.run_job(job.id), (job.id, Job.SUCCEEDED))
+        job.refresh_from_db()
+        self.assertEqual(job.kwargs, {})
+        self.assertTrue(StudentProfile.objects.filter(roll_number='CS002').exists())
+
+    def test_admin_hides_the_queued_file(self):
+        job = jobs.enqueue('import_students', csv_text=f'{self.HEADER}\nCS002,ada,ada@example.com,Analytical engine 1843,,,\n')
+        self.client.force_login(User.objects.create_superuser('admin', password='pw'))
+        response = self.client.get(reverse('admin:main_job_change', args=[job.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, 'Analytical engine 1843')
+
+    def test_cancelled_import_drops_the_file_and_cannot_be_rerun(self):
+        job = jobs.enqueue('import_students', csv_text=f'{self.HEADER}\n')
+        self.assertTrue(jobs.cancel(job))
+        job.refresh_from_db()
+        self.assertEqual(job.kwargs, {})
+
+        jobs.retry(job)
+        jobs.claim_jobs('worker', 1)
+        with self.assertLogs('main.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_job(job.id), (job.id, Job.FAILED))
+        job.refresh_from_db()
+        self.assertEqual(job.error, 'The uploaded file is no longer stored; upload it again')
+
+
+class SubjectCatalogTests(TestCase):
+    def setUp(self):
+        clear_caches()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics = make_subject('PHY')
+            self.math = make_subject('MATH')
+
+    def test_catalog_is_loaded_once_per_version(self):
+        self.assertEqual([subject.code for subject in subject_catalog()], ['MATH', 'PHY'])
+        with self.assertNumQueries(0):
+            subject_catalog()
+            self.assertEqual(catalog_subject(str(self.math.id)), self.math)
+            self.assertIsNone(catalog_subject('0'))
+
+    def test_subject_changes_reload_the_catalog_everywhere(self):
+        version = catalog_version()
+        subject_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_subject('BIO')
+        self.assertNotEqual(catalog_version(), version)
+        self.assertEqual([subject.code for subject in subject_catalog()], ['BIO', 'MATH', 'PHY'])
+
+    def test_replica_routed_views_load_it_from_the_primary(self):
+        subject_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_subject('BIO')
+        student = make_student('CS001')
+        self.client.force_login(User.objects.create_user('staff', password='pw', is_staff=True))
+        with mock.patch('main.db_routers.read_replicas', return_value=[PRIMARY]), \
+                mock.patch.object(PrimaryReplicaRouter, 'db_for_read', autospec=True, side_effect=PrimaryReplicaRouter.db_for_read) as db_for_read:
+            response = self.client.get(reverse('student_detail', args=[student.id]))
+        self.assertEqual([subject.code for subject in response.context['all_subjects']], ['BIO', 'MATH', 'PHY'])
+        self.assertNotIn(Subject, [call.args[1] for call in db_for_read.call_args_list])
+
+    def test_forms_resolve_subjects_without_queries(self):
+        subject_catalog()
+        form = CohortEnrollmentForm(data={'course': 'CS', 'subjects': [self.math.id, self.physics.id]})
+        with self.assertNumQueries(0):
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['subjects'], [self.math, self.physics])
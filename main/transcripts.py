@@ -0,0 +1,188 @@
+import os
+import re
+import zipfile
+from collections import defaultdict
+from functools import partial
+from pathlib import Path
+
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .bulk import chunked
+from .models import StudentProfile, StudentSubject, Result, Attendance
+from .workers import process_pool
+
+TRANSCRIPT_FORMATS = ['html', 'pdf']
+DEFAULT_BATCH_SIZE = 500
+
+PDF_LINES_PER_PAGE = 64
+PDF_FONT_SIZE = 9
+
+
+def transcript_name(student_id, roll_number):
+    """
+    File name stem for a student. Roll numbers may contain slashes, and once
+    those are replaced two roll numbers can read the same (CS/01, CS_01),
+    so the id keeps every name unique.
+    """
+    return '{}-{}'.format(re.sub(r'[^\w.-]', '_', roll_number), student_id)
+
+
+def output_paths(output_dir, student_id, roll_number, formats):
+    stem = transcript_name(student_id, roll_number)
+    return [Path(output_dir) / f'{stem}.{extension}' for extension in formats]
+
+
+def load_transcripts(student_ids):
+    """
+    Plain data for the transcripts of ``student_ids``, in four queries.
+
+    The result is made of dicts, lists, dates and decimals only, so it can
+    be pickled to worker processes that never touch the database.
+    """
+    students = (
+        StudentProfile.objects.filter(id__in=student_ids)
+        .order_by('roll_number')
+        .values(
+            'id', 'roll_number', 'course', 'semester', 'date_of_birth',
+            first_name=F('user__first_name'), last_name=F('user__last_name'), email=F('user__email'),
+            gpa=F('summary__gpa'), credits_enrolled=F('summary__credits_enrolled'),
+            credits_earned=F('summary__credits_earned'), average_attendance=F('summary__average_attendance'),
+        )
+    )
+    records = {'subjects': defaultdict(list), 'results': defaultdict(list), 'attendance': defaultdict(list)}
+    for row in StudentSubject.objects.filter(student_id__in=student_ids).order_by('subject__code').values(
+        'student_id', 'enrolled_date', code=F('subject__code'), name=F('subject__name'), credits=F('subject__credits'),
+    ):
+        records['subjects'][row.pop('student_id')].append(row)
+    for row in Result.objects.filter(student_id__in=student_ids).order_by('exam_date', 'id').values(
+        'student_id', 'exam_type', 'marks_obtained', 'total_marks', 'grade', 'exam_date',
+        code=F('subject__code'), name=F('subject__name'),
+    ):
+        records['results'][row.pop('student_id')].append(row)
+    for row in Attendance.objects.filter(student_id__in=student_ids).order_by('period', 'id').values(
+        'student_id', 'month', 'year', 'classes_attended', 'total_classes', 'attendance_percentage',
+        code=F('subject__code'), name=F('subject__name'),
+    ):
+        records['attendance'][row.pop('student_id')].append(row)
+
+    return [
+        {
+            'student': student,
+            'subjects': records['subjects'][student['id']],
+            'results': records['results'][student['id']],
+            'attendance': records['attendance'][student['id']],
+        }
+        for student in students
+    ]
+
+
+def pdf_escape(line):
+    line = line.encode('latin-1', 'replace').decode('latin-1')
+    return line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def text_to_pdf(text):
+    """
+    A minimal PDF of ``text`` set in Courier, one page per
+    PDF_LINES_PER_PAGE lines, so printable transcripts need no PDF library.
+    """
+    lines = text.expandtabs().splitlines() or ['']
+    pages = [lines[start:start + PDF_LINES_PER_PAGE] for start in range(0, len(lines), PDF_LINES_PER_PAGE)]
+    leading = PDF_FONT_SIZE + 3
+
+    # Objects 1-3 are the catalog, page tree and font; each page adds a page and a content stream
+    objects = [None, None, b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>']
+    page_ids = []
+    for page in pages:
+        stream = '\n'.join(
+            [f'BT /F1 {PDF_FONT_SIZE} Tf {leading} TL 40 800 Td']
+            + [f'({pdf_escape(line)}) Tj T*' for line in page]
+            + ['ET']
+        ).encode('latin-1')
+        objects.append(b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream))
+        content_id = len(objects)
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % content_id
+        )
+        page_ids.append(len(objects))
+    objects[0] = b'<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (
+        b' '.join(b'%d 0 R' % page_id for page_id in page_ids), len(page_ids),
+    )
+
+    output = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def write_atomically(path, content):
+    """Write via a temporary file so an interrupted run never leaves a partial transcript"""
+    temporary = path.with_name(path.name + '.part')
+    temporary.write_bytes(content)
+    os.replace(temporary, path)
+
+
+def render_transcript(transcript, output_dir, formats, generated_at):
+    """Render one student's transcript in each format; runs in a worker process"""
+    context = {**transcript, 'generated_at': generated_at}
+    student = transcript['student']
+    paths = output_paths(output_dir, student['id'], student['roll_number'], formats)
+    for extension, path in zip(formats, paths):
+        if extension == 'html':
+            content = render_to_string('transcripts/transcript.html', context).encode()
+        else:
+            content = text_to_pdf(render_to_string('transcripts/transcript.txt', context))
+        write_atomically(path, content)
+    return student['roll_number']
+
+
+def generate_transcripts(students, output_dir, formats=TRANSCRIPT_FORMATS, workers=None,
+                         batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Write transcripts for every student in ``students`` into ``output_dir``.
+
+    Students whose files all exist already are skipped, so an interrupted
+    run picks up where it stopped. Data is loaded in batches of
+    ``batch_size`` students (four queries each) and rendered by a pool of
+    ``workers`` processes (default: one per core). Returns
+    ``(rendered, skipped)``.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pending, skipped = [], 0
+    for student_id, roll_number in students.order_by('roll_number').values_list('id', 'roll_number'):
+        if all(path.exists() for path in output_paths(output_dir, student_id, roll_number, formats)):
+            skipped += 1
+        else:
+            pending.append(student_id)
+
+    rendered = 0
+    workers = workers or os.cpu_count() or 1
+    render = partial(render_transcript, output_dir=output_dir, formats=formats, generated_at=timezone.now())
+    with process_pool(workers) as pool:
+        for chunk in chunked(pending, batch_size):
+            transcripts = load_transcripts(chunk)
+            for _ in pool.map(render, transcripts, chunksize=max(1, len(transcripts) // (4 * workers))):
+                rendered += 1
+            if progress:
+                progress(rendered, len(pending))
+    return rendered, skipped
+
+
+def zip_transcripts(output_dir, archive_path, formats=TRANSCRIPT_FORMATS):
+    """Pack the transcripts in ``output_dir`` into a zip archive"""
+    suffixes = {f'.{extension}' for extension in formats}
+    with zipfile.ZipFile(archive_path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for path in sorted(Path(output_dir).iterdir()):
+            if path.suffix in suffixes:
+                archive.write(path, path.name)
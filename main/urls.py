@@ -12,13 +12,33 @@ urlpatterns = [
     path('student/logout/', views.custom_logout_view, name='student_logout'),
     path('student/ajax-logout/', views.ajax_logout_view, name='ajax_logout'),  # Alternative AJAX logout
     path('student/dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('student/dashboard/async/', views.student_dashboard_async, name='student_dashboard_async'),
     
     # Admin URLs
     path('admin-panel/', views.admin_dashboard, name='admin_dashboard'),
     path('admin-panel/students/', views.student_list, name='student_list'),
+    path('admin-panel/students/search/', views.student_search, name='student_search'),
     path('admin-panel/student/<int:student_id>/', views.student_detail, name='student_detail'),
+    path('admin-panel/student/<int:student_id>/async/', views.student_detail_async, name='student_detail_async'),
     path('admin-panel/student/<int:student_id>/add-subject/', views.add_subject_to_student, name='add_subject_to_student'),
     path('admin-panel/student/<int:student_id>/add-result/', views.add_result, name='add_result'),
     path('admin-panel/student/<int:student_id>/add-attendance/', views.add_attendance, name='add_attendance'),
     path('admin-panel/student/<int:student_id>/delete/', views.delete_student, name='delete_student'),
+    path('admin-panel/import/results/', views.import_results_view, name='import_results'),
+    path('admin-panel/import/attendance/', views.import_attendance_view, name='import_attendance'),
+    path('admin-panel/import/students/', views.import_students_view, name='import_students'),
+    path('admin-panel/enroll/', views.enroll_cohort_view, name='enroll_cohort'),
+    path('admin-panel/export/', views.export_records, name='export_records'),
+    path('admin-panel/jobs/', views.job_list, name='job_list'),
+    path('admin-panel/jobs/<int:job_id>/', views.job_detail, name='job_detail'),
+    path('admin-panel/jobs/<int:job_id>/cancel/', views.job_cancel, name='job_cancel'),
+    path('admin-panel/jobs/<int:job_id>/retry/', views.job_retry, name='job_retry'),
+    path('admin-panel/analytics/', views.analytics, name='analytics'),
+
+    # Read-only JSON API
+    path('api/student/', views.api_student_me, name='api_student_me'),
+    path('api/students/<int:student_id>/', views.api_student_detail, name='api_student_detail'),
+
+    # Prometheus metrics
+    path('metrics/', views.metrics_view, name='metrics'),
 ]
\ No newline at end of file
@@ -1,16 +1,39 @@
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib.auth import login, authenticate, logout
+import asyncio
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.contrib.auth import login, authenticate, logout, alogout
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db import IntegrityError
+from django.core.exceptions import ValidationError
+from django.core.cache import caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db import IntegrityError, close_old_connections, router
+from django.db.models import F
 from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_protect, csrf_exempt
-from django.views.decorators.http import require_POST
-from django.http import HttpResponseRedirect, JsonResponse
+from django.views.decorators.http import require_GET, require_POST
+from django.http import Http404, HttpResponse, HttpResponseRedirect, JsonResponse, StreamingHttpResponse
 from django.urls import reverse
-from .models import StudentProfile, Subject, StudentSubject, Result, Attendance
-from .forms import StudentRegistrationForm, StudentProfileForm, ResultForm, AttendanceForm
+from django.utils.cache import get_conditional_response, patch_cache_control
+from .models import StudentProfile, StudentSubject, Result, Attendance, Job
+from .forms import StudentRegistrationForm, StudentProfileForm, ResultForm, AttendanceForm, BulkUploadForm, AttendanceUploadForm, StudentFilterForm, ExportForm, AnalyticsFilterForm, CohortEnrollmentForm
+from .db_routers import read_from_replica
+from .search import search_students
+from .pagination import keyset_paginate
+from .stats import dashboard_stats
+from .fragments import fragment_cache_seconds, student_version
+from .catalog import catalog_subject, catalog_version, subject_catalog
+from .roles import ROLE_STUDENT, ROLE_STAFF, get_role, aget_role, remember_role, resolve_role
+from .exports import EXPORT_FORMATS, EXPORT_MODELS, iter_export
+from .analytics import GRADES, subject_stats, course_stats
+from . import metrics
+from .bulk import RESULT_COLUMNS, ATTENDANCE_COLUMNS, decode_upload, read_upload, import_results, import_attendance, cohort_students, enroll_cohort
+from . import jobs
+from .deletion import soft_delete_students
+from .onboarding import STUDENT_COLUMNS, import_students
 
 @never_cache
 def home(request):
@@ -37,9 +60,10 @@ def student_register(request):
 def student_login_view(request):
     # If user is already authenticated, redirect them
     if request.user.is_authenticated:
-        if hasattr(request.user, 'studentprofile'):
+        role = get_role(request)
+        if role == ROLE_STUDENT:
             return redirect('student_dashboard')
-        elif request.user.is_staff or request.user.is_superuser:
+        elif role == ROLE_STAFF:
             return redirect('admin_dashboard')
     
     if request.method == 'POST':
@@ -48,11 +72,15 @@ def student_login_view(request):
         user = authenticate(request, username=username, password=password)
         
         if user is not None:
-            if hasattr(user, 'studentprofile'):
+            # Resolve the role once here; later requests read it from the session
+            role = resolve_role(user)
+            if role == ROLE_STUDENT:
                 login(request, user)
+                remember_role(request, role)
                 return redirect('student_dashboard')
-            elif user.is_staff or user.is_superuser:
+            elif role == ROLE_STAFF:
                 login(request, user)
+                remember_role(request, role)
                 return redirect('admin_dashboard')
             else:
                 messages.error(request, 'Access denied.')
@@ -100,34 +128,109 @@ def ajax_logout_view(request):
 
 @never_cache
 @login_required
+@read_from_replica
 def student_dashboard(request):
     # Double-check authentication
     if not request.user.is_authenticated:
         return redirect('student_login')
         
-    if not hasattr(request.user, 'studentprofile'):
+    if get_role(request) != ROLE_STUDENT:
         messages.error(request, 'Access denied.')
         logout(request)
         return redirect('student_login')
     
     student_profile = request.user.studentprofile
     subjects = StudentSubject.objects.filter(student=student_profile).select_related('subject')
-    results = Result.objects.filter(student=student_profile).select_related('subject')
-    attendance_records = Attendance.objects.filter(student=student_profile).select_related('subject')
+    results = Result.objects.filter(student=student_profile).select_related('subject').order_by('-exam_date', '-id')
+    attendance_records = Attendance.objects.filter(student=student_profile).select_related('subject').order_by('-period', '-id')
     
+    # The querysets stay lazy: they only run when their fragment is not cached
     context = {
         'student': student_profile,
+        'records_version': student_version(student_profile.id),
+        'catalog_version': catalog_version(),
+        'fragment_cache_seconds': fragment_cache_seconds(),
         'subjects': subjects,
         'results': results,
         'attendance_records': attendance_records,
     }
     return render(request, 'student/dashboard.html', context)
 
+STUDENT_PAGE_SIZE = 50
+
+def fetch_list(queryset):
+    """Evaluate a queryset on a worker thread, which uses its own connection"""
+    close_old_connections()
+    try:
+        return list(queryset)
+    finally:
+        close_old_connections()
+
+async def fetch_concurrently(querysets):
+    """Run independent querysets at the same time, one worker thread each"""
+    return await asyncio.gather(*(
+        sync_to_async(fetch_list, thread_sensitive=False)(queryset) for queryset in querysets
+    ))
+
+async def astudent_records(student, fragment_prefix, extra=None):
+    """
+    Template context for a student's record fragments.
+
+    Only fragments missing from the fragment cache are queried, and those
+    queries (plus any ``extra`` querysets) run concurrently. Cached fragments
+    keep their lazy querysets, which the template never evaluates.
+    """
+    version = await sync_to_async(student_version)(student.id)
+    subjects_version = await sync_to_async(catalog_version)()
+    querysets = {
+        'subjects': StudentSubject.objects.filter(student=student).select_related('subject'),
+        'results': Result.objects.filter(student=student).select_related('subject').order_by('-exam_date', '-id'),
+        'attendance_records': Attendance.objects.filter(student=student).select_related('subject').order_by('-period', '-id'),
+    }
+    fragments = {
+        make_template_fragment_key(f'{fragment_prefix}_{fragment}', [student.id, version, subjects_version]): name
+        for name, fragment in [('subjects', 'subjects'), ('results', 'results'), ('attendance_records', 'attendance')]
+    }
+    fragment_cache = caches['template_fragments']
+    cached = await sync_to_async(fragment_cache.get_many)(list(fragments))
+
+    to_fetch = {name: querysets[name] for key, name in fragments.items() if key not in cached}
+    to_fetch.update(extra or {})
+    context = dict(querysets)
+    context.update(zip(to_fetch, await fetch_concurrently(to_fetch.values())))
+    context.update({
+        'records_version': version,
+        'catalog_version': subjects_version,
+        'fragment_cache_seconds': fragment_cache_seconds(),
+    })
+    return context
+
+@never_cache
+@login_required
+@read_from_replica
+async def student_dashboard_async(request):
+    """ASGI version of student_dashboard that runs its record queries concurrently"""
+    if await aget_role(request) != ROLE_STUDENT:
+        messages.error(request, 'Access denied.')
+        await alogout(request)
+        return redirect('student_login')
+
+    user = await request.auser()
+    student_profile = await StudentProfile.objects.select_related('user', 'summary').aget(user=user)
+    context = {
+        'student': student_profile,
+        **await astudent_records(student_profile, 'dashboard'),
+    }
+    # Rendered off the event loop in case a fragment expires mid-request and
+    # the template has to evaluate a lazy queryset after all
+    return await sync_to_async(render)(request, 'student/dashboard.html', context)
+
 def is_staff_or_superuser(user):
     return user.is_staff or user.is_superuser
 
 @never_cache
 @user_passes_test(is_staff_or_superuser)
+@read_from_replica
 def admin_dashboard(request):
     # Double-check authentication and permissions
     if not request.user.is_authenticated:
@@ -138,28 +241,63 @@ def admin_dashboard(request):
         logout(request)
         return redirect('student_login')
     
-    total_students = StudentProfile.objects.count()
-    pending_students = StudentProfile.objects.filter(profile_completed=False).count()
-    completed_students = StudentProfile.objects.filter(profile_completed=True).count()
-    total_subjects = Subject.objects.count()
-    
+    return render(request, 'admin_panel/admin_dashboard.html', dashboard_stats())
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+@read_from_replica
+def student_list(request):
+    filter_form = StudentFilterForm(request.GET)
+    students = filter_form.filter(
+        StudentProfile.objects.select_related('user').only(
+            'id', 'roll_number', 'course', 'profile_completed',
+            'user__first_name', 'user__last_name', 'user__email',
+        )
+    )
+    page = keyset_paginate(
+        students, 'roll_number', STUDENT_PAGE_SIZE,
+        after=request.GET.get('after'), before=request.GET.get('before'),
+    )
+
+    # Filters are carried over to the next/previous page links
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+
     context = {
-        'total_students': total_students,
-        'pending_students': pending_students,
-        'completed_students': completed_students,
-        'total_subjects': total_subjects,
+        'students': page,
+        'page': page,
+        'filter_form': filter_form,
+        'filter_query': params.urlencode(),
     }
-    return render(request, 'admin_panel/admin_dashboard.html', context)
+    return render(request, 'admin_panel/student_list.html', context)
+
+STUDENT_SEARCH_LIMIT = 10
 
 @never_cache
+@require_GET
 @user_passes_test(is_staff_or_superuser)
-def student_list(request):
-    students = StudentProfile.objects.select_related('user').all()
-    return render(request, 'admin_panel/student_list.html', {'students': students})
+@read_from_replica
+def student_search(request):
+    """Typeahead suggestions from the full-text student index"""
+    students = search_students(request.GET.get('q', ''), limit=STUDENT_SEARCH_LIMIT)
+    return JsonResponse({
+        'results': [
+            {
+                'id': student.id,
+                'roll_number': student.roll_number,
+                'name': student.user.get_full_name(),
+                'course': student.course,
+                'url': reverse('student_detail', args=[student.id]),
+            }
+            for student in students
+        ],
+    })
 
 @user_passes_test(is_staff_or_superuser)
+@read_from_replica
 def student_detail(request, student_id):
-    student = get_object_or_404(StudentProfile, id=student_id)
+    student = get_object_or_404(StudentProfile.objects.select_related('user'), id=student_id)
     
     if request.method == 'POST':
         profile_form = StudentProfileForm(request.POST, instance=student)
@@ -173,25 +311,46 @@ def student_detail(request, student_id):
         profile_form = StudentProfileForm(instance=student)
     
     subjects = StudentSubject.objects.filter(student=student).select_related('subject')
-    results = Result.objects.filter(student=student).select_related('subject')
-    attendance_records = Attendance.objects.filter(student=student).select_related('subject')
+    results = Result.objects.filter(student=student).select_related('subject').order_by('-exam_date', '-id')
+    attendance_records = Attendance.objects.filter(student=student).select_related('subject').order_by('-period', '-id')
     
+    # The querysets stay lazy: they only run when their fragment is not cached
     context = {
         'student': student,
+        'records_version': student_version(student.id),
+        'catalog_version': catalog_version(),
+        'fragment_cache_seconds': fragment_cache_seconds(),
         'profile_form': profile_form,
         'subjects': subjects,
         'results': results,
         'attendance_records': attendance_records,
-        'all_subjects': Subject.objects.all(),
+        'all_subjects': subject_catalog(),
     }
     return render(request, 'admin_panel/student_detail.html', context)
 
+@user_passes_test(is_staff_or_superuser)
+@read_from_replica
+async def student_detail_async(request, student_id):
+    """ASGI version of student_detail; profile updates are handed to the sync view"""
+    if request.method == 'POST':
+        return await sync_to_async(student_detail)(request, student_id)
+
+    student = await aget_object_or_404(StudentProfile.objects.select_related('user', 'summary'), id=student_id)
+    context = {
+        'student': student,
+        'profile_form': StudentProfileForm(instance=student),
+        **await astudent_records(student, 'detail'),
+        'all_subjects': await sync_to_async(subject_catalog)(),
+    }
+    return await sync_to_async(render)(request, 'admin_panel/student_detail.html', context)
+
 @user_passes_test(is_staff_or_superuser)
 def add_subject_to_student(request, student_id):
     if request.method == 'POST':
         student = get_object_or_404(StudentProfile, id=student_id)
-        subject_id = request.POST.get('subject_id')
-        subject = get_object_or_404(Subject, id=subject_id)
+        subject = catalog_subject(request.POST.get('subject_id'))
+        if subject is None:
+            raise Http404('No such subject')
         
         StudentSubject.objects.get_or_create(student=student, subject=subject)
         messages.success(request, f'Subject {subject.name} added to student.')
@@ -224,10 +383,326 @@ def add_attendance(request, student_id):
     
     return redirect('student_detail', student_id=student_id)
 
+@require_POST
 @user_passes_test(is_staff_or_superuser)
 def delete_student(request, student_id):
     student = get_object_or_404(StudentProfile, id=student_id)
-    user = student.user
-    user.delete()  # This will also delete the StudentProfile due to cascade
+    # Hidden at once; the rows are removed in small batches by a background job
+    soft_delete_students([student.id])
+    jobs.enqueue(
+        'purge_students', description=f'Purge student {student.roll_number}',
+        created_by=request.user, student_ids=[student.id],
+    )
     messages.success(request, 'Student deleted successfully!')
-    return redirect('student_list')
\ No newline at end of file
+    return redirect('student_list')
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+def import_results_view(request):
+    report = None
+    if request.method == 'POST':
+        form = BulkUploadForm(request.POST, request.FILES)
+        if form.is_valid() and form.cleaned_data['background']:
+            upload = form.cleaned_data['csv_file']
+            try:
+                job = jobs.enqueue(
+                    'import_results', description=f'Import results from {upload.name}',
+                    created_by=request.user, csv_text=read_upload(upload),
+                )
+            except UnicodeDecodeError as e:
+                messages.error(request, f'Import failed: {e}')
+            else:
+                messages.success(request, f'Import queued as job #{job.id}.')
+                return redirect('job_detail', job_id=job.id)
+        elif form.is_valid():
+            try:
+                report = import_results(decode_upload(form.cleaned_data['csv_file']))
+            except (ValidationError, UnicodeDecodeError) as e:
+                messages.error(request, f'Import failed: {e}')
+            else:
+                messages.success(request, report.summary())
+    else:
+        form = BulkUploadForm()
+
+    context = {
+        'title': 'Import Results',
+        'columns': RESULT_COLUMNS,
+        'help_text': 'Grades are derived from the marks, so a grade column is optional and ignored.',
+        'form': form,
+        'report': report,
+    }
+    return render(request, 'admin_panel/bulk_upload.html', context)
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+def import_attendance_view(request):
+    report = None
+    if request.method == 'POST':
+        form = AttendanceUploadForm(request.POST, request.FILES)
+        if form.is_valid() and form.cleaned_data['background']:
+            upload = form.cleaned_data['csv_file']
+            try:
+                job = jobs.enqueue(
+                    'import_attendance', description=f'Import attendance from {upload.name}',
+                    created_by=request.user, csv_text=read_upload(upload), sheet=form.sheet(),
+                )
+            except UnicodeDecodeError as e:
+                messages.error(request, f'Import failed: {e}')
+            else:
+                messages.success(request, f'Import queued as job #{job.id}.')
+                return redirect('job_detail', job_id=job.id)
+        elif form.is_valid():
+            try:
+                report = import_attendance(decode_upload(form.cleaned_data['csv_file']), sheet=form.sheet())
+            except (ValidationError, UnicodeDecodeError) as e:
+                messages.error(request, f'Import failed: {e}')
+            else:
+                messages.success(request, report.summary())
+    else:
+        form = AttendanceUploadForm()
+
+    context = {
+        'title': 'Import Attendance',
+        'columns': ATTENDANCE_COLUMNS,
+        'help_text': 'Subject, month and year may be chosen below instead of given as columns.',
+        'form': form,
+        'report': report,
+    }
+    return render(request, 'admin_panel/bulk_upload.html', context)
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+def import_students_view(request):
+    report = None
+    if request.method == 'POST':
+        form = BulkUploadForm(request.POST, request.FILES)
+        if form.is_valid() and form.cleaned_data['background']:
+            upload = form.cleaned_data['csv_file']
+            try:
+                job = jobs.enqueue(
+                    'import_students', description=f'Onboard students from {upload.name}',
+                    created_by=request.user, csv_text=read_upload(upload),
+                )
+            except UnicodeDecodeError as e:
+                messages.error(request, f'Import failed: {e}')
+            else:
+                messages.success(request, f'Import queued as job #{job.id}.')
+                return redirect('job_detail', job_id=job.id)
+        elif form.is_valid():
+            try:
+                report = import_students(decode_upload(form.cleaned_data['csv_file']))
+            except (ValidationError, UnicodeDecodeError) as e:
+                messages.error(request, f'Import failed: {e}')
+            else:
+                messages.success(request, report.summary())
+    else:
+        form = BulkUploadForm()
+
+    context = {
+        'title': 'Onboard Students',
+        'columns': STUDENT_COLUMNS,
+        'help_text': 'roll_number, username, email and password are required. Rows whose roll number, username or email is already taken are skipped.',
+        'form': form,
+        'report': report,
+    }
+    return render(request, 'admin_panel/bulk_upload.html', context)
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+def enroll_cohort_view(request):
+    report = None
+    if request.method == 'POST':
+        form = CohortEnrollmentForm(request.POST)
+        if form.is_valid() and form.cleaned_data['background']:
+            subjects = form.cleaned_data['subjects']
+            job = jobs.enqueue(
+                'enroll_cohort', description=f"Enroll cohort in {', '.join(subject.code for subject in subjects)}",
+                created_by=request.user, cohort=form.cohort(), subject_ids=[subject.id for subject in subjects],
+            )
+            messages.success(request, f'Enrollment queued as job #{job.id}.')
+            return redirect('job_detail', job_id=job.id)
+        elif form.is_valid():
+            report = enroll_cohort(
+                cohort_students(**form.cohort()),
+                [subject.id for subject in form.cleaned_data['subjects']],
+            )
+            messages.success(request, report.summary())
+    else:
+        form = CohortEnrollmentForm()
+    return render(request, 'admin_panel/enroll.html', {'form': form, 'report': report})
+
+JOB_LIST_LIMIT = 100
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+def job_list(request):
+    status = request.GET.get('status', '')
+    # Uploaded CSV text and results can be large; the list shows neither
+    recent = Job.objects.select_related('created_by').defer('kwargs', 'result', 'error').order_by('-id')
+    if status in dict(Job.STATUS_CHOICES):
+        recent = recent.filter(status=status)
+    recent = list(recent[:JOB_LIST_LIMIT])
+    context = {
+        'jobs': recent,
+        'status': status,
+        'status_choices': Job.STATUS_CHOICES,
+        'refresh': any(job.is_active for job in recent),
+    }
+    return render(request, 'admin_panel/jobs.html', context)
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+def job_detail(request, job_id):
+    job = get_object_or_404(Job.objects.select_related('created_by').defer('kwargs'), id=job_id)
+    return render(request, 'admin_panel/job_detail.html', {'job': job})
+
+@require_POST
+@user_passes_test(is_staff_or_superuser)
+def job_cancel(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    if jobs.cancel(job):
+        messages.success(request, f'Job #{job.id} cancelled.')
+    else:
+        messages.error(request, f'Job #{job.id} has already started and cannot be cancelled.')
+    return redirect('job_detail', job_id=job.id)
+
+@require_POST
+@user_passes_test(is_staff_or_superuser)
+def job_retry(request, job_id):
+    job = get_object_or_404(Job, id=job_id)
+    if jobs.retry(job):
+        messages.success(request, f'Job #{job.id} queued again.')
+    else:
+        messages.error(request, 'Only failed or cancelled jobs can be retried.')
+    return redirect('job_detail', job_id=job.id)
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+@read_from_replica
+def export_records(request):
+    form = ExportForm(request.GET or None)
+    if form.is_valid():
+        filters = form.cleaned_data.copy()
+        kind = filters.pop('kind')
+        export_format = filters.pop('export_format')
+        content_type, extension = EXPORT_FORMATS[export_format]
+        # Rows are read after the view returns, so pick the database now
+        using = router.db_for_read(EXPORT_MODELS[kind])
+        response = StreamingHttpResponse(iter_export(kind, export_format, using=using, **filters), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{kind}.{extension}"'
+        return response
+    return render(request, 'admin_panel/export.html', {'form': form})
+
+@never_cache
+@user_passes_test(is_staff_or_superuser)
+@read_from_replica
+def analytics(request):
+    form = AnalyticsFilterForm(request.GET)
+    exam_type = form.cleaned_data['exam_type'] if form.is_valid() else ''
+    context = {
+        'form': form,
+        'grades': GRADES,
+        'subject_stats': subject_stats(exam_type),
+        'course_stats': course_stats(exam_type),
+    }
+    return render(request, 'admin_panel/analytics.html', context)
+
+
+def student_api_etag(student):
+    """
+    ETag for a student's API payload.
+
+    AcademicSummary.updated_at moves on every result, attendance or
+    enrollment write (including deletes and bulk imports). Subject names and
+    credits are versioned by the catalog token. Together with the profile
+    and user fields they version the whole payload. There is deliberately no
+    Last-Modified: a catalog change has no timestamp to contribute to it.
+    """
+    summary = getattr(student, 'summary', None)
+    fingerprint = '|'.join(str(value) for value in [
+        student.id, student.updated_at.isoformat(), summary.updated_at.isoformat() if summary else '',
+        student.user.get_full_name(), student.user.email, catalog_version(),
+    ])
+    return f'"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+
+
+def student_api_payload(student):
+    summary = getattr(student, 'summary', None)
+    return {
+        'student': {
+            'id': student.id,
+            'roll_number': student.roll_number,
+            'name': student.user.get_full_name(),
+            'email': student.user.email,
+            'phone': student.phone,
+            'course': student.course,
+            'semester': student.semester,
+            'profile_completed': student.profile_completed,
+            'updated_at': student.updated_at,
+        },
+        'summary': {
+            'gpa': summary.gpa,
+            'credits_enrolled': summary.credits_enrolled,
+            'credits_earned': summary.credits_earned,
+            'passed_count': summary.passed_count,
+            'failed_count': summary.failed_count,
+            'average_attendance': summary.average_attendance,
+            'last_exam_date': summary.last_exam_date,
+        } if summary else None,
+        'subjects': list(StudentSubject.objects.filter(student=student).values(
+            'enrolled_date', code=F('subject__code'), name=F('subject__name'), credits=F('subject__credits'),
+        )),
+        'results': list(Result.objects.filter(student=student).order_by('-exam_date', '-id').values(
+            'exam_type', 'marks_obtained', 'total_marks', 'grade', 'exam_date',
+            subject_code=F('subject__code'), subject_name=F('subject__name'),
+        )),
+        'attendance': list(Attendance.objects.filter(student=student).order_by('-period', '-id').values(
+            'month', 'year', 'classes_attended', 'total_classes', 'attendance_percentage',
+            subject_code=F('subject__code'), subject_name=F('subject__name'),
+        )),
+    }
+
+
+def student_api_response(request, student):
+    etag = student_api_etag(student)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(student_api_payload(student))
+    response['ETag'] = etag
+    # Clients may keep the payload but must revalidate it with the ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_GET
+@read_from_replica
+def api_student_me(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication required.'}, status=401)
+    # Profile and summary come from one query, which is all a 304 costs
+    student = StudentProfile.objects.select_related('summary').filter(user=request.user).first()
+    if student is None:
+        return JsonResponse({'detail': 'Access denied.'}, status=403)
+    student.user = request.user
+    return student_api_response(request, student)
+
+
+@require_GET
+@read_from_replica
+def api_student_detail(request, student_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication required.'}, status=401)
+    if not is_staff_or_superuser(request.user):
+        return JsonResponse({'detail': 'Access denied.'}, status=403)
+    student = get_object_or_404(StudentProfile.objects.select_related('user', 'summary'), id=student_id)
+    return student_api_response(request, student)
+
+@never_cache
+@require_GET
+def metrics_view(request):
+    """Request metrics of this worker process in the Prometheus text format (staff only)"""
+    if not request.user.is_authenticated:
+        return HttpResponse('Authentication required.\n', status=401, content_type='text/plain')
+    if not is_staff_or_superuser(request.user):
+        return HttpResponse('Access denied.\n', status=403, content_type='text/plain')
+    return HttpResponse(metrics.expose(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,31 @@
+"""
+Process pools for CPU-bound work: job workers, transcript rendering and
+password hashing.
+
+This module imports no models. A spawned worker has to import it to find
+its initializer, before Django has been set up.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+
+
+def init_worker_process():
+    # Worker processes are spawned, so each sets Django up afresh
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'student_system.settings')
+    django.setup()
+
+
+def process_pool(workers):
+    """
+    A pool of ``workers`` processes ready to use the ORM.
+
+    The processes are spawned, not forked: a pool starts its processes
+    lazily, as work is submitted, by which time the parent has usually
+    opened database connections that a forked child would share.
+    """
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=init_worker_process,
+    )
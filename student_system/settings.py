@@ -1,8 +1,14 @@
 import os
+import sys
 from pathlib import Path
 
+import dj_database_url
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Set while `manage.py test` runs
+TESTING = sys.argv[1:2] == ['test']
+
 SECRET_KEY = 'your-secret-key-here'
 DEBUG = True
 ALLOWED_HOSTS = ['*']
@@ -18,27 +24,36 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'main.middleware.MetricsMiddleware',  # First, so it times everything below it
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # Serve static files before sessions and auth run
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'main.middleware.SlidingSessionMiddleware',  # Refresh session expiry only when due
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'main.middleware.SessionSecurityMiddleware',  # Add custom middleware
     'main.middleware.LogoutRedirectMiddleware',   # Add logout middleware
     'django.contrib.messages.middleware.MessageMiddleware',
+    'main.middleware.SessionSecurityMiddleware',  # Add custom middleware (after messages, which it uses)
+    'main.middleware.ReplicaStickinessMiddleware',  # Pin clients to the primary after a write
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-
 ]
 
 ROOT_URLCONF = 'student_system.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'main.metrics.InstrumentedDjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept for the life of the process, in
+            # development as well; the autoreloader clears them on edits
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -51,12 +66,48 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'student_system.wsgi.application'
 
+# The primary comes from DATABASE_URL and takes every write. Read replicas
+# are listed, comma-separated, in DATABASE_REPLICA_URLS; read-heavy views
+# query them through main.db_routers. Connections are kept open between
+# requests and checked before reuse.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+# Single-node SQLite tuning: IMMEDIATE transactions take the write lock up
+# front instead of failing with "database is locked" when a read lock has
+# to be upgraded. WAL, which lets readers run alongside the writer, is a
+# property of the database file and is switched on by migration 0011, so
+# merely connecting never rewrites a database file's mode.
+SQLITE_OPTIONS = {
+    'init_command': (
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA busy_timeout=5000;'
+        'PRAGMA temp_store=MEMORY;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA mmap_size=134217728'
+    ),
+    'transaction_mode': 'IMMEDIATE',
+}
+
+
+def database_config(url):
+    config = dj_database_url.parse(url, conn_max_age=DB_CONN_MAX_AGE, conn_health_checks=True)
+    if config['ENGINE'] == 'django.db.backends.sqlite3':
+        config['OPTIONS'] = {**SQLITE_OPTIONS, **config.get('OPTIONS', {})}
+    return config
+
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(os.environ.get('DATABASE_URL', f"sqlite:///{BASE_DIR / 'db.sqlite3'}")),
 }
+for number, url in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_URLS', '').split(',')), start=1):
+    # Tests run replica queries against the test primary
+    DATABASES[f'replica{number}'] = {**database_config(url.strip()), 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['main.db_routers.PrimaryReplicaRouter']
+
+# After a POST (or other write) the client reads from the primary for this
+# long, so it sees its own writes even if the replicas lag behind
+REPLICA_STICKY_SECONDS = 10
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -72,6 +123,9 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
 ]
+if TESTING:
+    # Test users are created by the hundred; a slow hash only slows the suite
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
 
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -79,11 +133,26 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
-STATICFILES_DIRS = [
-    BASE_DIR / 'main' / 'static',
-]
+# main/static is found by the app directories finder
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic fingerprints every file name with a content hash and writes
+# gzip and brotli variants next to it. WhiteNoise serves the hashed names
+# with a far-future immutable Cache-Control, so assets are fetched once
+# while pages themselves stay uncacheable.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+if TESTING:
+    # Tests run with DEBUG off, where the manifest storage would need
+    # collectstatic to have been run first
+    STORAGES['staticfiles'] = {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Authentication Settings
@@ -94,11 +163,50 @@ LOGOUT_REDIRECT_URL = '/student/login/'
 # Session Settings for Better Security
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
-SESSION_SAVE_EVERY_REQUEST = True
+# Sessions are read from the shared session cache and written through to the
+# database. Instead of saving on every request, SlidingSessionMiddleware
+# re-saves a session (extending its expiry) only once SESSION_REFRESH_AFTER
+# seconds have passed since the last save.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_AFTER = SESSION_COOKIE_AGE // 10
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
 SESSION_COOKIE_SAMESITE = 'Lax'
 
+# Caches. Everything several processes must agree on lives in file-based
+# caches that every process on the node shares: sessions (a logout in one
+# worker must not be served from another worker's stale copy), the version
+# tokens in "shared" (bumped by imports, jobs and commands, read by the web
+# workers) and the template fragments keyed by those versions. With more
+# than one node, point these at a networked backend such as Redis.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SESSION_CACHE_DIR', str(BASE_DIR / 'cache' / 'sessions')),
+        # Sized for the concurrent sessions; a culled one is reloaded from the database
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('SHARED_CACHE_DIR', str(BASE_DIR / 'cache' / 'shared')),
+        # One token per student and subject; a culled token only costs a miss
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('FRAGMENT_CACHE_DIR', str(BASE_DIR / 'cache' / 'fragments')),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+if TESTING:
+    # Each test run starts from empty caches of its own
+    CACHES = {alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias} for alias in CACHES}
+
 # Cache Control Settings
 CACHE_MIDDLEWARE_ALIAS = 'default'
 CACHE_MIDDLEWARE_SECONDS = 0  # Disable caching for authenticated views
@@ -107,4 +215,47 @@ CACHE_MIDDLEWARE_KEY_PREFIX = ''
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
-X_FRAME_OPTIONS = 'DENY'
\ No newline at end of file
+X_FRAME_OPTIONS = 'DENY'
+
+# Admin dashboard statistics are cached briefly in the shared cache and
+# dropped whenever a StudentProfile or Subject change commits
+DASHBOARD_STATS_CACHE_SECONDS = 60
+
+# Rendered subject/result/attendance fragments are cached per student under
+# a version token that changes whenever that student's records are written
+STUDENT_FRAGMENT_CACHE_SECONDS = 60 * 60 * 24
+
+# Cohort analytics entries are also invalidated by version whenever the
+# underlying results or attendance change; this only bounds their lifetime
+ANALYTICS_CACHE_SECONDS = 60 * 60 * 24
+
+# How long the role stored in the session at login is trusted before the
+# StudentProfile lookup is repeated
+ROLE_RECHECK_SECONDS = 15 * 60
+
+# Requests slower than this many seconds, or issuing more queries than the
+# budget, are logged as warnings by MetricsMiddleware. None disables a check.
+# The counters behind /metrics are kept per worker process.
+METRICS_SLOW_REQUEST_SECONDS = None
+METRICS_QUERY_BUDGET = None
+
+# Background jobs live in the Job table and are run by `manage.py run_jobs`.
+# Failed jobs are retried with exponential backoff from JOB_RETRY_DELAY
+# seconds; a running job whose worker has not renewed its lease for
+# JOB_LEASE_SECONDS is assumed lost and queued again.
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 30
+JOB_LEASE_SECONDS = 60
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_SECONDS = 1.0
+
+# Processes a background student import hashes initial passwords in. Kept
+# small: they share the machine with the web and job workers. Imports run
+# inside a web request hash in-process.
+ONBOARDING_HASH_WORKERS = int(os.environ.get('ONBOARDING_HASH_WORKERS', 2))
+
+# Deleted students are hidden at once and purged by a background job that
+# deletes their records this many rows per transaction, pausing between
+# batches so other writers are not kept waiting on the database lock
+PURGE_BATCH_SIZE = 500
+PURGE_PAUSE_SECONDS = 0.05